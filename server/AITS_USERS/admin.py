@@ -1,10 +1,64 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect, render
+from django.urls import path
 
 # Register your models here.
 
-from .models import User, Issue, Department, College, School, Programme, Course
+from .models import User, Issue, Department, College, School, Programme, Course, OutboundMessage
+from .bulk_import import IMPORT_ORDER, run_import
+
+
+class CSVImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[(kind, kind.title()) for kind in IMPORT_ORDER])
+    file = forms.FileField(help_text="UTF-8 CSV with a header row. See AITS_USERS/bulk_import.py for the columns.")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Validate every row without saving.")
+
 
-admin.site.register(User)
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/AITS_USERS/user/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import-csv/', self.admin_site.admin_view(self.import_csv), name='AITS_USERS_user_import_csv'),
+        ]
+        return urls + super().get_urls()
+
+    def import_csv(self, request):
+        """
+        Upload one CSV file of catalogue rows or users (see bulk_import).
+        """
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        form = CSVImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            kind = form.cleaned_data['kind']
+            # Read the upload a line at a time
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            # Hash in this process: a pool per request would fork the web
+            # worker. Large user files belong with `manage.py import_csv`.
+            result, = run_import({kind: lines}, dry_run=form.cleaned_data['dry_run'], workers=1)
+            if not result.errors and not form.cleaned_data['dry_run']:
+                self.message_user(
+                    request,
+                    f"Imported {result.created} {kind} ({result.skipped} already existed) in {result.seconds:.1f}s.",
+                    messages.SUCCESS,
+                )
+                return redirect('admin:AITS_USERS_user_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import CSV",
+            'form': form,
+            'result': result,
+            'errors': result.errors[:200] if result else [],
+        }
+        return render(request, 'admin/AITS_USERS/import_csv.html', context)
 
 # admin.site.register(Issue)
 
@@ -55,4 +109,11 @@ class IssueAdmin(admin.ModelAdmin):
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'department')
     search_fields = ('code', 'name')
-    list_filter = ('department',)
\ No newline at end of file
+    list_filter = ('department',)
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'channel', 'status', 'recipient', 'user', 'issue', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    search_fields = ('recipient', 'subject')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class AitsUsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'AITS_USERS'
+
+    def ready(self):
+        # Register model signal handlers and the query metrics wrapper
+        from . import metrics, signals  # noqa: F401
@@ -0,0 +1,172 @@
+"""
+JWT authentication that builds request.user from token claims.
+
+CustomTokenObtainSerializer embeds the user's role and college, department and
+programme ids in every token. ClaimsJWTAuthentication turns those claims back
+into an unsaved User instance, so read-only endpoints never load the User row.
+Role or affiliation changes take effect when the next access token is issued.
+
+Deactivating or deleting a user records a RevokedUser row. Each process keeps
+the recent ones in revoked_users, synced like the refresh token revocation
+cache (AITS_USERS/revocation.py), and refuses claims tokens issued before the
+revocation. Other processes see it within REVOCATION_SYNC_SECONDS.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedUser
+
+
+User = get_user_model()
+
+# Claims copied from the user at token issue (see CustomTokenObtainSerializer)
+USER_CLAIMS = ('username', 'role', 'college_id', 'department_id', 'programme_id', 'is_staff', 'is_superuser')
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache whose entries expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                now = time.monotonic()
+                self._data = {k: v for k, v in self._data.items() if v[0] >= now}
+                if len(self._data) >= self.maxsize:
+                    self._data.clear()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = TTLCache(ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+class UserRevocationCache:
+    """
+    In-process map of revoked user id -> revocation timestamp.
+
+    Entries older than the access token lifetime are dropped: every token
+    issued before them has expired.
+    """
+
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self._revoked = {}
+        self._last_id = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def revoked_at(self, user_id):
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        return self._revoked.get(user_id)
+
+    def add(self, user_id, revoked_at):
+        with self._lock:
+            self._revoked[user_id] = max(revoked_at, self._revoked.get(user_id, revoked_at))
+
+    def sync(self):
+        with self._lock:
+            cutoff = time.time() - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+            if self._last_id is None:
+                # First load: only revocations newer than any live access token
+                rows = RevokedUser.objects.filter(revoked_at__gt=timezone.now() - api_settings.ACCESS_TOKEN_LIFETIME)
+                self._last_id = 0
+            else:
+                rows = RevokedUser.objects.filter(id__gt=self._last_id)
+            for pk, user_id, revoked_at in rows.order_by('id').values_list('id', 'user_id', 'revoked_at'):
+                revoked_at = revoked_at.timestamp()
+                self._revoked[user_id] = max(revoked_at, self._revoked.get(user_id, revoked_at))
+                self._last_id = max(self._last_id, pk)
+            self._revoked = {user_id: at for user_id, at in self._revoked.items() if at > cutoff}
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._last_id = None
+            self._synced_at = 0.0
+
+
+revoked_users = UserRevocationCache(settings.REVOCATION_SYNC_SECONDS)
+
+
+def revoke_user_tokens(user_id):
+    """
+    Refuse the access tokens already issued to ``user_id``.
+    """
+    revoked = RevokedUser.objects.create(user_id=user_id)
+    revoked_users.add(user_id, revoked.revoked_at.timestamp())
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reads the user from the token's claims.
+
+    Tokens issued before the claims existed fall back to loading the User
+    row, and those rows are kept in a short-TTL in-process cache.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return self.get_claims_user(user_id, validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        # Callers may set attributes on request.user; don't share the cached instance
+        return copy.copy(user)
+
+    def get_claims_user(self, user_id, validated_token):
+        # simplejwt stores the id claim as a string
+        user_id = User._meta.pk.to_python(user_id)
+        revoked_at = revoked_users.revoked_at(user_id)
+        if revoked_at is not None and validated_token.get('iat', 0) <= revoked_at:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        user = User(id=user_id, is_active=True, **{claim: validated_token[claim] for claim in USER_CLAIMS})
+        # Behave like a row loaded from the database so it can be used in
+        # filters and as a foreign key value
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
@@ -1,4 +1,3 @@
-
 #backends
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
@@ -12,6 +11,9 @@ class EmailOrUsernameModelBackend(ModelBackend):
     """
     Authentication backend that allows users to log in with either
     their email address or username.
+
+    The identifier is resolved with a single indexed query and each attempt
+    runs exactly one password hash, whether or not the user exists.
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None:
@@ -19,18 +21,21 @@ class EmailOrUsernameModelBackend(ModelBackend):
         
         if username is None or password is None:
             return None
-        
-        try:
-            # Look up the user by username or email
-            user = User.objects.get(Q(username=username) | Q(email=username))
-        except User.DoesNotExist:
+
+        # Only identifiers that look like an email can match the email column
+        lookup = Q(username=username)
+        if '@' in username:
+            lookup |= Q(email=username)
+        candidates = list(User.objects.filter(lookup)[:2])
+
+        if not candidates:
             # Simulating the hashing time to help prevent timing attacks
             make_password(password)
-            
             return None
-        else:
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
+
+        # Prefer an exact username match over another account's email
+        user = next((c for c in candidates if c.username == username), candidates[0])
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
         
         return None
-
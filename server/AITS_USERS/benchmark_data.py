@@ -0,0 +1,199 @@
+"""
+Synthetic dataset for load tests, created by ``manage.py seed_benchmark_data``.
+
+Builds colleges -> schools -> departments -> programmes -> courses, then
+students, lecturers and registrars, issues spread over several years, issue
+updates and notifications. Rows are generated with a seeded random.Random
+(so the same options always give the same data) and written with bulk_create
+in large batches. Every account shares one password, hashed once.
+
+All seeded usernames start with ``bench-`` and names with "Bench", so the
+load generator can find the accounts and the data is easy to spot.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .issue_stats import rebuild_issue_statistics
+from .models import College, Course, Department, Issue, IssueUpdate, Notification, Programme, School, User
+from .notifications import rebuild_unread_counts
+from .org_tree import rebuild_org_tree
+from .search import rebuild_index
+
+
+BENCHMARK_PASSWORD = 'bench-password'
+CATEGORIES = [value for value, _ in Issue.ISSUE_CATEGORIES]
+COMMENTS = [
+    'Forwarded to the course lecturer.',
+    'Marks have been re-entered; please check the portal.',
+    'Awaiting the coursework register from the department.',
+    'Script retrieved for remarking.',
+]
+DESCRIPTIONS = [
+    'My coursework marks are missing for {course}.',
+    'The final exam grade for {course} looks incorrect.',
+    'I would like {course} remarked after the results release.',
+    'Test two marks for {course} were not recorded.',
+]
+
+
+@contextmanager
+def keep_timestamps(*models):
+    """
+    Let bulk_create store the generated created_at/updated_at values instead
+    of auto_now/auto_now_add overwriting them.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _bulk(model, rows, batch_size):
+    """
+    bulk_create a generator of instances a batch at a time and return the
+    created primary keys.
+    """
+    ids, batch = [], []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+    return ids
+
+
+def seed_dataset(colleges=5, schools_per_college=3, departments_per_school=4, programmes_per_department=3,
+                 courses_per_department=12, students=50000, issues=500000, years=4, seed=42,
+                 batch_size=5000, search_index=True, log=print):
+    """
+    Create the dataset and return {model name: rows created}.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = {}
+
+    with transaction.atomic():
+        college_ids = _bulk(College, (College(name=f'Bench College {c}') for c in range(colleges)), batch_size)
+        school_rows = [(college_id, f'Bench School {c}.{s}') for c, college_id in enumerate(college_ids)
+                       for s in range(schools_per_college)]
+        school_ids = _bulk(School, (School(name=name, college_id=college_id) for college_id, name in school_rows),
+                           batch_size)
+        school_college = {school_id: college_id for school_id, (college_id, _) in zip(school_ids, school_rows)}
+        department_rows = [(school_id, f'Bench Department {n}.{d}') for n, school_id in enumerate(school_ids)
+                           for d in range(departments_per_school)]
+        department_ids = _bulk(Department, (Department(name=name, school_id=school_id)
+                                            for school_id, name in department_rows), batch_size)
+        department_college = {department_id: school_college[school_id]
+                              for department_id, (school_id, _) in zip(department_ids, department_rows)}
+        programme_rows = [(department_id, f'B{n}P{p}') for n, department_id in enumerate(department_ids)
+                          for p in range(programmes_per_department)]
+        programme_ids = _bulk(Programme, (Programme(code=code, name=f'Bench Programme {code}', department_id=department_id)
+                                          for department_id, code in programme_rows), batch_size)
+        programme_department = {programme_id: department_id
+                                for programme_id, (department_id, _) in zip(programme_ids, programme_rows)}
+        course_rows = [(department_id, f'B{n}C{c}') for n, department_id in enumerate(department_ids)
+                       for c in range(courses_per_department)]
+        course_ids = _bulk(Course, (Course(code=code, name=f'Bench Course {code}', department_id=department_id)
+                                    for department_id, code in course_rows), batch_size)
+        department_courses = {}
+        for course_id, (department_id, _) in zip(course_ids, course_rows):
+            department_courses.setdefault(department_id, []).append(course_id)
+        created.update(colleges=len(college_ids), schools=len(school_ids), departments=len(department_ids),
+                       programmes=len(programme_ids), courses=len(course_ids))
+        log(f"Catalogue: {created}")
+
+        password = make_password(BENCHMARK_PASSWORD)
+
+        def user(username, role, **fields):
+            return User(username=username, email=f'{username}@bench.example.com', password=password, role=role,
+                        first_name='Bench', last_name=username.rsplit('-', 1)[-1], **fields)
+
+        registrar_ids = _bulk(User, (user(f'bench-registrar-{n}', 'academic registrar', college_id=college_id)
+                                     for n, college_id in enumerate(college_ids)), batch_size)
+        # Roughly one lecturer per 50 students, at least two per department
+        per_department = max(2, students // 50 // max(1, len(department_ids)))
+        lecturer_rows = [department_id for department_id in department_ids for _ in range(per_department)]
+        lecturer_ids = _bulk(User, (user(f'bench-lecturer-{n}', 'lecturer', department_id=department_id,
+                                         college_id=department_college[department_id])
+                                    for n, department_id in enumerate(lecturer_rows)), batch_size)
+        department_lecturers = {}
+        for lecturer_id, department_id in zip(lecturer_ids, lecturer_rows):
+            department_lecturers.setdefault(department_id, []).append(lecturer_id)
+        student_programmes = [rng.choice(programme_ids) for _ in range(students)]
+        student_ids = _bulk(User, (user(f'bench-student-{n}', 'student', programme_id=programme_id,
+                                        department_id=programme_department[programme_id],
+                                        college_id=department_college[programme_department[programme_id]])
+                                   for n, programme_id in enumerate(student_programmes)), batch_size)
+        created.update(registrars=len(registrar_ids), lecturers=len(lecturer_ids), students=len(student_ids))
+        log(f"Users: {len(registrar_ids) + len(lecturer_ids) + len(student_ids)}")
+
+        span = timedelta(days=365 * years).total_seconds()
+
+        def generate_issues():
+            for _ in range(issues):
+                n = rng.randrange(len(student_ids))
+                department_id = programme_department[student_programmes[n]]
+                course_id = rng.choice(department_courses[department_id])
+                created_at = now - timedelta(seconds=rng.random() * span)
+                status = rng.choices(('resolved', 'in_progress', 'open'), (70, 15, 15))[0]
+                assigned_to = rng.choice(department_lecturers[department_id]) if status != 'open' or rng.random() < .5 else None
+                resolved_at = min(now, created_at + timedelta(hours=rng.expovariate(1 / 72))) if status == 'resolved' else None
+                yield Issue(
+                    student_id=student_ids[n], college_id=department_college[department_id],
+                    course_id=course_id, assigned_to_id=assigned_to,
+                    category=rng.choice(CATEGORIES), semester=rng.choice((1, 2)),
+                    year_of_study=rng.choice(('Year One', 'Year Two', 'Year Three')),
+                    description=rng.choice(DESCRIPTIONS).format(course=f'course {course_id}'),
+                    status=status, created_at=created_at, updated_at=resolved_at or created_at, resolved_at=resolved_at,
+                )
+
+        # Keep what the updates and notifications need without holding instances
+        issue_facts = []
+
+        def tracked(rows):
+            for issue in rows:
+                issue_facts.append((issue.student_id, issue.assigned_to_id, issue.created_at))
+                yield issue
+
+        with keep_timestamps(Issue, IssueUpdate, Notification):
+            issue_ids = _bulk(Issue, tracked(generate_issues()), batch_size)
+            log(f"Issues: {len(issue_ids)}")
+
+            def generate_updates():
+                for issue_id, (_, assigned_to, created_at) in zip(issue_ids, issue_facts):
+                    if assigned_to and rng.random() < .6:
+                        yield IssueUpdate(issue_id=issue_id, user_id=assigned_to, comment=rng.choice(COMMENTS),
+                                          created_at=created_at + timedelta(hours=rng.random() * 48))
+
+            def generate_notifications():
+                for issue_id, (student_id, _, created_at) in zip(issue_ids, issue_facts):
+                    yield Notification(user_id=student_id, issue_id=issue_id, message=f'Issue #{issue_id} was updated.',
+                                       is_read=rng.random() < .7, created_at=created_at)
+
+            created['issue_updates'] = len(_bulk(IssueUpdate, generate_updates(), batch_size))
+            created['notifications'] = len(_bulk(Notification, generate_notifications(), batch_size))
+        created['issues'] = len(issue_ids)
+        log(f"Updates: {created['issue_updates']}, notifications: {created['notifications']}")
+
+    # bulk_create skips the signals that maintain these
+    created['issue_statistics'] = rebuild_issue_statistics()
+    created['notification_counters'] = rebuild_unread_counts()
+    created['org_units'] = rebuild_org_tree()
+    if search_index:
+        created['search_documents'] = rebuild_index()
+    return created
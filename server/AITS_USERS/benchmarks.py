@@ -0,0 +1,689 @@
+"""
+Benchmark scenarios, run with ``python manage.py benchmark [name ...]``.
+
+Each scenario runs inside a transaction that is rolled back afterwards, so it
+can seed whatever data it needs without leaving anything behind. A scenario
+returns a list of result rows (plain dicts) which the command prints as a
+table and can also write out as JSON.
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .models import College, Course, Department, Programme, School, User
+
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """
+    Register a benchmark scenario under ``name``.
+    """
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def count_queries(func, *args, **kwargs):
+    """
+    Call ``func`` and return ``(result, number_of_queries)``.
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        result = func(*args, **kwargs)
+    return result, len(ctx.captured_queries)
+
+
+def time_calls(func, iterations):
+    """
+    Call ``func`` ``iterations`` times and return latency stats in milliseconds.
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'per_sec': round(iterations / (sum(samples) / 1000), 1) if sum(samples) else None,
+    }
+
+
+def seed_catalogue(courses_per_department=20):
+    """
+    Create a small college -> school -> department -> programme/course tree.
+    """
+    college = College.objects.create(name='Benchmark College')
+    school = School.objects.create(name='Benchmark School', college=college)
+    with_courses = Department.objects.create(name='Benchmark Department', school=school)
+    without_courses = Department.objects.create(name='Benchmark Empty Department', school=school)
+    programme = Programme.objects.create(name='Benchmark Programme', code='BENCH', department=with_courses)
+    empty_programme = Programme.objects.create(name='Benchmark Empty Programme', code='BENCH0', department=without_courses)
+    Course.objects.bulk_create(
+        Course(code=f'BEN{i:04d}', name=f'Benchmark Course {i}', department=with_courses)
+        for i in range(courses_per_department)
+    )
+    return {
+        'college': college,
+        'school': school,
+        'department': with_courses,
+        'empty_department': without_courses,
+        'programme': programme,
+        'empty_programme': empty_programme,
+    }
+
+
+@scenario('courses')
+def course_resolution(options):
+    """
+    Round trips per CourseListView branch, with a cold and a warm department map.
+    """
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from .views import CourseListView
+
+    catalogue = seed_catalogue()
+    student = User(username='bench-student', role='student', programme=catalogue['programme'])
+    lecturer = User(username='bench-lecturer', role='lecturer', department=catalogue['department'])
+    orphan = User(username='bench-orphan', role='student', programme=catalogue['empty_programme'])
+    for user in (student, lecturer, orphan):
+        user.set_unusable_password()
+        user.save()
+
+    branches = [
+        ('programme param', f"?programme={catalogue['programme'].id}", None),
+        ('department param', f"?department={catalogue['department'].id}", None),
+        ("user's programme", '', student),
+        ("user's department", '', lecturer),
+        ('all courses fallback', '', orphan),
+    ]
+    factory = APIRequestFactory()
+
+    def list_courses(query, user):
+        request = factory.get('/api/courses/' + query)
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = CourseListView()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        # Resolution plus the course fetch, without the response cache
+        return list(view.filter_queryset(view.get_queryset()))
+
+    rows = []
+    for name, query, user in branches:
+        cache.clear()
+        courses, cold = count_queries(list_courses, query, user)
+        _, warm = count_queries(list_courses, query, user)
+        timing = time_calls(lambda: list_courses(query, user), options['iterations'])
+        rows.append({
+            'branch': name,
+            'courses': len(courses),
+            'queries_cold': cold,
+            'queries_warm': warm,
+            **timing,
+        })
+    return rows
+
+
+@scenario('login')
+def login_throughput(options):
+    """
+    Logins per second on one core for good, bad and unknown credentials.
+    """
+    from unittest import mock
+
+    from django.conf import settings
+    from django.contrib.auth import authenticate, hashers
+
+    user = User.objects.create_user('bench-login', 'bench-login@example.com', 'bench-password', role='student')
+    attempts = [
+        ('username, correct password', user.username, 'bench-password'),
+        ('email, correct password', user.email, 'bench-password'),
+        ('wrong password', user.username, 'not-the-password'),
+        ('unknown user', 'nobody@example.com', 'bench-password'),
+    ]
+    iterations = max(1, options['iterations'] // 5)
+
+    rows = []
+    for name, identifier, password in attempts:
+        # Count PBKDF2 runs by wrapping the hasher's encode step
+        with mock.patch.object(hashers, 'pbkdf2', wraps=hashers.pbkdf2) as pbkdf2:
+            _, queries = count_queries(authenticate, None, username=identifier, password=password)
+        rows.append({
+            'attempt': name,
+            'iterations': settings.PASSWORD_HASH_ITERATIONS,
+            'queries': queries,
+            'hashes': pbkdf2.call_count,
+            **time_calls(lambda: authenticate(None, username=identifier, password=password), iterations),
+        })
+    return rows
+
+
+@scenario('export')
+def issue_export_memory(options):
+    """
+    Peak Python memory while streaming the issue history export at growing
+    sizes; it should stay flat as the row count grows.
+    """
+    import tracemalloc
+
+    from .exports import iter_csv, iter_export_rows, iter_ndjson
+    from .models import Issue
+
+    catalogue = seed_catalogue()
+    student = User(username='bench-export', role='student', college=catalogue['college'])
+    student.set_unusable_password()
+    student.save()
+    course = Course.objects.filter(department=catalogue['department']).first()
+    issues = Issue.objects.filter(student=student).order_by('-created_at', '-id')
+
+    rows = []
+    created = 0
+    for size in (1000, 10000, 50000):
+        # bulk_create skips the statistics and search signals
+        Issue.objects.bulk_create(
+            (Issue(student=student, course=course, category='other', semester=1, description='x' * 200)
+             for _ in range(size - created)),
+            batch_size=2000,
+        )
+        created = size
+        for name, encode in (('csv', iter_csv), ('ndjson', iter_ndjson)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            written = sum(len(chunk) for chunk in encode(iter_export_rows(issues)))
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rows.append({
+                'format': name,
+                'rows': size,
+                'bytes': written,
+                'peak_kib': round(peak / 1024),
+                'rows_per_sec': round(size / elapsed),
+            })
+    return rows
+
+
+@scenario('import')
+def csv_import_throughput(options):
+    """
+    Rows per second for the bulk CSV import: a course catalogue, then users
+    hashed in one process and across a process pool.
+    """
+    import os
+
+    from .bulk_import import run_import
+
+    def lines(header, rows):
+        yield ','.join(header) + '\n'
+        for row in rows:
+            yield ','.join(row) + '\n'
+
+    catalogue = {
+        'colleges': lines(['name'], [['Import College']]),
+        'schools': lines(['name', 'college'], [['Import School', 'Import College']]),
+        'departments': lines(['name', 'school'], [[f'Import Department {i}', 'Import School'] for i in range(20)]),
+        'programmes': lines(
+            ['code', 'name', 'department'],
+            [[f'IMP{i}', f'Import Programme {i}', f'Import Department {i}'] for i in range(20)],
+        ),
+        'courses': lines(
+            ['code', 'name', 'department'],
+            [[f'IC{i:05d}', f'Import Course {i}', f'Import Department {i % 20}'] for i in range(5000)],
+        ),
+    }
+    rows = []
+    for result in run_import(catalogue):
+        rows.append({'file': result.kind, 'workers': '-', 'rows': result.rows, 'rows_per_sec': result.rows_per_sec})
+
+    # Hashing dominates user imports, so keep the sample small
+    users = options['iterations']
+    for workers in sorted({1, max(2, os.cpu_count() or 1)}):
+        header = ['username', 'email', 'password', 'role', 'college', 'programme']
+        user_rows = [
+            [f'import-{workers}-{i}', f'import-{workers}-{i}@example.com', 'import-password', 'student',
+             'Import College', f'IMP{i % 20}']
+            for i in range(users)
+        ]
+        result, = run_import({'users': lines(header, user_rows)}, workers=workers)
+        rows.append({'file': 'users', 'workers': workers, 'rows': result.rows, 'rows_per_sec': result.rows_per_sec})
+    return rows
+
+
+@scenario('register')
+def registration_throughput(options):
+    """
+    Registrations per second on one worker, with the hashes and queries each
+    registration costs.
+    """
+    from itertools import count
+    from unittest import mock
+
+    from django.conf import settings
+    from django.contrib.auth import hashers
+    from rest_framework.test import APIRequestFactory
+
+    from .views import RegisterView
+
+    catalogue = seed_catalogue(courses_per_department=0)
+    factory = APIRequestFactory()
+    view = RegisterView.as_view()
+    serial = count()
+
+    def register():
+        n = next(serial)
+        response = view(factory.post('/api/auth/register/', {
+            'username': f'bench-register-{n}',
+            'email': f'bench-register-{n}@example.com',
+            'password': 'bench-password',
+            'confirm_password': 'bench-password',
+            'role': 'student',
+            'college_id': catalogue['college'].id,
+            'programme_id': catalogue['programme'].id,
+        }, format='json'))
+        assert response.status_code == 201, response.data
+
+    with mock.patch.object(hashers, 'pbkdf2', wraps=hashers.pbkdf2) as pbkdf2:
+        with CaptureQueriesContext(connection) as ctx:
+            register()
+    writes = [q for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))]
+    return [{
+        'iterations': settings.PASSWORD_HASH_ITERATIONS,
+        'queries': len(ctx.captured_queries),
+        'writes': len(writes),
+        'hashes': pbkdf2.call_count,
+        **time_calls(register, max(1, options['iterations'] // 5)),
+    }]
+
+
+@scenario('refresh')
+def token_refresh_latency(options):
+    """
+    Refresh token rotation latency and queries as the token tables grow,
+    for simplejwt's stock refresh view and the revocation-cache one.
+    """
+    import uuid
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+    from rest_framework_simplejwt.views import TokenRefreshView
+
+    from .revocation import RevocableRefreshToken, revocation_cache
+    from .views import CustomTokenRefreshView
+
+    user = User(username='bench-refresh', email='bench-refresh@example.com', role='student')
+    user.set_unusable_password()
+    user.save()
+    factory = APIRequestFactory()
+    views = (('simplejwt', TokenRefreshView.as_view()), ('revocation cache', CustomTokenRefreshView.as_view()))
+    iterations = max(1, options['iterations'] // 2)
+
+    rows = []
+    seeded = 0
+    for size in (0, 10000, 100000):
+        # Aged tables: half the tokens expired, every other one revoked
+        now = timezone.now()
+        for start in range(seeded, size, 5000):
+            tokens = OutstandingToken.objects.bulk_create(
+                OutstandingToken(user=user, jti=uuid.uuid4().hex, token='-',
+                                 expires_at=now + timedelta(hours=12 if n % 2 else -12))
+                for n in range(start, min(size, start + 5000))
+            )
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in tokens[::2])
+        seeded = size
+
+        for name, view in views:
+            revocation_cache.clear()
+            current = [str(RevocableRefreshToken.for_user(user))]
+
+            def refresh():
+                response = view(factory.post('/api/auth/refresh/', {'refresh': current[0]}, format='json'))
+                assert response.status_code == 200, response.data
+                current[0] = response.data['refresh']
+
+            # The first call also loads the revocation cache
+            refresh()
+            _, queries = count_queries(refresh)
+            rows.append({'view': name, 'tokens': size, 'queries': queries, **time_calls(refresh, iterations)})
+    return rows
+
+
+@scenario('inbox')
+def notification_inbox(options):
+    """
+    Unread badge from the counter row versus COUNT(*), and the cost of a
+    mark-all-read, as a user's notification history grows.
+    """
+    from django.utils import timezone
+
+    from .models import Issue, Notification
+    from .notifications import get_unread_count, mark_read, rebuild_unread_counts
+
+    catalogue = seed_catalogue(courses_per_department=1)
+    user = User(username='bench-inbox', email='bench-inbox@example.com', role='student')
+    user.set_unusable_password()
+    user.save()
+    course = Course.objects.filter(department=catalogue['department']).first()
+    issue = Issue.objects.create(student=user, course=course, category='missing_marks',
+                                 description='Bench inbox issue', semester=1)
+    iterations = options['iterations']
+
+    rows = []
+    seeded = 0
+    for size in (100, 10000, 100000):
+        Notification.objects.bulk_create(
+            (Notification(user=user, issue=issue, message=f'Notification {n}', is_read=n % 4 != 0)
+             for n in range(seeded, size)),
+            batch_size=5000,
+        )
+        seeded = size
+        rebuild_unread_counts()
+        unread = Notification.objects.filter(user=user, is_read=False)
+        assert get_unread_count(user.pk) == unread.count()
+        for badge, read in (('COUNT(*)', unread.count), ('counter', lambda: get_unread_count(user.pk))):
+            rows.append({'notifications': size, 'badge': badge, 'queries': count_queries(read)[1],
+                         **time_calls(read, iterations)})
+        start = time.perf_counter()
+        marked, queries = count_queries(mark_read, user.pk, before=timezone.now())
+        rows.append({'notifications': size, 'badge': f'mark {marked} read', 'queries': queries,
+                     'mean_ms': round((time.perf_counter() - start) * 1000, 3)})
+        Notification.objects.filter(user=user).update(is_read=False)
+    return rows
+
+
+@scenario('org_tree')
+def org_tree_build(options):
+    """
+    Building the full catalogue tree (and one college's subtree) from the
+    materialised paths versus walking the five tables with prefetches.
+    """
+    from .org_tree import build_tree, get_tree_rows, rebuild_org_tree
+
+    colleges = College.objects.bulk_create(College(name=f'Bench Tree College {c}') for c in range(10))
+    schools = School.objects.bulk_create(
+        School(name=f'Bench Tree School {c.pk}.{s}', college=c) for c in colleges for s in range(4))
+    departments = Department.objects.bulk_create(
+        Department(name=f'Bench Tree Department {s.pk}.{d}', school=s) for s in schools for d in range(5))
+    Programme.objects.bulk_create(
+        Programme(name=f'Bench Tree Programme {d.pk}.{p}', code=f'TP{d.pk}.{p}', department=d)
+        for d in departments for p in range(3))
+    Course.objects.bulk_create(
+        Course(name=f'Bench Tree Course {d.pk}.{k}', code=f'TK{d.pk}.{k}', department=d)
+        for d in departments for k in range(12))
+    nodes = rebuild_org_tree()
+
+    def nested():
+        tree = College.objects.prefetch_related('schools__departments__programmes', 'schools__departments__courses')
+        return [{
+            'id': college.id, 'name': college.name, 'schools': [{
+                'id': school.id, 'name': school.name, 'departments': [{
+                    'id': department.id, 'name': department.name,
+                    'programmes': [{'id': p.id, 'name': p.name, 'code': p.code} for p in department.programmes.all()],
+                    'courses': [{'id': k.id, 'name': k.name, 'code': k.code} for k in department.courses.all()],
+                } for department in school.departments.all()],
+            } for school in college.schools.all()],
+        } for college in tree]
+
+    def materialised():
+        return build_tree(get_tree_rows())
+
+    def subtree():
+        return build_tree(get_tree_rows('college', colleges[0].pk))
+
+    iterations = max(1, options['iterations'] // 5)
+    rows = []
+    for name, build in (('prefetch walk', nested), ('materialised path', materialised), ('one college', subtree)):
+        _, queries = count_queries(build)
+        rows.append({'tree': name, 'nodes': nodes, 'queries': queries, **time_calls(build, iterations)})
+    return rows
+
+
+@scenario('serialize')
+def list_serialization(options):
+    """
+    Issue rows serialized and rendered per second: IssueSerializer with
+    DRF's JSONRenderer versus the ISSUE_LIST projection with orjson.
+    """
+    from rest_framework.renderers import JSONRenderer
+
+    from .models import Issue, IssueUpdate
+    from .projections import ISSUE_LIST
+    from .querysets import optimize_queryset
+    from .renderers import ORJSONRenderer
+    from .serializers import IssueSerializer
+
+    catalogue = seed_catalogue(courses_per_department=5)
+    student = User(username='bench-serialize', email='bench-serialize@example.com', role='student',
+                   college=catalogue['college'], programme=catalogue['programme'], department=catalogue['department'])
+    student.set_unusable_password()
+    student.save()
+    courses = list(Course.objects.filter(department=catalogue['department']))
+    issues = Issue.objects.bulk_create(
+        Issue(student=student, course=courses[n % len(courses)], category='missing_marks', semester=1,
+              year_of_study='Year One', description=f'Bench serialize issue {n}')
+        for n in range(500)
+    )
+    IssueUpdate.objects.bulk_create(
+        IssueUpdate(issue=issue, user=student, comment='Bench comment') for issue in issues for _ in range(2)
+    )
+    queryset = Issue.objects.filter(student=student).order_by('-created_at', '-id')
+
+    def serializer_path():
+        return JSONRenderer().render(IssueSerializer(optimize_queryset(queryset, IssueSerializer), many=True).data)
+
+    def projection_path():
+        return ORJSONRenderer().render(ISSUE_LIST.many(ISSUE_LIST.apply(queryset)))
+
+    iterations = max(1, options['iterations'] // 10)
+    rows = []
+    for name, func in (('IssueSerializer + JSONRenderer', serializer_path), ('ISSUE_LIST + orjson', projection_path)):
+        body, queries = count_queries(func)
+        stats = time_calls(func, iterations)
+        rows.append({
+            'path': name, 'rows': len(issues), 'queries': queries, 'bytes': len(body),
+            'mean_ms': stats['mean_ms'], 'p95_ms': stats['p95_ms'],
+            'rows_per_sec': round(len(issues) / stats['mean_ms'] * 1000),
+        })
+    return rows
+
+
+@scenario('json')
+def json_rendering(options):
+    """
+    Render and parse speed of DRF's JSONRenderer/JSONParser versus
+    ORJSONRenderer/ORJSONParser over real IssueSerializer output. Their
+    compatibility is checked in tests.JSONCompatibilityTests.
+    """
+    import io
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from .models import Issue, IssueUpdate
+    from .parsers import ORJSONParser
+    from .querysets import optimize_queryset
+    from .renderers import ORJSONRenderer
+    from .serializers import IssueSerializer
+
+    catalogue = seed_catalogue(courses_per_department=5)
+    student = User(username='bench-json', email='bench-json@example.com', role='student',
+                   college=catalogue['college'], programme=catalogue['programme'], department=catalogue['department'])
+    student.set_unusable_password()
+    student.save()
+    courses = list(Course.objects.filter(department=catalogue['department']))
+    issues = Issue.objects.bulk_create(
+        Issue(student=student, course=courses[n % len(courses)], category='missing_marks', semester=1,
+              year_of_study='Year One', description=f'Bench JSON issue {n} – marks missing ✓')
+        for n in range(500)
+    )
+    IssueUpdate.objects.bulk_create(
+        IssueUpdate(issue=issue, user=student, comment='Bench comment') for issue in issues for _ in range(2)
+    )
+    data = IssueSerializer(optimize_queryset(Issue.objects.filter(student=student), IssueSerializer), many=True).data
+    body = JSONRenderer().render(data)
+
+    iterations = max(1, options['iterations'] // 10)
+    rows = []
+    for name, renderer, parser in (('stdlib (DRF)', JSONRenderer(), JSONParser()),
+                                   ('orjson', ORJSONRenderer(), ORJSONParser())):
+        render = time_calls(lambda: renderer.render(data), iterations)
+        parse = time_calls(lambda: parser.parse(io.BytesIO(body), parser_context={}), iterations)
+        rows.append({
+            'json': name, 'issues': len(data), 'bytes': len(body),
+            'render_ms': render['mean_ms'], 'parse_ms': parse['mean_ms'],
+        })
+    return rows
+
+
+@scenario('compression')
+def response_compression(options):
+    """
+    Bytes saved and compression time per codec for ISSUE_LIST responses of
+    several sizes, at the levels in settings.COMPRESSION_LEVELS. Each codec's
+    output, whole and streamed in 100-row chunks, is decoded again and
+    compared with the original body.
+    """
+    import gzip
+
+    from django.conf import settings
+
+    from .compression import compress_stream, get_codecs
+    from .models import Issue
+    from .projections import ISSUE_LIST
+    from .renderers import ORJSONRenderer
+
+    decoders = {'gzip': gzip.decompress}
+    try:
+        import brotli
+        decoders['br'] = brotli.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        decoders['zstd'] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except ImportError:
+        pass
+
+    catalogue = seed_catalogue(courses_per_department=5)
+    student = User(username='bench-compress', email='bench-compress@example.com', role='student',
+                   college=catalogue['college'], programme=catalogue['programme'], department=catalogue['department'])
+    student.set_unusable_password()
+    student.save()
+    courses = list(Course.objects.filter(department=catalogue['department']))
+    Issue.objects.bulk_create(
+        Issue(student=student, course=courses[n % len(courses)], category='missing_marks', semester=1 + n % 2,
+              year_of_study='Year One', description=f'Bench compression issue {n}: marks for the CAT are missing')
+        for n in range(1000)
+    )
+    data = ISSUE_LIST.many(ISSUE_LIST.apply(Issue.objects.filter(student=student).order_by('-created_at', '-id')))
+
+    renderer = ORJSONRenderer()
+    iterations = max(1, options['iterations'] // 10)
+    rows = []
+    for size in (1, 10, 100, 1000):
+        body = renderer.render(data[:size])
+        chunks = [renderer.render(data[start:min(start + 100, size)]) for start in range(0, size, 100)]
+        for codec in get_codecs():
+            encoded = codec.compress(body)
+            streamed = b''.join(compress_stream(iter(chunks), codec))
+            stats = time_calls(lambda: codec.compress(body), iterations)
+            rows.append({
+                'rows': size, 'encoding': codec.name, 'raw_bytes': len(body), 'encoded_bytes': len(encoded),
+                'saved_pct': round(100 * (1 - len(encoded) / len(body)), 1),
+                'compressed': len(body) >= settings.COMPRESSION_MIN_SIZE,
+                'compress_ms': stats['mean_ms'],
+                'mb_per_sec': round(len(body) / stats['mean_ms'] / 1000, 1) if stats['mean_ms'] else None,
+                'streamed_bytes': len(streamed),
+                'round_trip': decoders[codec.name](encoded) == body
+                and decoders[codec.name](streamed) == b''.join(chunks),
+            })
+    return rows
+
+
+@scenario('connections')
+def connection_latency(options):
+    """
+    Request latency with a database connection set up for every request
+    (cold: CONN_MAX_AGE=0, or a checkout when DB_POOL is on) and with one kept
+    open across requests (warm). Run it against PostgreSQL with DB_POOL=False
+    and DB_POOL=True to compare fresh TLS connections with pooled ones.
+    """
+    import threading
+
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from .authentication import add_user_claims
+
+    # The requests run in their own thread, so on their own connection, outside
+    # the scenario's transaction; the endpoint only reads (no counter row -> 0).
+    student = User(username='bench-connections', email='bench-connections@example.com', role='student')
+    student.set_unusable_password()
+    student.save()
+    headers = {'Authorization': f'Bearer {add_user_claims(AccessToken.for_user(student), student)}'}
+    iterations = options['iterations']
+
+    def measure(cold):
+        result = {}
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            if threading.get_ident() == worker.ident:
+                connects.append(connection.alias)
+
+        def run():
+            client = Client()
+            connection = connections['default']
+
+            def request():
+                if cold:
+                    connection.close()
+                response = client.get('/api/notifications/unread-count/', headers=headers)
+                assert response.status_code == 200, response.content
+
+            pool = getattr(connection, 'pool', None)
+            opened = pool.get_stats().get('connections_num', 0) if pool is not None else 0
+            # The thread's first request always sets up a connection
+            result['first_ms'] = time_calls(request, 1)['mean_ms']
+            result.update(time_calls(request, iterations))
+            # Physical connections the pool opened meanwhile
+            result['pool'] = pool.get_stats().get('connections_num', 0) - opened if pool is not None else None
+            connections.close_all()
+
+        connection_created.connect(count_connect)
+        try:
+            worker = threading.Thread(target=run)
+            worker.start()
+            worker.join()
+        finally:
+            connection_created.disconnect(count_connect)
+        result['connects'] = len(connects)
+        return result
+
+    rows = []
+    for name, cold in (('cold (connect per request)', True), ('warm (kept open)', False)):
+        stats = measure(cold)
+        rows.append({
+            'connection': name,
+            'vendor': connections['default'].vendor,
+            'pooled': stats['pool'] is not None,
+            'requests': iterations + 1,
+            'connects': stats['connects'],
+            'server_connections': stats['pool'] if stats['pool'] is not None else stats['connects'],
+            'first_ms': stats['first_ms'],
+            'mean_ms': stats['mean_ms'],
+            'p50_ms': stats['p50_ms'],
+            'p95_ms': stats['p95_ms'],
+        })
+    return rows
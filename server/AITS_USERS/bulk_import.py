@@ -0,0 +1,299 @@
+"""
+Bulk CSV import of the catalogue (colleges, schools, departments, programmes,
+courses) and user accounts, used by ``manage.py import_csv`` and the admin
+upload.
+
+Each file is read a row at a time. Foreign keys are given by name (or code
+for programmes and courses) and resolved through in-memory name -> id maps,
+rows are inserted with bulk_create in batches, and ``import_csv`` hashes user
+passwords across a process pool (the admin upload hashes in-process). Values
+are checked against their column's max_length, so an over-long value is a row
+error rather than a database error. Rows whose key already exists are
+skipped, so an import can be re-run. Everything runs in one transaction: if
+any row is invalid, or on a dry run, nothing is written.
+
+Expected columns (extra columns are ignored):
+
+- colleges: name
+- schools: name, college
+- departments: name, school
+- programmes: code, name, department
+- courses: code, name, department
+- users: username, email, password, first_name, last_name, role, role_id,
+  college, department, programme (code). An empty password leaves the
+  account with an unusable password.
+"""
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .caching import bump_reference_version
+from .models import College, Course, Department, Programme, School, User
+from .org_tree import rebuild_org_tree
+
+
+# Dependency order: each kind only refers to kinds before it
+IMPORT_ORDER = ('colleges', 'schools', 'departments', 'programmes', 'courses', 'users')
+
+ROLES = dict(User.ROLE_CHOICES)
+
+
+class RowError(ValueError):
+    pass
+
+
+class LookupMaps:
+    """
+    Natural key -> id maps, loaded once per model and extended as rows are
+    created.
+    """
+    KEYS = {College: 'name', School: 'name', Department: 'name', Programme: 'code', Course: 'code', User: 'username'}
+
+    def __init__(self):
+        self._maps = {}
+        self.role_ids = None
+
+    def ids(self, model):
+        if model not in self._maps:
+            self._maps[model] = dict(model.objects.values_list(self.KEYS[model], 'id'))
+        return self._maps[model]
+
+    def resolve(self, model, value, column, required=False):
+        if not value:
+            if required:
+                raise RowError(f"{column} is required")
+            return None
+        pk = self.ids(model).get(value)
+        if pk is None:
+            raise RowError(f"unknown {column} {value!r}")
+        return pk
+
+    def taken_role_ids(self):
+        if self.role_ids is None:
+            self.role_ids = set(User.objects.exclude(role_id=None).values_list('role_id', flat=True))
+        return self.role_ids
+
+
+class ImportResult:
+    def __init__(self, kind):
+        self.kind = kind
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows(self):
+        return self.created + self.skipped + len(self.errors)
+
+    @property
+    def rows_per_sec(self):
+        return round(self.rows / self.seconds) if self.seconds else None
+
+
+def check_lengths(instance):
+    for field in instance._meta.concrete_fields:
+        value = getattr(instance, field.attname)
+        if field.max_length and isinstance(value, str) and len(value) > field.max_length:
+            raise RowError(f"{field.name} is longer than {field.max_length} characters")
+
+
+def _required(row, column):
+    value = row.get(column, '')
+    if not value:
+        raise RowError(f"{column} is required")
+    return value
+
+
+def build_college(row, maps):
+    return College(name=_required(row, 'name'))
+
+
+def build_school(row, maps):
+    return School(name=_required(row, 'name'), college_id=maps.resolve(College, row.get('college'), 'college', True))
+
+
+def build_department(row, maps):
+    return Department(name=_required(row, 'name'), school_id=maps.resolve(School, row.get('school'), 'school', True))
+
+
+def build_programme(row, maps):
+    return Programme(
+        code=_required(row, 'code'),
+        name=_required(row, 'name'),
+        department_id=maps.resolve(Department, row.get('department'), 'department', True),
+    )
+
+
+def build_course(row, maps):
+    return Course(
+        code=_required(row, 'code'),
+        name=_required(row, 'name'),
+        department_id=maps.resolve(Department, row.get('department'), 'department', True),
+    )
+
+
+def build_user(row, maps):
+    email = User.objects.normalize_email(_required(row, 'email'))
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise RowError(f"invalid email {email!r}")
+    role = row.get('role') or 'student'
+    if role not in ROLES:
+        raise RowError(f"role must be one of: {', '.join(ROLES)}")
+    role_id = row.get('role_id') or None
+    if role_id is not None and role_id in maps.taken_role_ids():
+        raise RowError(f"role_id {role_id!r} is already in use")
+
+    user = User(
+        username=_required(row, 'username'),
+        email=email,
+        first_name=row.get('first_name', ''),
+        last_name=row.get('last_name', ''),
+        role=role,
+        role_id=role_id,
+        college_id=maps.resolve(College, row.get('college'), 'college', role in ('student', 'academic registrar')),
+        department_id=maps.resolve(Department, row.get('department'), 'department', role == 'lecturer'),
+        programme_id=maps.resolve(Programme, row.get('programme'), 'programme', role == 'student'),
+    )
+    if role_id is not None:
+        maps.taken_role_ids().add(role_id)
+    # Hashed a batch at a time when the rows are inserted
+    user._import_password = row.get('password') or None
+    return user
+
+
+# kind -> (model, key column, row builder)
+IMPORTERS = {
+    'colleges': (College, 'name', build_college),
+    'schools': (School, 'name', build_school),
+    'departments': (Department, 'name', build_department),
+    'programmes': (Programme, 'code', build_programme),
+    'courses': (Course, 'code', build_course),
+    'users': (User, 'username', build_user),
+}
+
+
+def _setup_worker():
+    # Workers started with "spawn" have not configured Django yet
+    import django
+    django.setup()
+
+
+@contextmanager
+def password_hasher(workers=None):
+    """
+    Yield ``hash_all(passwords) -> [encoded, ...]``, spreading the hashing
+    over ``workers`` processes (default: one per CPU).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield lambda passwords: [make_password(password) for password in passwords]
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+        def hash_all(passwords):
+            return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+        yield hash_all
+
+
+def import_rows(kind, lines, maps, hash_all=None, batch_size=1000):
+    """
+    Import one CSV file of ``kind`` from ``lines`` (an iterable of text lines
+    including the header). Returns an ImportResult.
+    """
+    model, key, build = IMPORTERS[kind]
+    result = ImportResult(kind)
+    start = time.perf_counter()
+    known = maps.ids(model)
+    batch = []
+
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or key not in [name.strip() for name in reader.fieldnames]:
+        result.errors.append((1, f"missing {key!r} column"))
+        return result
+
+    for row in reader:
+        row = {name.strip(): (value or '').strip() for name, value in row.items() if name}
+        if row.get(key) in known:
+            result.skipped += 1
+            continue
+        try:
+            instance = build(row, maps)
+            check_lengths(instance)
+        except RowError as e:
+            result.errors.append((reader.line_num, str(e)))
+            continue
+        # Reserve the key so repeats later in the file are skipped
+        known[row[key]] = None
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            _flush(model, key, batch, known, hash_all)
+            result.created += len(batch)
+            batch = []
+
+    if batch:
+        _flush(model, key, batch, known, hash_all)
+        result.created += len(batch)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _flush(model, key, batch, known, hash_all):
+    if model is User:
+        if hash_all is None:
+            # Dry run: the rows are rolled back, so don't spend time hashing
+            encoded = [make_password(None) for _ in batch]
+        else:
+            # make_password(None) gives an unusable password
+            encoded = hash_all([user._import_password for user in batch])
+        for user, password in zip(batch, encoded):
+            user.password = password
+    for instance in model.objects.bulk_create(batch):
+        known[getattr(instance, key)] = instance.pk
+
+
+def run_import(sources, dry_run=False, batch_size=1000, workers=None):
+    """
+    Import ``sources`` ({kind: iterable of CSV lines}) in dependency order
+    within a single transaction. Returns a list of ImportResults; nothing is
+    committed on a dry run or if any row had an error.
+    """
+    unknown = set(sources) - set(IMPORTERS)
+    if unknown:
+        raise ValueError(f"Unknown import kind(s): {', '.join(sorted(unknown))}")
+
+    maps = LookupMaps()
+    results = []
+    with transaction.atomic():
+        hash_users = 'users' in sources and not dry_run
+        with password_hasher(workers) if hash_users else _no_hasher() as hash_all:
+            for kind in IMPORT_ORDER:
+                if kind in sources:
+                    # Once anything has failed the import is only validating
+                    failed = any(result.errors for result in results)
+                    results.append(import_rows(kind, sources[kind], maps, None if failed else hash_all, batch_size))
+
+        if dry_run or any(result.errors for result in results):
+            transaction.set_rollback(True)
+        else:
+            # bulk_create sends no post_save, so invalidate cached reference data
+            # and rebuild the org tree here
+            catalogue = [IMPORTERS[result.kind][0] for result in results if result.created and result.kind != 'users']
+            for model in catalogue:
+                transaction.on_commit(lambda model=model: bump_reference_version(model))
+            if catalogue:
+                rebuild_org_tree()
+    return results
+
+
+@contextmanager
+def _no_hasher():
+    yield None
@@ -0,0 +1,145 @@
+"""
+Versioned cache for near-static reference data (colleges, departments,
+programmes, courses and the form option lists).
+
+Every reference model has a version stamp in the cache. Signals replace the
+stamp whenever a row is saved or deleted (see signals.py), which changes the
+ETag and cache key of every response built from that model. The stamps only
+reach other worker processes through a shared cache (REDIS_URL); with the
+per-process LocMemCache the other workers keep serving the old data until
+REFERENCE_DATA_CACHE_TIMEOUT, which ``check --deploy`` warns about.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Course, Programme
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith(('LocMemCache', 'DummyCache')):
+        return [checks.Warning(
+            "The default cache is per process, so reference data changes only reach the worker that made them.",
+            hint="Set REDIS_URL to share the cache between workers.",
+            id='AITS_USERS.W001',
+        )]
+    return []
+
+
+def _version_key(model):
+    return f'refdata:version:{model._meta.label_lower}'
+
+
+def _new_version():
+    # Time based so a stamp that was evicted never comes back with an old value
+    return time.time_ns()
+
+
+def bump_reference_version(model):
+    """
+    Invalidate every cached response built from ``model``.
+    """
+    cache.set(_version_key(model), _new_version(), settings.REFERENCE_DATA_CACHE_TIMEOUT)
+
+
+def get_reference_versions(models):
+    """
+    Return the current version stamps for ``models``, creating missing ones.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), settings.REFERENCE_DATA_CACHE_TIMEOUT)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_course_department_map():
+    """
+    Return ``(programme_departments, course_departments)``.
+
+    ``programme_departments`` maps programme id to department id and
+    ``course_departments`` is the set of department ids that have at least one
+    course. Both are cached under the Programme/Course versions, so resolving
+    which department's courses to list needs no queries once warm.
+    """
+    versions = get_reference_versions((Programme, Course))
+    cache_key = 'refdata:course-departments:' + ':'.join(map(str, versions))
+    department_map = cache.get(cache_key)
+    if department_map is None:
+        department_map = (
+            dict(Programme.objects.values_list('id', 'department_id')),
+            set(Course.objects.values_list('department_id', flat=True).distinct()),
+        )
+        cache.set(cache_key, department_map, settings.REFERENCE_DATA_CACHE_TIMEOUT)
+    return department_map
+
+
+class ReferenceDataCacheMixin:
+    """
+    Serves a view's GET responses from the reference data cache.
+
+    Responses carry a weak ETag derived from the model versions and the
+    request variant (weak because CompressionMiddleware may encode the body),
+    so a matching If-None-Match returns 304 before the ORM or the serializer
+    is touched.
+    """
+    # Models whose changes invalidate this view's responses
+    reference_models = ()
+    # Set to True when the response depends on the authenticated user
+    per_user = False
+
+    def get_reference_variant(self, request):
+        return request.get_full_path()
+
+    def get_cache_control(self):
+        visibility = 'private' if self.per_user else 'public'
+        return f'{visibility}, max-age={settings.REFERENCE_DATA_MAX_AGE}'
+
+    def cached_response(self, request, build_response):
+        versions = get_reference_versions(self.reference_models)
+        fingerprint = '|'.join(
+            [type(self).__name__, *map(str, versions), self.get_reference_variant(request)]
+        )
+        digest = hashlib.sha1(fingerprint.encode()).hexdigest()
+        headers = {
+            'ETag': 'W/' + quote_etag(digest),
+            'Cache-Control': self.get_cache_control(),
+        }
+        if self.per_user:
+            headers['Vary'] = 'Authorization'
+
+        # Weak comparison: clients may send back the tag with or without W/
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if_none_match = {etag.removeprefix('W/') for etag in if_none_match}
+        if '*' in if_none_match or quote_etag(digest) in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = f'refdata:response:{digest}'
+        data = cache.get(cache_key)
+        if data is None:
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(cache_key, data, settings.REFERENCE_DATA_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(ReferenceDataCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(ReferenceDataCacheMixin, self).retrieve(request, *args, **kwargs)
+        )
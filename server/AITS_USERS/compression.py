@@ -0,0 +1,247 @@
+"""
+Response compression and weak ETags for API payloads.
+
+CompressionMiddleware compresses JSON, NDJSON, CSV and text responses with
+zstd, brotli or gzip, whichever the client accepts with the highest q-value
+(ties go to the order of settings.COMPRESSION_ENCODINGS). zstd and brotli are
+used when the ``zstandard`` and ``brotli`` packages are installed; gzip is
+always available.
+
+- Regular responses smaller than settings.COMPRESSION_MIN_SIZE are sent as
+  they are.
+- Streaming responses (the exports) are compressed chunk by chunk, each chunk
+  flushed so clients can decode it as it arrives. Event streams are never
+  compressed.
+- A strong ETag is weakened, since the compressed bytes differ from the
+  identity ones.
+
+WeakETagMiddleware gives GET JSON responses that have no ETag a weak one
+computed from the body, and answers a matching If-None-Match with 304.
+"""
+import gzip
+import hashlib
+import zlib
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return (
+            lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.level)
+        return (lambda data: compressor.process(data) + compressor.flush(), compressor.finish)
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def stream(self):
+        compressor = self.compressor.compressobj()
+        return (
+            lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+CODECS = {'gzip': GzipCodec, 'br': BrotliCodec, 'zstd': ZstdCodec}
+AVAILABLE = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+
+
+def get_codecs():
+    """
+    The usable codecs in preference order, with their configured levels.
+    """
+    levels = settings.COMPRESSION_LEVELS
+    return tuple(
+        CODECS[name](levels[name]) for name in settings.COMPRESSION_ENCODINGS if AVAILABLE.get(name)
+    )
+
+
+@lru_cache(maxsize=256)
+def parse_accept_encoding(header):
+    """
+    {coding: q} from an Accept-Encoding header.
+    """
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_codec(codecs, header):
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = accepted.get(codec.name, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+def compress_stream(chunks, codec):
+    compress, finish = codec.stream()
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, codec):
+    compress, finish = codec.stream()
+    async for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses for clients that accept zstd, br or gzip. Put it
+    above every middleware that reads or changes the response body.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.codecs = get_codecs()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or not _is_compressible(response)
+            or 'no-transform' in response.get('Cache-Control', '')
+        ):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        codec = choose_codec(self.codecs, request.headers.get('Accept-Encoding', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, codec)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, codec)
+            del response.headers['Content-Length']
+        else:
+            response.content = codec.compress(response.content)
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+
+class WeakETagMiddleware:
+    """
+    Adds a weak ETag to GET JSON responses without one and turns a matching
+    If-None-Match into 304 Not Modified. Put it below CompressionMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.streaming:
+            return response
+        if not response.has_header('ETag'):
+            if response.get('Content-Type', '').split(';', 1)[0].strip() != 'application/json':
+                return response
+            digest = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+            response.headers['ETag'] = f'W/"{digest}"'
+        return get_conditional_response(request, etag=response['ETag'], response=response)
@@ -0,0 +1,177 @@
+"""
+Per-user event fan-out for the server-sent events stream (/api/events/).
+
+Publishers call ``publish(user_ids, event_type, data)``; the event goes out
+once the surrounding transaction commits. The broker backend is chosen with
+settings.EVENT_BROKER_BACKEND:
+
+- ``InProcessBackend`` (the default on SQLite) delivers to streams served by
+  the same process. Enough for local development.
+- ``PostgresNotifyBackend`` (the default with DATABASE_URL) sends events
+  through PostgreSQL NOTIFY, so events published by any worker or by
+  ``process_outbox`` reach every ASGI worker.
+
+A backend needs ``subscribe(user_id)``, ``unsubscribe(subscription)`` and
+``publish(user_ids, event)``.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    One open stream: a bounded queue owned by the stream's event loop.
+    """
+
+    def __init__(self, user_id, maxsize=100):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # Called from any thread; hand the event to the stream's loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # A slow client loses its oldest events rather than stalling publishers
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class InProcessBackend:
+    """
+    Fans events out to the subscriptions open in this process.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids, event):
+        self.dispatch(user_ids, event)
+
+    def dispatch(self, user_ids, event):
+        with self._lock:
+            targets = [s for user_id in user_ids for s in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            subscription.deliver(event)
+
+
+class PostgresNotifyBackend(InProcessBackend):
+    """
+    Publishes through PostgreSQL NOTIFY on settings.EVENT_BROKER_CHANNEL.
+
+    NOTIFY is transactional, so events are only delivered on commit. Each ASGI
+    process runs one LISTEN thread that feeds its local subscriptions.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.channel = settings.EVENT_BROKER_CHANNEL
+        self._listener = None
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_ids, event):
+        payload = json.dumps({'user_ids': list(user_ids), 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='event-broker-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        # A dedicated connection, opened with the driver directly: a pooled
+        # one would be held for the life of the process
+        wrapper = connections.create_connection('default')
+        raw = wrapper.Database.connect(**wrapper.get_connection_params())
+        raw.autocommit = True
+        with raw.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        try:
+            while True:
+                for payload in self._wait_for_notifies(raw):
+                    try:
+                        message = json.loads(payload)
+                        self.dispatch(message['user_ids'], message['event'])
+                    except (ValueError, KeyError):
+                        logger.warning("Ignoring malformed event broker payload")
+        except Exception:
+            logger.exception("Event broker listener stopped")
+        finally:
+            raw.close()
+
+    @staticmethod
+    def _wait_for_notifies(raw):
+        if hasattr(raw, 'poll'):
+            # psycopg2
+            if select.select([raw], [], [], 30) != ([], [], []):
+                raw.poll()
+                while raw.notifies:
+                    yield raw.notifies.pop(0).payload
+        else:
+            # psycopg 3
+            for notify in raw.notifies(timeout=30):
+                yield notify.payload
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENT_BROKER_BACKEND)()
+    return _broker
+
+
+def publish(user_ids, event_type, data):
+    """
+    Send an event to every open stream of ``user_ids`` after commit.
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id})
+    if not user_ids:
+        return
+    event = {'type': event_type, 'data': data}
+    transaction.on_commit(lambda: _publish(user_ids, event))
+
+
+def _publish(user_ids, event):
+    try:
+        get_broker().publish(user_ids, event)
+    except Exception:
+        # Live updates are best effort; never fail the request over them
+        logger.exception("Could not publish %s event", event['type'])
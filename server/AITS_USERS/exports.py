@@ -0,0 +1,125 @@
+"""
+Streaming CSV and NDJSON exports of issues.
+
+Rows are read with a ``.values()`` projection and ``QuerySet.iterator()``, so
+no model instances or serializers are built and only ``chunk_size`` rows are
+held in memory at a time (PostgreSQL reads them through a server-side
+cursor). Output is produced a batch of rows at a time.
+"""
+import csv
+import datetime
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+# Output column -> Issue lookup
+ISSUE_EXPORT_FIELDS = {
+    'id': 'id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'resolved_at': 'resolved_at',
+    'status': 'status',
+    'category': 'category',
+    'semester': 'semester',
+    'year_of_study': 'year_of_study',
+    'student': 'student__username',
+    'student_name': 'student__first_name',
+    'student_surname': 'student__last_name',
+    'student_email': 'student__email',
+    'course_code': 'course__code',
+    'course_name': 'course__name',
+    'assigned_to': 'assigned_to__username',
+    'description': 'description',
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Spreadsheet apps run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_export_rows(queryset, chunk_size=2000):
+    """
+    Yield one dict per issue, keyed by the ISSUE_EXPORT_FIELDS columns.
+    """
+    columns = list(ISSUE_EXPORT_FIELDS)
+    rows = queryset.values_list(*ISSUE_EXPORT_FIELDS.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, row))
+
+
+def iter_csv(rows, batch_size=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ISSUE_EXPORT_FIELDS)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row.values()])
+        pending += 1
+        if pending == batch_size:
+            yield _drain(buffer)
+            pending = 0
+    yield _drain(buffer)
+
+
+def iter_ndjson(rows, batch_size=500):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, cls=DjangoJSONEncoder))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_issue_export(request, queryset, export_format, filename):
+    """
+    Return a StreamingHttpResponse of ``queryset`` as CSV or NDJSON.
+    """
+    rows = iter_export_rows(queryset)
+    chunks = iter_csv(rows) if export_format == 'csv' else iter_ndjson(rows)
+    if isinstance(request, ASGIRequest):
+        # Django buffers a sync iterator completely under ASGI
+        chunks = _aiter_sync(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _aiter_sync(iterator):
+    # Each batch is produced on the request's sync thread, which owns its
+    # database connection and cursor
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
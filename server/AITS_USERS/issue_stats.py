@@ -0,0 +1,248 @@
+"""
+Incrementally maintained issue statistics.
+
+IssueStatistic holds one counter per (college, department, course, status,
+category, semester, resolution bucket). Saving or deleting an issue moves one
+unit from its old key to its new key, so the dashboard reads a handful of
+pre-aggregated rows instead of scanning the issue history. A batch of changes
+touching any number of keys is applied with a fixed number of statements.
+
+Time-to-resolve is kept as a log-scale histogram (four buckets per doubling of
+minutes), which is enough to estimate the median within about 10%.
+"""
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Course, Issue, IssueStatistic
+
+
+# Sentinel for instances loaded with deferred fields
+UNKNOWN = object()
+# Issue fields the statistics key is built from
+STATE_FIELDS = ('college_id', 'course_id', 'status', 'category', 'semester', 'created_at', 'resolved_at')
+
+
+def get_resolution_bucket(created_at, resolved_at):
+    if not created_at or not resolved_at:
+        return None
+    minutes = max((resolved_at - created_at).total_seconds(), 0) / 60
+    return int(4 * math.log2(1 + minutes))
+
+
+def get_bucket_midpoint_hours(bucket):
+    lower = 2 ** (bucket / 4) - 1
+    upper = 2 ** ((bucket + 1) / 4) - 1
+    return (lower + upper) / 2 / 60
+
+
+def get_issue_state(issue):
+    """
+    Return the statistics-relevant fields of an issue as a tuple, or UNKNOWN
+    if any of them were deferred. Reads __dict__ so deferred fields are never
+    loaded one query at a time.
+    """
+    values = issue.__dict__
+    if any(field not in values for field in STATE_FIELDS):
+        return UNKNOWN
+    bucket = None
+    if values['status'] == 'resolved':
+        bucket = get_resolution_bucket(values['created_at'], values['resolved_at'])
+    return (
+        values['college_id'], values['course_id'], values['status'],
+        values['category'], values['semester'], bucket,
+    )
+
+
+def load_issue_state(pk):
+    """
+    Read an issue's current statistics state from the database.
+    """
+    issue = Issue.objects.filter(pk=pk).first()
+    return get_issue_state(issue) if issue else None
+
+
+def _resolve_departments(states, issues=()):
+    """
+    Map course ids to department ids, using courses already cached on
+    ``issues`` before querying.
+    """
+    departments = {}
+    for issue in issues:
+        if Issue.course.is_cached(issue):
+            departments[issue.course_id] = issue.course.department_id
+
+    missing_courses = {state[1] for state in states} - departments.keys()
+    if missing_courses:
+        departments.update(Course.objects.filter(pk__in=missing_courses).values_list('id', 'department_id'))
+    return departments
+
+
+def apply_issue_changes(changes, issues=()):
+    """
+    Apply ``[(old_state, new_state), ...]`` to the statistics table. Either
+    side may be None for created or deleted issues.
+    """
+    states = [state for change in changes for state in change if state is not None]
+    if not states:
+        return
+    departments = _resolve_departments(states, issues)
+
+    deltas = Counter()
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            deltas[_dimensions(old, departments)] -= 1
+        if new is not None:
+            deltas[_dimensions(new, departments)] += 1
+
+    _bump({dimensions: delta for dimensions, delta in deltas.items() if delta})
+
+
+def _dimensions(state, departments):
+    college_id, course_id, status, category, semester, bucket = state
+    department_id = departments.get(course_id)
+    key = ':'.join(
+        '-' if value is None else str(value)
+        for value in (college_id, department_id, course_id, status, category, semester, bucket)
+    )
+    return key, college_id, department_id, course_id, status, category, semester, bucket
+
+
+def _bump(deltas):
+    """
+    Add ``{dimensions: delta}`` to the counters: create missing rows for the
+    increments, lock the rows in key order, then move every count with one
+    CASE update.
+    """
+    if not deltas:
+        return
+    by_key = {dimensions[0]: delta for dimensions, delta in deltas.items()}
+    with transaction.atomic():
+        # Rows another request created first are left alone. Nothing to
+        # decrement means the row went with a cascaded delete.
+        IssueStatistic.objects.bulk_create(
+            (
+                IssueStatistic(
+                    key=key, college_id=college_id, department_id=department_id, course_id=course_id,
+                    status=status, category=category, semester=semester, resolution_bucket=bucket, count=0,
+                )
+                for (key, college_id, department_id, course_id, status, category, semester, bucket), delta
+                in deltas.items() if delta > 0
+            ),
+            ignore_conflicts=True,
+        )
+        # A consistent lock order keeps concurrent batches from deadlocking
+        list(IssueStatistic.objects.select_for_update().filter(key__in=by_key).order_by('key').values_list('pk'))
+        IssueStatistic.objects.filter(key__in=by_key).update(count=F('count') + Case(
+            *(When(key=key, then=Value(delta)) for key, delta in by_key.items()),
+            default=Value(0), output_field=IntegerField(),
+        ))
+
+
+def sync_issue_statistics(issues):
+    """
+    Record changes to issues saved without signals (e.g. bulk_update).
+    """
+    changes = []
+    for issue in issues:
+        old = getattr(issue, '_stats_state', UNKNOWN)
+        if old is UNKNOWN:
+            continue
+        new = get_issue_state(issue)
+        changes.append((old, new))
+        issue._stats_state = new
+    apply_issue_changes(changes, issues)
+
+
+def move_issues_to_college(issues, college_id):
+    """
+    Re-key ``issues`` (a queryset) to ``college_id`` with one UPDATE and move
+    their counts along with them.
+    """
+    with transaction.atomic():
+        changes = []
+        for issue in issues.only('id', *STATE_FIELDS):
+            old = get_issue_state(issue)
+            new = (college_id, *old[1:])
+            if new != old:
+                changes.append((old, new))
+        issues.update(college_id=college_id)
+        apply_issue_changes(changes)
+
+
+def rebuild_issue_statistics():
+    """
+    Recompute the whole statistics table from the issues.
+    """
+    counts = Counter()
+    rows = Issue.objects.values_list(
+        'college_id', 'course__department_id', 'course_id', 'status',
+        'category', 'semester', 'created_at', 'resolved_at',
+    )
+    for college_id, department_id, course_id, status, category, semester, created_at, resolved_at in rows.iterator(chunk_size=5000):
+        bucket = get_resolution_bucket(created_at, resolved_at) if status == 'resolved' else None
+        counts[(college_id, department_id, course_id, status, category, semester, bucket)] += 1
+
+    with transaction.atomic():
+        IssueStatistic.objects.all().delete()
+        IssueStatistic.objects.bulk_create(
+            (
+                IssueStatistic(
+                    key=':'.join('-' if value is None else str(value) for value in dimensions),
+                    college_id=dimensions[0], department_id=dimensions[1], course_id=dimensions[2],
+                    status=dimensions[3], category=dimensions[4], semester=dimensions[5],
+                    resolution_bucket=dimensions[6], count=count,
+                )
+                for dimensions, count in counts.items()
+            ),
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+def summarise_statistics(rows):
+    """
+    Fold IssueStatistic rows into the dashboard payload.
+    """
+    summary = {
+        'total': 0,
+        'by_status': Counter(),
+        'by_category': Counter(),
+        'by_semester': Counter(),
+        'by_department': Counter(),
+        'by_course': {},
+    }
+    buckets = Counter()
+    for row in rows:
+        if row.count <= 0:
+            continue
+        summary['total'] += row.count
+        summary['by_status'][row.status] += row.count
+        summary['by_category'][row.category] += row.count
+        summary['by_semester'][row.semester] += row.count
+        summary['by_department'][row.department_id] += row.count
+        course = summary['by_course'].setdefault(
+            row.course_id, {'id': row.course_id, 'code': row.course.code, 'name': row.course.name, 'count': 0}
+        )
+        course['count'] += row.count
+        if row.resolution_bucket is not None:
+            buckets[row.resolution_bucket] += row.count
+
+    summary['by_course'] = sorted(summary['by_course'].values(), key=lambda course: -course['count'])
+    summary['median_resolution_hours'] = _median_hours(buckets)
+    return summary
+
+
+def _median_hours(buckets):
+    total = sum(buckets.values())
+    if not total:
+        return None
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen * 2 >= total:
+            return round(get_bucket_midpoint_hours(bucket), 2)
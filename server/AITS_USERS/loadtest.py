@@ -0,0 +1,223 @@
+"""
+HTTP load generator for ``manage.py loadtest``.
+
+Drives a running server (runserver, gunicorn, uvicorn...) with keep-alive
+connections from a pool of threads, using the bench-* accounts created by
+``manage.py seed_benchmark_data``. Each scenario runs for a fixed time and
+reports throughput, p50/p95/p99 latency and, when the server runs with
+METRICS_SERVER_TIMING=True, the mean number of queries per request (read from
+the Server-Timing header).
+
+Only the standard library is used, so it can run from any machine that has
+the project checked out.
+"""
+import http.client
+import json
+import math
+import re
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .benchmark_data import BENCHMARK_PASSWORD
+
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class HTTPClient:
+    """
+    One keep-alive connection to the server, reopened after errors.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, body=data, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                # The server may have closed an idle keep-alive connection
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Account:
+    def __init__(self, username, role):
+        self.username = username
+        self.role = role
+        self.token = None
+        self.course_id = None
+
+
+def login(client, account):
+    status, _, body = client.request('POST', '/api/auth/login/', {
+        'username': account.username, 'password': BENCHMARK_PASSWORD,
+    })
+    if status != 200:
+        raise RuntimeError(f"Login failed for {account.username}: HTTP {status}")
+    account.token = json.loads(body)['access']
+
+
+def prepare_accounts(base_url, students, lecturers, registrars):
+    """
+    Log in the first few bench-* accounts of each role and look up a course
+    each student can file issues against.
+    """
+    accounts = (
+        [Account(f'bench-student-{n}', 'student') for n in range(students)]
+        + [Account(f'bench-lecturer-{n}', 'lecturer') for n in range(lecturers)]
+        + [Account(f'bench-registrar-{n}', 'academic registrar') for n in range(registrars)]
+    )
+    client = HTTPClient(base_url)
+    try:
+        for account in accounts:
+            login(client, account)
+            if account.role == 'student':
+                status, _, body = client.request('GET', '/api/courses/', token=account.token)
+                courses = json.loads(body) if status == 200 else []
+                account.course_id = courses[0]['id'] if courses else None
+    finally:
+        client.close()
+    return accounts
+
+
+# name -> (role, request builder returning (method, path, body, token))
+SCENARIOS = {
+    'login': ('student', lambda account: (
+        'POST', '/api/auth/login/', {'username': account.username, 'password': BENCHMARK_PASSWORD}, None)),
+    'create_issue': ('student', lambda account: (
+        'POST', '/api/issues/', {
+            'course': account.course_id, 'category': 'missing_marks', 'semester': 1,
+            'year_of_study': 'Year One', 'description': 'Load test: coursework marks missing.',
+        }, account.token)),
+    'my_issues': ('student', lambda account: ('GET', '/api/my-issues/', None, account.token)),
+    'assigned': ('lecturer', lambda account: ('GET', '/api/issues/assigned/', None, account.token)),
+    'history': ('academic registrar', lambda account: ('GET', '/api/issues/history/', None, account.token)),
+    'courses': ('student', lambda account: ('GET', '/api/courses/', None, account.token)),
+}
+
+
+def run_scenario(base_url, name, accounts, concurrency, duration, warmup=1.0):
+    """
+    Hit one scenario from ``concurrency`` threads for ``duration`` seconds and
+    return its result row. Requests in the first ``warmup`` seconds are not
+    counted.
+    """
+    role, build = SCENARIOS[name]
+    accounts = [account for account in accounts if account.role == role]
+    if not accounts:
+        raise ValueError(f"No {role} accounts for scenario {name!r}")
+
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    samples = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(index):
+        client = HTTPClient(base_url)
+        n = index
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                method, path, body, token = build(accounts[n % len(accounts)])
+                n += concurrency
+                sent = time.perf_counter()
+                try:
+                    status, headers, _ = client.request(method, path, body, token)
+                except (http.client.HTTPException, OSError):
+                    status, headers = None, {}
+                elapsed = time.perf_counter() - sent
+                if sent < measure_from:
+                    continue
+                if status is None or status >= 400:
+                    errors[index] += 1
+                    continue
+                match = _QUERIES.search(headers.get('Server-Timing', ''))
+                samples[index].append((elapsed, int(match.group(1)) if match else None))
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    flat = [sample for thread_samples in samples for sample in thread_samples]
+    latencies = sorted(elapsed * 1000 for elapsed, _ in flat)
+    queries = [count for _, count in flat if count is not None]
+    return {
+        'scenario': name,
+        'requests': len(flat),
+        'errors': sum(errors),
+        'throughput_rps': round(len(flat) / duration, 1),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'queries_mean': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def percentile(ordered, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return None
+    return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 2)
+
+
+def compare_results(old, new, threshold):
+    """
+    Compare two loadtest JSON results. Returns a list of
+    ``(scenario, metric, old, new, change %, regressed)`` rows.
+    """
+    rows = []
+    old_results, new_results = old['results'], new['results']
+    for name in new_results:
+        if name not in old_results:
+            continue
+        for metric, higher_is_worse in (('p50_ms', True), ('p95_ms', True), ('p99_ms', True),
+                                        ('throughput_rps', False), ('queries_mean', True)):
+            before, after = old_results[name].get(metric), new_results[name].get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            if metric == 'queries_mean':
+                # Any extra query per request is a regression
+                regressed = after > before
+            else:
+                regressed = change > threshold if higher_is_worse else change < -threshold
+            rows.append((name, metric, before, after, round(change, 1), regressed))
+    return rows
@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from AITS_USERS.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Run benchmark scenarios inside a rolled-back transaction and report the results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help="Scenarios to run (default: all). Use --list to see them.")
+        parser.add_argument('--list', action='store_true', help="List the available scenarios.")
+        parser.add_argument('--iterations', type=int, default=50, help="Timed iterations per measurement.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, func in SCENARIOS.items():
+                self.stdout.write(f"{name:20} {(func.__doc__ or '').strip().splitlines()[0]}")
+            return
+
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+        results = {}
+        for name in names:
+            with transaction.atomic():
+                rows = SCENARIOS[name](options)
+                transaction.set_rollback(True)
+            results[name] = rows
+            self.print_table(name, rows)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, default=str)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+    def print_table(self, name, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        if not rows:
+            return
+        columns = list(rows[0])
+        widths = {c: max(len(c), *(len(str(row.get(c, ''))) for row in rows)) for c in columns}
+        self.stdout.write('  '.join(c.ljust(widths[c]) for c in columns))
+        for row in rows:
+            self.stdout.write('  '.join(str(row.get(c, '')).ljust(widths[c]) for c in columns))
+        self.stdout.write('')
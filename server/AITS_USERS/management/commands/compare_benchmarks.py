@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AITS_USERS.loadtest import compare_results
+
+
+class Command(BaseCommand):
+    help = "Compare two loadtest --json results and fail if the second one regressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help="Earlier results (JSON).")
+        parser.add_argument('candidate', help="New results (JSON).")
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help="Percent change in latency or throughput counted as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            with open(options['candidate'], encoding='utf-8') as f:
+                candidate = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{baseline['meta'].get('commit') or options['baseline']} -> "
+            f"{candidate['meta'].get('commit') or options['candidate']}"
+        )
+        rows = compare_results(baseline, candidate, options['threshold'])
+        for name, metric, before, after, change, regressed in rows:
+            line = f"{name:14} {metric:15} {before:>10} -> {after:<10} {change:+7.1f}%"
+            self.stdout.write(self.style.ERROR(line + "  REGRESSION") if regressed else line)
+
+        regressions = sum(1 for row in rows if row[-1])
+        if regressions:
+            raise CommandError(f"{regressions} regression(s) beyond {options['threshold']}%")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,59 @@
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AITS_USERS.bulk_import import IMPORT_ORDER, run_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import colleges, schools, departments, programmes, courses and users from CSV files. "
+        "See AITS_USERS/bulk_import.py for the expected columns."
+    )
+
+    def add_arguments(self, parser):
+        for kind in IMPORT_ORDER:
+            parser.add_argument(f'--{kind}', metavar='CSV', help=f"CSV file of {kind}.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row, then roll back.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk insert.")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: one per CPU).")
+        parser.add_argument('--max-errors', type=int, default=50, help="Row errors to print per file.")
+
+    def handle(self, *args, **options):
+        paths = {kind: options[kind] for kind in IMPORT_ORDER if options[kind]}
+        if not paths:
+            raise CommandError(f"Give at least one of: {', '.join('--' + kind for kind in IMPORT_ORDER)}")
+
+        with ExitStack() as stack:
+            try:
+                sources = {
+                    kind: stack.enter_context(open(path, newline='', encoding='utf-8-sig'))
+                    for kind, path in paths.items()
+                }
+            except OSError as e:
+                raise CommandError(str(e))
+            results = run_import(
+                sources,
+                dry_run=options['dry_run'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+            )
+
+        failed = False
+        for result in results:
+            self.stdout.write(
+                f"{result.kind:12} {result.rows:7} rows  {result.created:7} created  {result.skipped:7} skipped  "
+                f"{len(result.errors):5} errors  {result.seconds:7.2f}s  {result.rows_per_sec or 0} rows/sec"
+            )
+            for line, message in result.errors[:options['max_errors']]:
+                self.stderr.write(f"  {paths[result.kind]}:{line}: {message}")
+            if len(result.errors) > options['max_errors']:
+                self.stderr.write(f"  ... {len(result.errors) - options['max_errors']} more")
+            failed = failed or bool(result.errors)
+
+        if failed:
+            raise CommandError("Import failed; nothing was written.")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: every row is valid, nothing was written."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Import complete."))
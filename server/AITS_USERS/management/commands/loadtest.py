@@ -0,0 +1,72 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AITS_USERS.loadtest import SCENARIOS, prepare_accounts, run_scenario
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server with the bench-* accounts from seed_benchmark_data and report "
+        "throughput and p50/p95/p99 latency per scenario. Start the server with METRICS_SERVER_TIMING=True "
+        "to also get queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}.")
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server base URL.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent connections.")
+        parser.add_argument('--duration', type=float, default=20, help="Measured seconds per scenario.")
+        parser.add_argument('--warmup', type=float, default=2, help="Unmeasured seconds before each scenario.")
+        parser.add_argument('--students', type=int, default=50, help="Student accounts to spread requests over.")
+        parser.add_argument('--lecturers', type=int, default=20)
+        parser.add_argument('--registrars', type=int, default=5)
+        parser.add_argument('--json', dest='json_path', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+        try:
+            accounts = prepare_accounts(options['url'], options['students'], options['lecturers'], options['registrars'])
+        except (RuntimeError, OSError) as e:
+            raise CommandError(f"Could not prepare accounts against {options['url']}: {e}")
+
+        results = {}
+        for name in names:
+            row = run_scenario(
+                options['url'], name, accounts, options['concurrency'], options['duration'], options['warmup'],
+            )
+            results[name] = row
+            self.stdout.write(
+                f"{name:14} {row['requests']:7} req  {row['errors']:5} err  {row['throughput_rps']:8} req/s  "
+                f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  "
+                f"queries {row['queries_mean'] if row['queries_mean'] is not None else '-'}"
+            )
+
+        if options['json_path']:
+            output = {
+                'meta': {
+                    'commit': self.get_commit(),
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'url': options['url'],
+                    'concurrency': options['concurrency'],
+                    'duration': options['duration'],
+                },
+                'results': results,
+            }
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(output, f, indent=2)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from AITS_USERS.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails and notifications from the outbound message queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the due messages once and exit.")
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent, failed = deliver_pending(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(f"Delivered {sent}, failed {failed}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping outbox worker")
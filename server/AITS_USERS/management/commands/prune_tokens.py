@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from AITS_USERS.revocation import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired refresh tokens from the outstanding and blacklisted token tables in batches. "
+        "Run it periodically (e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows deleted per transaction.")
+        parser.add_argument('--grace-hours', type=float, default=0,
+                            help="Keep tokens for this many hours after they expire.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to wait between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the expired tokens.")
+
+    def handle(self, *args, **options):
+        count = prune_expired_tokens(
+            batch_size=options['batch_size'],
+            grace=timedelta(hours=options['grace_hours']),
+            dry_run=options['dry_run'],
+            pause=options['sleep'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{count} expired tokens would be deleted")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired tokens"))
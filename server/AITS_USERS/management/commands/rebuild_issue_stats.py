@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AITS_USERS.issue_stats import rebuild_issue_statistics
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed issue statistics from the issue table."
+
+    def handle(self, *args, **options):
+        rows = rebuild_issue_statistics()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt issue statistics ({rows} rows)"))
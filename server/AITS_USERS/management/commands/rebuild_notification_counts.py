@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AITS_USERS.notifications import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's unread notification counter from the notifications."
+
+    def handle(self, *args, **options):
+        counters = rebuild_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt unread notification counters ({counters} users)"))
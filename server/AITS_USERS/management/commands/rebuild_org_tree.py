@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AITS_USERS.org_tree import rebuild_org_tree
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialised-path org tree from the colleges, schools, departments, programmes and courses."
+
+    def handle(self, *args, **options):
+        nodes = rebuild_org_tree()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt org tree ({nodes} nodes)"))
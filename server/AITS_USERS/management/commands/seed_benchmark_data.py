@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AITS_USERS.benchmark_data import BENCHMARK_PASSWORD, seed_dataset
+from AITS_USERS.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic dataset for load tests (see AITS_USERS/benchmark_data.py). "
+        "Meant for a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colleges', type=int, default=5)
+        parser.add_argument('--students', type=int, default=50000)
+        parser.add_argument('--issues', type=int, default=500000)
+        parser.add_argument('--years', type=int, default=4, help="Spread issues over this many years.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-search-index', action='store_true', help="Skip building the search index.")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith='bench-').exists():
+            raise CommandError("This database already has benchmark data (bench-* users).")
+
+        start = time.perf_counter()
+        created = seed_dataset(
+            colleges=options['colleges'],
+            students=options['students'],
+            issues=options['issues'],
+            years=options['years'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            search_index=not options['no_search_index'],
+            log=self.stdout.write,
+        )
+        elapsed = time.perf_counter() - start
+        for name, rows in created.items():
+            self.stdout.write(f"{name:18} {rows}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {elapsed:.1f}s. Every bench-* account's password is {BENCHMARK_PASSWORD!r}."
+        ))
@@ -0,0 +1,303 @@
+"""
+Per-endpoint request metrics in the Prometheus text format, served at /metrics.
+
+MetricsMiddleware times every request and labels it with the URL name of the
+view that served it. While a request runs, a per-request RequestMetrics is
+held in a context variable (copied into the threads that run sync code under
+ASGI), and fed by:
+
+- an execute wrapper installed on every database connection, which counts
+  queries and their time;
+- TimedSerializerMixin, which times the outermost to_representation() call.
+
+The same wrapper feeds the query budget checks in query_budget.py. New
+database connections (or checkouts from the connection pool) are counted per
+alias, and the psycopg pool's own statistics are added at scrape time.
+
+Metrics live in the memory of each process, so with several workers each one
+reports its own numbers. Set METRICS_SERVER_TIMING to also send a
+Server-Timing header that shows the breakdown in the browser's dev tools.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .query_budget import log_slow_query, report_breaches, start_audit
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# psycopg_pool get_stats() key -> (metric, type, help, scale)
+POOL_STATS = {
+    'pool_min': ('aits_db_pool_min_size', 'gauge', 'Connections the pool keeps open.', 1),
+    'pool_max': ('aits_db_pool_max_size', 'gauge', 'Most connections the pool may open.', 1),
+    'pool_size': ('aits_db_pool_size', 'gauge', 'Connections currently open, in use or idle.', 1),
+    'pool_available': ('aits_db_pool_available', 'gauge', 'Idle connections ready to be handed out.', 1),
+    'requests_waiting': ('aits_db_pool_requests_waiting', 'gauge', 'Requests waiting for a connection.', 1),
+    'requests_num': ('aits_db_pool_requests_total', 'counter', 'Connections requested from the pool.', 1),
+    'requests_queued': ('aits_db_pool_requests_queued_total', 'counter', 'Requests that had to wait.', 1),
+    'requests_wait_ms': ('aits_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.', 1000),
+    'requests_errors': ('aits_db_pool_requests_errors_total', 'counter', 'Requests that timed out or failed.', 1),
+    'usage_ms': ('aits_db_pool_usage_seconds_total', 'counter', 'Time connections were checked out.', 1000),
+    'returns_bad': ('aits_db_pool_returns_bad_total', 'counter', 'Connections returned in a bad state.', 1),
+    'connections_num': ('aits_db_pool_connections_total', 'counter', 'Connections opened to the server.', 1),
+    'connections_ms': ('aits_db_pool_connect_seconds_total', 'counter', 'Time spent opening connections.', 1000),
+    'connections_errors': ('aits_db_pool_connections_errors_total', 'counter', 'Failed connection attempts.', 1),
+    'connections_lost': ('aits_db_pool_connections_lost_total', 'counter', 'Connections found broken by the health check.', 1),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_seconds', 'serializer_seconds', 'serializer_depth', 'audit')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        # A QueryAudit when this request's SQL shapes are being checked
+        self.audit = start_audit()
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, label_names):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, series in sorted(self._series.items()):
+            base = _format_labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{{base}}} {series[-1]}'
+            yield f'{self.name}_count{{{base}}} {cumulative}'
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+
+    def inc(self, labels, value=1):
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self, label_names):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self._series.items()):
+            yield f'{self.name}{{{_format_labels(label_names, labels)}}} {value}'
+
+
+class Registry:
+    """
+    The request metrics, all labelled by (view, method, status).
+    """
+    LABELS = ('view', 'method', 'status')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            'aits_http_request_duration_seconds', 'Time to produce the response.', LATENCY_BUCKETS)
+        self.queries = Histogram(
+            'aits_db_queries_per_request', 'Database queries run per request.', QUERY_COUNT_BUCKETS)
+        self.query_seconds = Counter('aits_db_query_seconds_total', 'Time spent in database queries.')
+        self.serializer_seconds = Counter('aits_serializer_seconds_total', 'Time spent serializing.')
+        self.response_bytes = Counter('aits_http_response_bytes_total', 'Response body bytes (not streamed).')
+        self.connections = Counter(
+            'aits_db_connections_total', 'Database connections set up (opened, or checked out of the pool).')
+
+    def record(self, labels, seconds, metrics, response_bytes):
+        with self._lock:
+            self.latency.observe(labels, seconds)
+            self.queries.observe(labels, metrics.queries)
+            self.query_seconds.inc(labels, metrics.query_seconds)
+            self.serializer_seconds.inc(labels, metrics.serializer_seconds)
+            if response_bytes is not None:
+                self.response_bytes.inc(labels, response_bytes)
+
+    def record_connection(self, alias):
+        with self._lock:
+            self.connections.inc((alias,))
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.latency, self.queries, self.query_seconds, self.serializer_seconds, self.response_bytes):
+                lines.extend(metric.render(self.LABELS))
+            lines.extend(self.connections.render(('alias',)))
+        lines.extend(render_pool_stats())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def render_pool_stats():
+    """
+    The statistics of every configured connection pool of this process.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    if not stats:
+        return
+    for key, (name, metric_type, help_text, scale) in POOL_STATS.items():
+        yield f'# HELP {name} {help_text}'
+        yield f'# TYPE {name} {metric_type}'
+        for alias, values in sorted(stats.items()):
+            value = values.get(key, 0)
+            if scale != 1:
+                value /= scale
+            yield f'{name}{{alias="{_escape(alias)}"}} {value}'
+
+
+def _format_labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        log_slow_query(sql, seconds)
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.query_seconds += seconds
+            if metrics.audit is not None:
+                metrics.audit.record(sql, seconds)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # Sent again each time the same connection object reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='metrics_query_wrapper')
+
+
+def count_connection(sender, connection, **kwargs):
+    registry.record_connection(connection.alias)
+
+
+connection_created.connect(count_connection, dispatch_uid='metrics_connection_count')
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in the outermost to_representation() call to the
+    current request's serializer time. Nested serializers aren't counted twice.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter() if metrics.serializer_depth == 1 else None
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if start is not None:
+                metrics.serializer_seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Records latency, queries, query time, serializer time and response size
+    for every request. Put it first in MIDDLEWARE so it times everything.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, seconds):
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record((view, request.method, response.status_code), seconds, metrics, size)
+        if metrics.audit is not None and match:
+            report_breaches(request, view, metrics.queries, metrics.audit)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.query_seconds * 1000:.1f};desc="{metrics.queries} queries", '
+                f'serialize;dur={metrics.serializer_seconds * 1000:.1f}, '
+                f'total;dur={seconds * 1000:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer
+    <METRICS_TOKEN>``; without a token it is only served when DEBUG is on.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0002_issue_semester_issue_year_of_study'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-created_at', '-id'], name='issue_created_id_idx'),
+        ),
+    ]
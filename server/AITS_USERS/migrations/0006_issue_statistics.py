@@ -0,0 +1,72 @@
+# Generated by Django 5.1.5 on 2026-10-18 02:20
+
+import math
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_statistics(apps, schema_editor):
+    Issue = apps.get_model('AITS_USERS', 'Issue')
+    IssueStatistic = apps.get_model('AITS_USERS', 'IssueStatistic')
+
+    # Best available resolution time for issues resolved before resolved_at existed
+    Issue.objects.filter(status='resolved', resolved_at__isnull=True).update(resolved_at=F('updated_at'))
+
+    counts = Counter()
+    rows = Issue.objects.values_list(
+        'student__college_id', 'course__department_id', 'course_id', 'status',
+        'category', 'semester', 'created_at', 'resolved_at',
+    )
+    for college_id, department_id, course_id, status, category, semester, created_at, resolved_at in rows.iterator():
+        bucket = None
+        if status == 'resolved' and created_at and resolved_at:
+            minutes = max((resolved_at - created_at).total_seconds(), 0) / 60
+            bucket = int(4 * math.log2(1 + minutes))
+        counts[(college_id, department_id, course_id, status, category, semester, bucket)] += 1
+
+    IssueStatistic.objects.bulk_create(
+        (
+            IssueStatistic(
+                key=':'.join('-' if value is None else str(value) for value in dimensions),
+                college_id=dimensions[0], department_id=dimensions[1], course_id=dimensions[2],
+                status=dimensions[3], category=dimensions[4], semester=dimensions[5],
+                resolution_bucket=dimensions[6], count=count,
+            )
+            for dimensions, count in counts.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0005_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='IssueStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('status', models.CharField(max_length=20)),
+                ('category', models.CharField(max_length=100)),
+                ('semester', models.IntegerField(null=True)),
+                ('resolution_bucket', models.SmallIntegerField(null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('college', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='issue_statistics', to='AITS_USERS.college')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issue_statistics', to='AITS_USERS.course')),
+                ('department', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='issue_statistics', to='AITS_USERS.department')),
+            ],
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
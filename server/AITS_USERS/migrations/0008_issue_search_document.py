@@ -0,0 +1,93 @@
+# Generated by Django 5.1.5 on 2026-10-18 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FTS_TABLE = 'issue_search_fts'
+DOCUMENT_TABLE = 'AITS_USERS_issuesearchdocument'
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document, content='{DOCUMENT_TABLE}', content_rowid='issue_id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON "{DOCUMENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.issue_id, new.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON "{DOCUMENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.issue_id, old.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON "{DOCUMENT_TABLE}" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.issue_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.issue_id, new.document);
+    END""",
+]
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+POSTGRES_CREATE = [
+    f"""CREATE INDEX issue_search_document_gin ON "{DOCUMENT_TABLE}"
+        USING GIN (to_tsvector('english', document))""",
+]
+POSTGRES_DROP = ['DROP INDEX IF EXISTS issue_search_document_gin']
+
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute('PRAGMA compile_options')
+    return any('FTS5' in row[0] for row in cursor.fetchall())
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            statements = POSTGRES_CREATE
+        elif connection.vendor == 'sqlite' and _sqlite_has_fts5(cursor):
+            statements = SQLITE_CREATE
+        else:
+            # Searches fall back to LIKE on other databases
+            statements = []
+        for statement in statements:
+            cursor.execute(statement)
+
+    # Build documents for the existing issues
+    Issue = apps.get_model('AITS_USERS', 'Issue')
+    IssueUpdate = apps.get_model('AITS_USERS', 'IssueUpdate')
+    IssueSearchDocument = apps.get_model('AITS_USERS', 'IssueSearchDocument')
+    documents = dict(Issue.objects.values_list('id', 'description'))
+    for issue_id, comment in IssueUpdate.objects.order_by('issue_id', 'created_at', 'id').values_list('issue_id', 'comment'):
+        documents[issue_id] += '\n' + comment
+    IssueSearchDocument.objects.bulk_create(
+        (IssueSearchDocument(issue_id=issue_id, document=document) for issue_id, document in documents.items()),
+        batch_size=1000,
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'postgresql': POSTGRES_DROP, 'sqlite': SQLITE_DROP}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0007_user_email_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSearchDocument',
+            fields=[
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='AITS_USERS.issue')),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 02:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model('AITS_USERS', 'Notification')
+    NotificationCounter = apps.get_model('AITS_USERS', 'NotificationCounter')
+    counts = (
+        Notification.objects.filter(is_read=False).order_by().values('user_id')
+        .annotate(unread=Count('id')).values_list('user_id', 'unread')
+    )
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(user_id=user_id, unread=unread) for user_id, unread in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0008_issue_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+def backfill_org_tree(apps, schema_editor):
+    OrgUnit = apps.get_model('AITS_USERS', 'OrgUnit')
+    # (model, kind letter, depth, parent field, parent model)
+    levels = [
+        ('College', 'c', 0, None, None),
+        ('School', 's', 1, 'college_id', 'College'),
+        ('Department', 'd', 2, 'school_id', 'School'),
+        ('Programme', 'p', 3, 'department_id', 'Department'),
+        ('Course', 'k', 3, 'department_id', 'Department'),
+    ]
+    paths = {}
+    units = []
+    for name, letter, depth, parent_field, parent_model in levels:
+        model = apps.get_model('AITS_USERS', name)
+        has_code = name in ('Programme', 'Course')
+        columns = ['id', 'name', 'code' if has_code else 'id'] + ([parent_field] if parent_field else [])
+        for row in model.objects.order_by('id').values_list(*columns):
+            prefix = paths[(parent_model, row[3])] if parent_field else ''
+            path = paths[(name, row[0])] = f'{prefix}{letter}{row[0]:010d}'
+            units.append(OrgUnit(path=path, kind=name.lower(), object_id=row[0], name=row[1],
+                                 code=row[2] if has_code else '', depth=depth))
+    OrgUnit.objects.bulk_create(units, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0009_notification_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=64, unique=True)),
+                ('kind', models.CharField(choices=[('college', 'College'), ('school', 'School'), ('department', 'Department'), ('programme', 'Programme'), ('course', 'Course')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('name', models.CharField(max_length=100)),
+                ('code', models.CharField(blank=True, max_length=10)),
+                ('depth', models.SmallIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='org_unit_object_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_org_tree, migrations.RunPython.noop),
+    ]
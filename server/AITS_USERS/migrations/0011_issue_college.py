@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_colleges(apps, schema_editor):
+    Issue = apps.get_model('AITS_USERS', 'Issue')
+    User = apps.get_model('AITS_USERS', 'User')
+    Issue.objects.update(
+        college_id=Subquery(User.objects.filter(pk=OuterRef('student_id')).values('college_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0010_org_unit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='college',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issues', to='AITS_USERS.college'),
+        ),
+        migrations.RunPython(backfill_colleges, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['college', '-created_at', '-id'], name='issue_college_created_idx'),
+        ),
+    ]
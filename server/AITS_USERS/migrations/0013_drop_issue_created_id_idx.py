@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0012_rework_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_created_id_idx',
+        ),
+    ]
@@ -0,0 +1,50 @@
+import math
+from collections import Counter
+
+from django.db import migrations
+
+
+def rebuild_statistics(apps, schema_editor):
+    """
+    Recount the statistics from Issue.college_id. They used to follow the
+    student's current college, so moved students left drifted counts behind.
+    """
+    Issue = apps.get_model('AITS_USERS', 'Issue')
+    IssueStatistic = apps.get_model('AITS_USERS', 'IssueStatistic')
+
+    counts = Counter()
+    rows = Issue.objects.values_list(
+        'college_id', 'course__department_id', 'course_id', 'status',
+        'category', 'semester', 'created_at', 'resolved_at',
+    )
+    for college_id, department_id, course_id, status, category, semester, created_at, resolved_at in rows.iterator():
+        bucket = None
+        if status == 'resolved' and created_at and resolved_at:
+            minutes = max((resolved_at - created_at).total_seconds(), 0) / 60
+            bucket = int(4 * math.log2(1 + minutes))
+        counts[(college_id, department_id, course_id, status, category, semester, bucket)] += 1
+
+    IssueStatistic.objects.all().delete()
+    IssueStatistic.objects.bulk_create(
+        (
+            IssueStatistic(
+                key=':'.join('-' if value is None else str(value) for value in dimensions),
+                college_id=dimensions[0], department_id=dimensions[1], course_id=dimensions[2],
+                status=dimensions[3], category=dimensions[4], semester=dimensions[5],
+                resolution_bucket=dimensions[6], count=count,
+            )
+            for dimensions, count in counts.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AITS_USERS', '0013_drop_issue_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_statistics, migrations.RunPython.noop),
+    ]
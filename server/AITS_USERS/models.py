@@ -3,6 +3,7 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.hashers import make_password
+from django.utils import timezone
 
 # Custom manager for the custom user model
 class CustomUserManager(BaseUserManager):
@@ -87,6 +88,33 @@ class Course(models.Model):
         return self.name
 
 
+# Denormalised college -> school -> department -> programme/course tree,
+# kept in step by org_tree.py
+class OrgUnit(models.Model):
+    KIND_CHOICES = [
+        ('college', 'College'),
+        ('school', 'School'),
+        ('department', 'Department'),
+        ('programme', 'Programme'),
+        ('course', 'Course'),
+    ]
+    # One fixed-width segment per ancestor, so a subtree is one range of paths
+    path = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=10, blank=True)
+    depth = models.SmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='org_unit_object_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.name}"
+
+
 # Custom User model to support multiple roles
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -102,6 +130,8 @@ class User(AbstractUser):
         verbose_name="User Role"
     )
     role_id = models.CharField(max_length=20, unique=True, null=True)
+    # Indexed so logins by email are a single index lookup
+    email = models.EmailField(_("email address"), blank=True, db_index=True)
     college = models.ForeignKey(College, on_delete=models.SET_NULL, null=True, related_name='users')
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name='users')
     
@@ -145,6 +175,12 @@ class Issue(models.Model):
         ('in_progress', 'In Progress'),
         ('resolved', 'Resolved'),
     ]
+    # Status changes allowed by the workflow endpoints
+    STATUS_TRANSITIONS = {
+        'open': ('in_progress',),
+        'in_progress': ('resolved',),
+        'resolved': (),
+    }
     ISSUE_CATEGORIES = [
         ('missing_marks', 'Missing marks'),
         ('incorrect_grades', 'Incorrect grades'),
@@ -172,8 +208,45 @@ class Issue(models.Model):
         limit_choices_to={'role__in': ('lecturer', 'academic registrar')}
     )
     
+    # Copy of the student's college so a registrar's history is one index
+    # range instead of a join through the users table
+    college = models.ForeignKey(
+        College, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='issues'
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # /my-issues/
+            models.Index(fields=['student', '-created_at', '-id'], name='issue_student_created_idx'),
+            # /issues/history/ and its export
+            models.Index(fields=['college', '-created_at', '-id'], name='issue_college_created_idx'),
+            # /issues/assigned/
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='issue_assignee_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Stamp when the issue was resolved, for time-to-resolve statistics
+        if self.status == 'resolved':
+            if self.resolved_at is None:
+                self.resolved_at = timezone.now()
+        else:
+            self.resolved_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'resolved_at'}
+        if self._state.adding and self.college_id is None:
+            self.college_id = self.get_student_college_id()
+        super().save(*args, **kwargs)
+
+    def get_student_college_id(self):
+        if Issue.student.is_cached(self):
+            return self.student.college_id
+        return User.objects.filter(pk=self.student_id).values_list('college_id', flat=True).first()
+
     def __str__(self):
         return f"Issue {self.id}: {self.category} - {self.status}" 
 
@@ -188,6 +261,36 @@ class IssueUpdate(models.Model):
     
 
 
+# Search text for an issue (description plus comments). Indexed with a GIN
+# tsvector index on PostgreSQL and an FTS5 shadow table on SQLite; see
+# AITS_USERS/search.py
+class IssueSearchDocument(models.Model):
+    issue = models.OneToOneField(Issue, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for issue #{self.issue_id}"
+
+
+# Precomputed issue counts for the registrar dashboards, maintained by
+# AITS_USERS/issue_stats.py whenever an issue is saved or deleted
+class IssueStatistic(models.Model):
+    key = models.CharField(max_length=200, unique=True)
+    college = models.ForeignKey(College, on_delete=models.CASCADE, null=True, related_name='issue_statistics')
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, related_name='issue_statistics')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='issue_statistics')
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=100)
+    semester = models.IntegerField(null=True)
+    # Time-to-resolve histogram bucket; only set for resolved issues
+    resolution_bucket = models.SmallIntegerField(null=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
 # Notification model
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -196,5 +299,75 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # A user's inbox, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            # ?unread=true inbox pages, in the cursor pagination order
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                name='notification_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message[:50]}..."
+
+
+# Denormalised unread notification count, kept in step by notifications.py
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+# Outbound message queue (emails and in-app notifications)
+class OutboundMessage(models.Model):
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('notification', 'Notification'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_messages')
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_messages')
+    recipient = models.EmailField(blank=True)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: due pending messages, oldest first
+            models.Index(
+                fields=['available_at', 'id'],
+                name='outbound_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.recipient or self.user_id} ({self.status})"
+
+
+# Users whose access tokens stop working: deactivated or deleted accounts.
+# Read by ClaimsJWTAuthentication (AITS_USERS/authentication.py)
+class RevokedUser(models.Model):
+    # A plain id rather than a foreign key so the row outlives a deleted user
+    user_id = models.BigIntegerField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id} revoked at {self.revoked_at}"
@@ -0,0 +1,85 @@
+"""
+Notification inbox: per-user unread counters and bulk mark-read.
+
+NotificationCounter holds each user's unread count, so the header badge is a
+primary key lookup instead of a COUNT over the user's notifications. The
+count changes in the same transaction as the notifications it counts:
+
+- saves and deletes through the ORM are tracked by the signals in signals.py;
+- code that writes notifications in bulk (the outbox, mark_read) calls
+  bump_unread() itself.
+
+rebuild_unread_counts() recomputes every counter from the notifications.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Notification, NotificationCounter
+
+
+def bump_unread(deltas):
+    """
+    Apply ``{user_id: delta}`` to the unread counters.
+    """
+    with transaction.atomic():
+        # Fixed order so concurrent bumps lock the rows the same way round
+        for user_id, delta in sorted(deltas.items()):
+            if delta:
+                _bump(user_id, delta)
+
+
+def _bump(user_id, delta):
+    if NotificationCounter.objects.filter(user_id=user_id).update(unread=F('unread') + delta) or delta < 0:
+        # Nothing to decrement means the counter went with a cascaded delete
+        return
+    try:
+        with transaction.atomic():
+            NotificationCounter.objects.create(user_id=user_id, unread=delta)
+    except IntegrityError:
+        # Another request created the row first
+        NotificationCounter.objects.filter(user_id=user_id).update(unread=F('unread') + delta)
+
+
+def get_unread_count(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+
+
+def mark_read(user_id, from_id=None, to_id=None, before=None):
+    """
+    Mark a user's unread notifications read with one UPDATE, limited to ids in
+    [from_id, to_id] and/or created before ``before``. Returns the number
+    marked.
+    """
+    notifications = Notification.objects.filter(user_id=user_id, is_read=False)
+    if from_id is not None:
+        notifications = notifications.filter(id__gte=from_id)
+    if to_id is not None:
+        notifications = notifications.filter(id__lte=to_id)
+    if before is not None:
+        notifications = notifications.filter(created_at__lt=before)
+    with transaction.atomic():
+        # Rows another request marks first no longer match is_read=False,
+        # so each notification is only subtracted once
+        marked = notifications.update(is_read=True)
+        if marked:
+            _bump(user_id, -marked)
+    return marked
+
+
+def rebuild_unread_counts():
+    """
+    Recompute every user's unread counter. Returns the number of counters.
+    """
+    counts = Counter(dict(
+        Notification.objects.filter(is_read=False).order_by().values('user_id')
+        .annotate(unread=Count('id')).values_list('user_id', 'unread')
+    ))
+    with transaction.atomic():
+        NotificationCounter.objects.all().delete()
+        NotificationCounter.objects.bulk_create(
+            (NotificationCounter(user_id=user_id, unread=unread) for user_id, unread in counts.items()),
+            batch_size=1000,
+        )
+    return len(counts)
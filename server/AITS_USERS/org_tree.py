@@ -0,0 +1,148 @@
+"""
+Materialised-path copy of the college -> school -> department ->
+programme/course tree, served whole or by subtree from one range scan.
+
+Each OrgUnit's path is its ancestors' segments followed by its own. A segment
+is a kind letter and the zero-padded id (e.g. ``c0000000003``), so paths sort
+depth first and a node's subtree is every path in [path, path + 'z'). Only
+letters and digits are used, which keeps that range valid under PostgreSQL
+text collations too.
+
+Signals (see signals.py) update a node when one of the five models is saved,
+moving its subtree when it changes parent, and drop the subtree on delete.
+Code that bulk-creates catalogue rows calls rebuild_org_tree().
+"""
+from django.db import transaction
+from django.db.models import CharField, Subquery, Value
+from django.db.models.functions import Concat, Substr
+
+from .models import College, Course, Department, OrgUnit, Programme, School
+
+
+SEGMENT_WIDTH = 11
+PREFIXES = {College: 'c', School: 's', Department: 'd', Programme: 'p', Course: 'k'}
+PARENT_FIELDS = {School: 'college', Department: 'school', Programme: 'department', Course: 'department'}
+DEPTHS = {College: 0, School: 1, Department: 2, Programme: 3, Course: 3}
+# kind -> key of its children in the tree payload
+CHILD_KEYS = {'college': ('schools',), 'school': ('departments',), 'department': ('programmes', 'courses')}
+LIST_KEYS = {'school': 'schools', 'department': 'departments', 'programme': 'programmes', 'course': 'courses'}
+
+
+def get_segment(model, pk):
+    return f'{PREFIXES[model]}{pk:010d}'
+
+
+def get_subtree(path):
+    return OrgUnit.objects.filter(path__gte=path, path__lt=path + 'z')
+
+
+def _get_unit_path(model, pk):
+    return OrgUnit.objects.filter(kind=model._meta.model_name, object_id=pk).values_list('path', flat=True).first()
+
+
+def sync_org_unit(instance):
+    """
+    Create or update the node for a saved catalogue row.
+    """
+    model = type(instance)
+    prefix = ''
+    if model in PARENT_FIELDS:
+        field = model._meta.get_field(PARENT_FIELDS[model])
+        prefix = _get_unit_path(field.related_model, getattr(instance, field.attname))
+        if prefix is None:
+            # Parent not in the tree yet (e.g. loaded from a fixture); rebuild_org_tree() fixes it
+            return
+    path = prefix + get_segment(model, instance.pk)
+
+    with transaction.atomic():
+        old_path = _get_unit_path(model, instance.pk)
+        if old_path is not None and old_path != path:
+            # Moved under another parent: rewrite the prefix of the whole subtree
+            get_subtree(old_path).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1), output_field=CharField())
+            )
+        OrgUnit.objects.update_or_create(
+            kind=model._meta.model_name,
+            object_id=instance.pk,
+            defaults={
+                'path': path,
+                'name': instance.name,
+                'code': getattr(instance, 'code', ''),
+                'depth': DEPTHS[model],
+            },
+        )
+
+
+def remove_org_unit(instance):
+    """
+    Drop the node for a deleted catalogue row and everything below it.
+    """
+    path = _get_unit_path(type(instance), instance.pk)
+    if path is not None:
+        get_subtree(path).delete()
+
+
+def rebuild_org_tree():
+    """
+    Recompute the whole tree from the catalogue tables. Returns the number of
+    nodes.
+    """
+    paths = {}
+    units = []
+    for model in (College, School, Department, Programme, Course):
+        has_code = model in (Programme, Course)
+        parent = model._meta.get_field(PARENT_FIELDS[model]) if model in PARENT_FIELDS else None
+        columns = ['id', 'name', 'code' if has_code else 'id']
+        if parent is not None:
+            columns.append(parent.attname)
+        for row in model.objects.order_by('id').values_list(*columns):
+            pk, name = row[:2]
+            prefix = paths[(parent.related_model, row[3])] if parent is not None else ''
+            path = paths[(model, pk)] = prefix + get_segment(model, pk)
+            units.append(OrgUnit(
+                path=path, kind=model._meta.model_name, object_id=pk, name=name,
+                code=row[2] if has_code else '', depth=DEPTHS[model],
+            ))
+
+    with transaction.atomic():
+        OrgUnit.objects.all().delete()
+        OrgUnit.objects.bulk_create(units, batch_size=1000)
+    return len(units)
+
+
+def get_tree_rows(kind=None, object_id=None, courses=True):
+    """
+    The nodes of the whole tree, or of the subtree under ``kind``/``object_id``,
+    in path order. A subtree is one statement: its range bounds come from a
+    subquery on the root node.
+    """
+    units = OrgUnit.objects.order_by('path')
+    if kind is not None:
+        root = Subquery(OrgUnit.objects.filter(kind=kind, object_id=object_id).values('path')[:1])
+        units = units.filter(path__gte=root, path__lt=Concat(root, Value('z'), output_field=CharField()))
+    if not courses:
+        units = units.exclude(kind='course')
+    return units.values_list('path', 'kind', 'object_id', 'name', 'code')
+
+
+def build_tree(rows, courses=True):
+    """
+    Nest path-ordered rows into ``[{"id", "name", "schools": [...]}, ...]``.
+    Programmes and courses also carry their code.
+    """
+    nodes = {}
+    roots = []
+    for path, kind, object_id, name, code in rows:
+        node = {'id': object_id, 'name': name}
+        if kind in ('programme', 'course'):
+            node['code'] = code
+        for key in CHILD_KEYS.get(kind, ()):
+            if key != 'courses' or courses:
+                node[key] = []
+        nodes[path] = node
+        parent = nodes.get(path[:-SEGMENT_WIDTH])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent[LIST_KEYS[kind]].append(node)
+    return roots
@@ -0,0 +1,226 @@
+"""
+Database-backed outbound message queue.
+
+Views only insert OutboundMessage rows, a cheap write in the same
+transaction.atomic() block as the change they report, so a rolled back change
+queues nothing. The ``process_outbox`` management command (the Procfile's
+``worker`` process) claims due messages in batches, sends emails over a
+single SMTP connection and creates Notification rows, retrying failures with
+exponential backoff.
+
+A claim is a short transaction that leases the batch by pushing
+``available_at`` forward OUTBOX_LEASE_SECONDS; SMTP runs after it commits, so
+no row locks are held while mail is sent. If the worker dies mid-batch the
+lease runs out and another worker picks the messages up again.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .events import publish
+from .models import Notification, OutboundMessage, User
+from .notifications import bump_unread
+
+logger = logging.getLogger(__name__)
+
+
+# Messages sent for each issue event: (subject, body)
+ISSUE_EVENT_MESSAGES = {
+    'created': ("New issue #{issue.id}", "Issue #{issue.id} ({category}) has been submitted for {course}."),
+    'assigned': ("Issue #{issue.id} assigned", "Issue #{issue.id} ({category}) for {course} has been assigned to {assignee}."),
+    'in_progress': ("Issue #{issue.id} in progress", "Issue #{issue.id} ({category}) for {course} is now in progress."),
+    'resolved': ("Issue #{issue.id} resolved", "Issue #{issue.id} ({category}) for {course} has been resolved."),
+}
+
+
+def enqueue_email(recipient, subject, body, user=None, issue=None):
+    """
+    Queue a single email for the outbox worker.
+    """
+    return OutboundMessage.objects.create(
+        channel='email', recipient=recipient, subject=subject, body=body, user=user, issue=issue,
+    )
+
+
+def get_issue_event_recipients(issue, event):
+    """
+    Return the users who should hear about ``event`` on ``issue``.
+    """
+    recipients = {}
+    if event == 'created':
+        # Registrars of the student's college triage new issues
+        for registrar in User.objects.filter(role='academic registrar', college_id=issue.student.college_id):
+            recipients[registrar.pk] = registrar
+    else:
+        recipients[issue.student.pk] = issue.student
+    if event in ('created', 'assigned') and issue.assigned_to_id:
+        recipients[issue.assigned_to_id] = issue.assigned_to
+    return list(recipients.values())
+
+
+def build_issue_event_messages(issue, event, recipients=None):
+    """
+    Build (unsaved) notification and email messages for an issue event.
+    """
+    if recipients is None:
+        recipients = get_issue_event_recipients(issue, event)
+    subject, body = ISSUE_EVENT_MESSAGES[event]
+    context = {
+        'issue': issue,
+        'category': issue.get_category_display(),
+        'course': issue.course.code,
+        'assignee': issue.assigned_to.username if issue.assigned_to_id else '',
+    }
+    subject, body = subject.format(**context), body.format(**context)
+
+    messages = []
+    for user in recipients:
+        messages.append(OutboundMessage(channel='notification', user=user, issue=issue, body=body))
+        if user.email:
+            messages.append(OutboundMessage(
+                channel='email', user=user, issue=issue, recipient=user.email, subject=subject, body=body,
+            ))
+    return messages
+
+
+def publish_issue_event(issue, event, recipients):
+    """
+    Push the change to the live event streams of everyone involved.
+    """
+    user_ids = {user.pk for user in recipients} | {issue.student_id, issue.assigned_to_id}
+    publish(user_ids, 'issue', {
+        'id': issue.pk,
+        'event': event,
+        'status': issue.status,
+        'assigned_to': issue.assigned_to_id,
+    })
+
+
+def notify_issue_event(issue, event):
+    """
+    Queue notifications and emails for an issue being created, assigned,
+    moved to in progress or resolved.
+    """
+    recipients = get_issue_event_recipients(issue, event)
+    publish_issue_event(issue, event, recipients)
+    return OutboundMessage.objects.bulk_create(build_issue_event_messages(issue, event, recipients))
+
+
+def notify_issue_events(issues, event):
+    """
+    Queue messages for the same event on many issues with a single insert.
+    """
+    messages = []
+    for issue in issues:
+        recipients = get_issue_event_recipients(issue, event)
+        publish_issue_event(issue, event, recipients)
+        messages.extend(build_issue_event_messages(issue, event, recipients))
+    return OutboundMessage.objects.bulk_create(messages)
+
+
+def publish_notification(notification):
+    publish([notification.user_id], 'notification', {
+        'id': notification.pk,
+        'issue': notification.issue_id,
+        'message': notification.message,
+    })
+
+
+def get_retry_delay(attempts):
+    """
+    Exponential backoff: base, 2x base, 4x base, ... capped at an hour.
+    """
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def claim_pending(batch_size, now):
+    """
+    Lease one batch of due messages to this worker and count the attempt.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers claim side by side
+        batch = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        for message in batch:
+            message.attempts += 1
+            message.available_at = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        OutboundMessage.objects.bulk_update(batch, ['attempts', 'available_at'])
+    return batch
+
+
+def deliver_pending(batch_size=None):
+    """
+    Claim one batch of due messages and deliver it. Returns (sent, failed).
+    """
+    now = timezone.now()
+    batch = claim_pending(batch_size or settings.OUTBOX_BATCH_SIZE, now)
+    if not batch:
+        return 0, 0
+
+    emails = [message for message in batch if message.channel == 'email']
+    notifications = [message for message in batch if message.channel == 'notification']
+    # Outside any transaction: a slow mail server only delays this worker
+    errors = _send_emails(emails) if emails else {}
+
+    sent = failed = 0
+    for message in batch:
+        if message.pk in errors:
+            message.last_error = errors[message.pk]
+            if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                message.status = 'failed'
+            else:
+                message.available_at = now + get_retry_delay(message.attempts)
+            failed += 1
+        else:
+            message.status = 'sent'
+            message.sent_at = now
+            sent += 1
+
+    with transaction.atomic():
+        created = []
+        if notifications:
+            created = Notification.objects.bulk_create(
+                Notification(user_id=message.user_id, issue_id=message.issue_id, message=message.body)
+                for message in notifications
+            )
+            # bulk_create sends no post_save, so count and publish them here
+            bump_unread(Counter(notification.user_id for notification in created))
+        OutboundMessage.objects.bulk_update(batch, ['status', 'last_error', 'available_at', 'sent_at'])
+    for notification in created:
+        publish_notification(notification)
+    return sent, failed
+
+
+def _send_emails(messages):
+    """
+    Send emails over one SMTP connection. Returns {message id: error}.
+    """
+    errors = {}
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as e:
+        logger.warning("Outbox could not open an email connection: %s", e)
+        return {message.pk: str(e) for message in messages}
+
+    try:
+        for message in messages:
+            try:
+                EmailMessage(
+                    message.subject, message.body, settings.EMAIL_HOST_USER, [message.recipient],
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                logger.warning("Outbox failed to send message %s: %s", message.pk, e)
+                errors[message.pk] = str(e)
+    finally:
+        connection.close()
+    return errors
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IssueCursorPagination(CursorPagination):
+    """
+    Keyset pagination for issue feeds, newest first.
+
+    Pages are located with a WHERE on created_at (id breaks ties) instead of
+    an OFFSET. Each feed filters on a column that leads an index followed by
+    (created_at, id): student, assigned_to or the denormalised college. So a
+    deep page is one index range, the same cost as the first page.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
+
+
+class NotificationCursorPagination(IssueCursorPagination):
+    """
+    Keyset pagination for a user's inbox, served from the (user, created_at,
+    id) index on Notification.
+    """
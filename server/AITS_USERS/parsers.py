@@ -0,0 +1,32 @@
+"""
+JSON request parsing with orjson, the default JSON parser in
+settings.REST_FRAMEWORK.
+
+ORJSONParser accepts and rejects the same bodies as DRF's JSONParser: orjson
+handles the common case, and anything it refuses (NaN/Infinity literals,
+numbers that overflow a double, lone surrogates, non UTF-8 charsets) is
+handed to JSONParser, which either parses it the stdlib way or raises the
+usual ParseError. Integers beyond 64 bits parse as floats.
+"""
+import io
+
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding') or 'utf-8'
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,102 @@
+"""
+Read-only list representations built straight from ``.values()`` rows.
+
+A ModelSerializer builds a field tree and a model instance for every row
+(and IssueSerializer nests a full UserSerializer and the comment list). List
+views don't need that: a Projection names the output keys and the lookups
+that fill them, fetches exactly those columns with one ``.values()`` query
+and maps each row dict to the output dict. Detail, create and update keep
+using the serializers.
+
+Nested dicts in the field spec become nested objects; a nested object whose
+``id`` is NULL (an optional relation) is rendered as null.
+"""
+from rest_framework.response import Response
+
+
+class Projection:
+    def __init__(self, fields):
+        self.fields = fields
+        self.lookups = tuple(_collect_lookups(fields))
+        self._build = _compile(fields)
+
+    def apply(self, queryset):
+        """
+        Turn a model queryset into the ``.values()`` rows this projection reads.
+        """
+        return queryset.select_related(None).prefetch_related(None).values(*self.lookups)
+
+    def __call__(self, row):
+        return self._build(row)
+
+    def many(self, rows):
+        build = self._build
+        return [build(row) for row in rows]
+
+
+def _collect_lookups(fields):
+    for source in fields.values():
+        if isinstance(source, dict):
+            yield from _collect_lookups(source)
+        else:
+            yield source
+
+
+def _compile(fields):
+    flat = tuple((key, source) for key, source in fields.items() if not isinstance(source, dict))
+    nested = tuple((key, _compile(source)) for key, source in fields.items() if isinstance(source, dict))
+    id_lookup = fields.get('id') if not isinstance(fields.get('id'), dict) else None
+
+    def build(row):
+        if id_lookup is not None and row[id_lookup] is None:
+            return None
+        data = {key: row[source] for key, source in flat}
+        for key, build_nested in nested:
+            data[key] = build_nested(row)
+        return data
+    return build
+
+
+# Compact issue rows for list views: the student's identity instead of the
+# full UserSerializer and no comment list (GET /issues/<id>/ has both).
+ISSUE_LIST = Projection({
+    'id': 'id',
+    'year_of_study': 'year_of_study',
+    'semester': 'semester',
+    'category': 'category',
+    'description': 'description',
+    'status': 'status',
+    'student': {
+        'id': 'student_id',
+        'username': 'student__username',
+        'first_name': 'student__first_name',
+        'last_name': 'student__last_name',
+        'email': 'student__email',
+        'role_id': 'student__role_id',
+    },
+    'course_details': {
+        'id': 'course_id',
+        'code': 'course__code',
+        'name': 'course__name',
+        'department': {'id': 'course__department_id', 'name': 'course__department__name'},
+    },
+    'assigned_to': 'assigned_to_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+})
+
+
+class ProjectedListMixin:
+    """
+    Serves a generic view's list action from ``list_projection`` instead of
+    its serializer.
+    """
+    list_projection = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.list_projection.apply(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.list_projection.many(page))
+        return Response(self.list_projection.many(rows))
+
@@ -0,0 +1,153 @@
+"""
+Query budgets and N+1 detection.
+
+Views declare their budgets as class attributes:
+
+    query_budget = 4            # most queries one request may run
+    max_repeated_queries = 2    # most runs of one SQL shape per request
+
+A viewset can give a budget per action, e.g. ``{'list': 4, 'create': 20}``.
+Views without ``max_repeated_queries`` get settings.QUERY_BUDGET_MAX_REPEATS;
+views without ``query_budget`` have no total limit. The SQL shape is the
+statement with its parameters left out and IN lists collapsed, so the same
+lookup run once per row of a list shows up as one shape repeated N times.
+
+MetricsMiddleware audits requests according to settings.QUERY_BUDGET_MODE:
+
+- ``raise``: every request; a breach raises QueryBudgetExceeded. The test
+  runner (QueryBudgetTestRunner, set in aits/test_settings.py) switches to
+  this mode.
+- ``log``: a QUERY_BUDGET_SAMPLE_RATE share of requests; a breach is logged
+  with the code that issued the repeated queries.
+- ``off``: nothing is audited.
+
+Queries slower than settings.SLOW_QUERY_SECONDS are logged in every mode.
+"""
+import logging
+import random
+import re
+import traceback
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+# Savepoints repeat with every atomic block; they aren't N+1 patterns
+_TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK')
+_FRAMES_SKIPPED = ('/django/db/', '/django/utils/', '/AITS_USERS/metrics.py', '/AITS_USERS/query_budget.py')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryAudit:
+    """
+    SQL shapes run during one request: shape -> [count, seconds, origin].
+    """
+
+    def __init__(self):
+        self.shapes = {}
+
+    def record(self, sql, seconds):
+        if sql.startswith(_TRANSACTION_STATEMENTS):
+            return
+        shape = get_sql_shape(sql)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            # Only the first run of a shape pays for the stack walk
+            self.shapes[shape] = [1, seconds, get_origin()]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+
+def get_sql_shape(sql):
+    return _IN_LIST.sub('(...)', sql)
+
+
+def get_origin(limit=3):
+    """
+    Where the current query was issued from, as "file:line in func": the
+    innermost frame above the ORM, then the innermost frames of this project.
+    """
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if not any(part in frame.filename for part in _FRAMES_SKIPPED)
+    ]
+    project = [frame for frame in frames if frame.filename.startswith(base) and '/site-packages/' not in frame.filename]
+    chosen = frames[-1:] + [frame for frame in reversed(project[-limit:]) if frame is not frames[-1]]
+    return ' <- '.join(f'{_short_path(frame.filename, base)}:{frame.lineno} in {frame.name}' for frame in chosen)
+
+
+def _short_path(filename, base):
+    if '/site-packages/' in filename:
+        return filename.split('/site-packages/', 1)[1]
+    if filename.startswith(base):
+        return filename[len(base) + 1:]
+    return filename
+
+
+def start_audit():
+    """
+    Return a QueryAudit if this request should be audited, otherwise None.
+    """
+    mode = settings.QUERY_BUDGET_MODE
+    if mode == 'raise' or (mode == 'log' and random.random() < settings.QUERY_BUDGET_SAMPLE_RATE):
+        return QueryAudit()
+    return None
+
+
+def check_budget(view_class, action, queries, audit):
+    """
+    Return a list of budget breaches for a request to ``view_class``.
+    """
+    problems = []
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        budget = budget.get(action)
+    if budget is not None and queries > budget:
+        problems.append(f"{queries} queries, budget is {budget}")
+    max_repeats = getattr(view_class, 'max_repeated_queries', settings.QUERY_BUDGET_MAX_REPEATS)
+    for shape, (count, seconds, origin) in audit.shapes.items():
+        if count > max_repeats:
+            problems.append(f"{count} runs ({seconds * 1000:.1f} ms) of: {shape[:300]}\n    from {origin}")
+    return problems
+
+
+def report_breaches(request, view, queries, audit):
+    func = request.resolver_match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    # Viewsets map the HTTP method to an action
+    action = getattr(func, 'actions', {}).get(request.method.lower())
+    problems = check_budget(view_class, action, queries, audit)
+    if not problems:
+        return
+    message = f"Query budget exceeded by {view}:\n  " + '\n  '.join(problems)
+    if settings.QUERY_BUDGET_MODE == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def log_slow_query(sql, seconds):
+    if seconds >= settings.SLOW_QUERY_SECONDS:
+        logger.warning("Slow query (%.0f ms): %s\n    from %s", seconds * 1000, sql[:1000], get_origin())
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """
+    Test runner that makes every request in the suite enforce its query budget.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.budget_settings = override_settings(QUERY_BUDGET_MODE='raise')
+        self.budget_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.budget_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,115 @@
+"""
+Queryset helpers that derive select_related/prefetch_related from a serializer.
+
+A serializer already describes every relation it is going to read, so instead
+of hand-writing the join graph in each view we walk the serializer's field tree
+once and apply the matching lookups to the view's queryset.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class):
+    """
+    Return (select_related, prefetch_related) for a serializer class.
+
+    select_related is a tuple of lookup strings. prefetch_related is a tuple of
+    (lookup, model, nested_plan) so fresh Prefetch querysets can be built for
+    every request instead of sharing one queryset between threads.
+    """
+    return _build_plan(serializer_class(), prefix='')
+
+
+def _build_plan(serializer, prefix):
+    model = serializer.Meta.model
+    select, prefetch = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # Properties and serializer methods are not relations we can plan
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+
+        # Nested "many" serializers (e.g. IssueSerializer.updates)
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if isinstance(child, serializers.ModelSerializer):
+                prefetch.append((lookup, child.Meta.model, _build_plan(child, prefix='')))
+            else:
+                prefetch.append((lookup, None, None))
+            continue
+
+        # Many-related PK/slug fields
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetch.append((lookup, None, None))
+            continue
+
+        if not (model_field.many_to_one or model_field.one_to_one):
+            continue
+
+        # Nested single-object serializers join the related row and recurse
+        if isinstance(field, serializers.ModelSerializer):
+            select.append(lookup)
+            nested_select, nested_prefetch = _build_plan(field, prefix=lookup + '__')
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+            continue
+
+        # Primary key fields read the FK column directly; anything else
+        # (slug, string) needs the related row
+        if isinstance(field, serializers.RelatedField) and not field.use_pk_only_optimization():
+            select.append(lookup)
+
+    return tuple(select), tuple(prefetch)
+
+
+def _build_prefetches(prefetch_plan):
+    lookups = []
+    for lookup, model, nested_plan in prefetch_plan:
+        if model is None:
+            lookups.append(lookup)
+            continue
+        nested_select, nested_prefetch = nested_plan
+        queryset = model._default_manager.all()
+        if nested_select:
+            queryset = queryset.select_related(*nested_select)
+        if nested_prefetch:
+            queryset = queryset.prefetch_related(*_build_prefetches(nested_prefetch))
+        lookups.append(Prefetch(lookup, queryset=queryset))
+    return lookups
+
+
+def optimize_queryset(queryset, serializer_class):
+    """
+    Apply the serializer's relation graph to a queryset.
+    """
+    select, prefetch = get_query_plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*_build_prefetches(prefetch))
+    return queryset
+
+
+class SerializerQuerysetMixin:
+    """
+    Generic view mixin that optimises the view's queryset for its serializer.
+
+    Hooked into filter_queryset so it also applies when a view overrides
+    get_queryset, and to get_object for detail routes.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return optimize_queryset(queryset, self.get_serializer_class())
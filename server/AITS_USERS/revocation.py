@@ -0,0 +1,160 @@
+"""
+Refresh token revocation.
+
+simplejwt records every refresh token it issues in OutstandingToken and every
+revoked one (logout, or rotation on refresh) in BlacklistedToken. Both tables
+grow by a row per login and per refresh, and every refresh looks the old
+token up in them. This module keeps that cheap as the tables age:
+
+- RevocationCache holds the jtis of revoked, unexpired refresh tokens in
+  memory. Each process loads them once and then only reads blacklist rows
+  with an id above the last one it has seen, at most every
+  REVOCATION_SYNC_SECONDS, so a check is a set lookup however big the table
+  is. Tokens revoked by this process are added straight away.
+- RevocableRefreshToken checks the cache instead of querying, and writes its
+  outstanding/blacklist rows without loading the User.
+- On refresh, revoking the old token inserts its blacklist row; the unique
+  constraint on that row makes a second use of the same token fail even if
+  another process revoked it inside the sync window.
+- prune_expired_tokens() (``manage.py prune_tokens``) deletes expired rows in
+  batches; expired tokens fail signature checks anyway.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RevocationCache:
+    """
+    In-process set of revoked refresh token jtis: jti -> expiry timestamp.
+    """
+
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self._revoked = {}
+        self._last_id = None
+        self._synced_at = 0.0
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def sync(self):
+        with self._lock:
+            now = time.time()
+            if self._last_id is None:
+                # First load: only tokens that can still be presented
+                rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                self._last_id = 0
+            else:
+                rows = BlacklistedToken.objects.filter(id__gt=self._last_id)
+            for pk, jti, expires_at in rows.order_by('id').values_list('id', 'token__jti', 'token__expires_at'):
+                self._revoked[jti] = expires_at.timestamp()
+                self._last_id = max(self._last_id, pk)
+            if now - self._purged_at >= 60:
+                self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+                self._purged_at = now
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._last_id = None
+            self._synced_at = 0.0
+
+
+revocation_cache = RevocationCache(settings.REVOCATION_SYNC_SECONDS)
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist checks go through revocation_cache.
+    """
+
+    @property
+    def jti(self):
+        return self.payload[api_settings.JTI_CLAIM]
+
+    @property
+    def expires_at(self):
+        return datetime.fromtimestamp(self.payload['exp'], tz=dt_timezone.utc)
+
+    def check_blacklist(self):
+        if revocation_cache.is_revoked(self.jti):
+            raise TokenError("Token is blacklisted")
+
+    def outstand(self):
+        # A freshly minted jti can't exist yet, so insert without a lookup
+        return OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.jti,
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=self.expires_at,
+        )
+
+    def blacklist(self):
+        """
+        Revoke this token. Raises TokenError if it was already revoked.
+        """
+        outstanding, _ = OutstandingToken.objects.get_or_create(
+            jti=self.jti,
+            defaults={
+                'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+                'token': str(self),
+                'expires_at': self.expires_at,
+            },
+        )
+        try:
+            with transaction.atomic():
+                blacklisted = BlacklistedToken.objects.create(token=outstanding)
+        except IntegrityError:
+            revocation_cache.add(self.jti, self.payload['exp'])
+            raise TokenError("Token is blacklisted")
+        revocation_cache.add(self.jti, self.payload['exp'])
+        return blacklisted
+
+
+def prune_expired_tokens(batch_size=5000, grace=timedelta(0), dry_run=False, pause=0.0):
+    """
+    Delete outstanding tokens (and their blacklist rows) that expired before
+    now - ``grace``, ``batch_size`` rows per transaction. Returns the number of
+    outstanding tokens deleted (or that would be, on a dry run).
+
+    Walks the table in id order: tokens share one lifetime, so the expired
+    ones are the oldest and each batch is a short primary key range scan.
+    """
+    cutoff = timezone.now() - grace
+    expired = OutstandingToken.objects.filter(expires_at__lt=cutoff).order_by('id')
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(expired.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        # Cascades to the blacklist rows in the same transaction
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,136 @@
+"""
+Full-text search over issue descriptions and comments.
+
+Each issue has an IssueSearchDocument holding its description and comments,
+kept up to date by signals. The document table is indexed per database:
+
+- PostgreSQL: a GIN index on to_tsvector('english', document), ranked with
+  ts_rank and queried with websearch_to_tsquery.
+- SQLite: an external-content FTS5 table (issue_search_fts) kept in sync by
+  triggers, ranked with bm25.
+
+Other databases fall back to a LIKE scan over the documents.
+"""
+import re
+
+from django.db import connection
+
+from .models import Issue, IssueSearchDocument, IssueUpdate
+
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'issue_search_fts'
+
+
+def build_documents(issue_ids):
+    """
+    Return {issue id: document text} for ``issue_ids`` in two queries.
+    """
+    documents = dict(Issue.objects.filter(pk__in=issue_ids).values_list('id', 'description'))
+    comments = (
+        IssueUpdate.objects.filter(issue_id__in=documents)
+        .order_by('issue_id', 'created_at', 'id')
+        .values_list('issue_id', 'comment')
+    )
+    for issue_id, comment in comments:
+        documents[issue_id] += '\n' + comment
+    return documents
+
+
+def index_issues(issue_ids):
+    """
+    (Re)build the search documents for ``issue_ids``.
+    """
+    issue_ids = list(issue_ids)
+    documents = build_documents(issue_ids)
+    # Delete + insert so the FTS5 triggers see a clean replacement
+    IssueSearchDocument.objects.filter(issue_id__in=issue_ids).delete()
+    IssueSearchDocument.objects.bulk_create(
+        IssueSearchDocument(issue_id=issue_id, document=document) for issue_id, document in documents.items()
+    )
+
+
+def rebuild_index(chunk_size=2000):
+    """
+    Reindex every issue, a chunk at a time. Returns the number indexed.
+    """
+    total = 0
+    ids = Issue.objects.order_by('id').values_list('id', flat=True)
+    chunk = []
+    for issue_id in ids.iterator(chunk_size=chunk_size):
+        chunk.append(issue_id)
+        if len(chunk) == chunk_size:
+            index_issues(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        index_issues(chunk)
+        total += len(chunk)
+    return total
+
+
+def get_search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_issues(query, scope=None, limit=50):
+    """
+    Return ``[(issue id, rank), ...]`` best match first. All terms must
+    match. ``scope`` is an optional Issue queryset that limits the results,
+    e.g. to a registrar's college.
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return []
+
+    scope_sql, scope_params = '', []
+    if scope is not None:
+        sql, scope_params = scope.values('id').query.sql_with_params()
+        scope_sql = f'AND d.issue_id IN ({sql})'
+
+    table = IssueSearchDocument._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT d.issue_id, ts_rank(to_tsvector(%s, d.document), q.query) AS rank
+            FROM "{table}" d, websearch_to_tsquery(%s, %s) q(query)
+            WHERE to_tsvector(%s, d.document) @@ q.query {scope_sql}
+            ORDER BY rank DESC, d.issue_id DESC
+            LIMIT %s
+        """
+        params = [SEARCH_CONFIG, SEARCH_CONFIG, ' '.join(terms), SEARCH_CONFIG, *scope_params, limit]
+    elif connection.vendor == 'sqlite' and _has_fts_table():
+        # Quote every term so user input can't use FTS5 query syntax
+        match = ' '.join(f'"{term}"' for term in terms)
+        sql = f"""
+            SELECT d.issue_id, -bm25({FTS_TABLE}) AS rank
+            FROM {FTS_TABLE} JOIN "{table}" d ON d.issue_id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s {scope_sql}
+            ORDER BY rank DESC, d.issue_id DESC
+            LIMIT %s
+        """
+        params = [match, *scope_params, limit]
+    else:
+        like = ' AND '.join('LOWER(d.document) LIKE %s' for _ in terms)
+        sql = f"""
+            SELECT d.issue_id, 0 AS rank
+            FROM "{table}" d
+            WHERE {like} {scope_sql}
+            ORDER BY d.issue_id DESC
+            LIMIT %s
+        """
+        params = [*(f'%{term}%' for term in terms), *scope_params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+_fts_tables = {}
+
+
+def _has_fts_table():
+    # The FTS5 table is created by migration 0008 when SQLite supports it
+    alias = connection.alias
+    if alias not in _fts_tables:
+        _fts_tables[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[alias]
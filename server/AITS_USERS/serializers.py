@@ -1,31 +1,32 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import User, Department, Issue, College, Programme, IssueUpdate, Course, Notification, School
+from .metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 # Serializer for the Departmentmodel
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ['id', 'name']
 
 
-class CollegeSerializer(serializers.ModelSerializer):
+class CollegeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = College
         fields = ['id', 'name'] 
 
 # Serializer for schools (which belong to colleges)
 
-class SchoolSerializer(serializers.ModelSerializer):
+class SchoolSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = School              
         fields = ['id', 'name', 'college'] 
 
 
 # Serializer for academic programme
-class ProgrammeSerializer(serializers.ModelSerializer):
+class ProgrammeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Programme
         fields  =  ['id', 'code', 'name', 'department']  
@@ -37,7 +38,7 @@ from rest_framework import serializers
 from .models import User, Department, College, Programme
 from .serializers import DepartmentSerializer, CollegeSerializer, ProgrammeSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # nested, read‑only
 
     department = DepartmentSerializer(read_only=True)
@@ -105,14 +106,14 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # Serializer for updates made to an issue
-class IssueUpdateSerializer(serializers.ModelSerializer):
+class IssueUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = IssueUpdate
         fields = ['id', 'issue', 'user', 'comment', 'created_at']
         read_only_fields = ['created_at']  # Prevent modification of created_at field
 
 # Serializer for academic courses
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     department = DepartmentSerializer(read_only=True)
     class Meta:
         model = Course 
@@ -125,7 +126,7 @@ from rest_framework import serializers
 from .models import Issue, Course, User
 from .serializers import UserSerializer, IssueUpdateSerializer  # adjust imports
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     student = UserSerializer(read_only=True)
     updates = IssueUpdateSerializer(many=True, read_only=True, source='updated')
     
@@ -178,14 +179,49 @@ class IssueSerializer(serializers.ModelSerializer):
 
 
 
+# Serializers for the bulk workflow endpoints
+class BulkIssueIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class BulkIssueAssignSerializer(BulkIssueIdsSerializer):
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role__in=['lecturer','academic registrar'])
+    )
+
+
+class BulkIssueTransitionSerializer(BulkIssueIdsSerializer):
+    status = serializers.ChoiceField(choices=['in_progress', 'resolved'])
+
+
 # Serializer for notifications sent to users
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'user', 'issue', 'message', 'is_read', 'created_at']
         read_only_fields = ['created_at']
 
 
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """
+    Which unread notifications to mark read: an id range, everything created
+    before a time, or ``all``.
+    """
+    from_id = serializers.IntegerField(min_value=1, required=False)
+    to_id = serializers.IntegerField(min_value=1, required=False)
+    before = serializers.DateTimeField(required=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs['all'] and not any(field in attrs for field in ('from_id', 'to_id', 'before')):
+            raise serializers.ValidationError("Give from_id and/or to_id, before, or all.")
+        return attrs
+
+
 # Custom serializer for handling user registration
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password         = serializers.CharField(write_only=True)
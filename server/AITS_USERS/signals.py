@@ -0,0 +1,179 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from .authentication import revoke_user_tokens
+from .caching import bump_reference_version
+from .issue_stats import UNKNOWN, apply_issue_changes, get_issue_state, load_issue_state, move_issues_to_college
+from .models import College, Course, Department, Issue, IssueUpdate, Notification, Programme, School, User
+from .notifications import bump_unread
+from .org_tree import remove_org_unit, sync_org_unit
+from .outbox import publish_notification
+from .search import index_issues
+
+
+# Catalogue models served through the reference data cache
+REFERENCE_MODELS = (College, School, Department, Programme, Course)
+
+
+def invalidate_reference_data(sender, **kwargs):
+    bump_reference_version(sender)
+
+
+# Org tree: keep each catalogue row's materialised-path node in step
+def update_org_unit(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_org_unit(instance)
+
+
+def delete_org_unit(sender, instance, **kwargs):
+    remove_org_unit(instance)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_data, sender=model, dispatch_uid=f'refdata_save_{model.__name__}')
+    post_delete.connect(invalidate_reference_data, sender=model, dispatch_uid=f'refdata_delete_{model.__name__}')
+    post_save.connect(update_org_unit, sender=model, dispatch_uid=f'org_tree_save_{model.__name__}')
+    post_delete.connect(delete_org_unit, sender=model, dispatch_uid=f'org_tree_delete_{model.__name__}')
+
+
+# Issues keep a copy of their student's college: move them, and their
+# statistics counts, along when a student changes college.
+def remember_user_college(sender, instance, **kwargs):
+    instance._loaded_college_id = instance.__dict__.get('college_id')
+
+
+def move_student_issues(sender, instance, created, raw=False, **kwargs):
+    if created or raw or 'college_id' not in instance.__dict__:
+        return
+    if instance.college_id != instance._loaded_college_id:
+        move_issues_to_college(Issue.objects.filter(student_id=instance.pk), instance.college_id)
+    instance._loaded_college_id = instance.college_id
+
+
+post_init.connect(remember_user_college, sender=User, dispatch_uid='user_college_init')
+post_save.connect(move_student_issues, sender=User, dispatch_uid='user_college_save')
+
+
+# Access tokens carry their user as claims, so deactivating or deleting a user
+# has to revoke the tokens already issued (see authentication.py)
+def remember_user_active(sender, instance, **kwargs):
+    instance._loaded_is_active = instance.__dict__.get('is_active')
+
+
+def revoke_deactivated_user(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    if instance.__dict__.get('is_active') is False and instance._loaded_is_active is not False:
+        revoke_user_tokens(instance.pk)
+    instance._loaded_is_active = instance.__dict__.get('is_active')
+
+
+def revoke_deleted_user(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
+
+
+post_init.connect(remember_user_active, sender=User, dispatch_uid='user_active_init')
+post_save.connect(revoke_deactivated_user, sender=User, dispatch_uid='user_active_save')
+post_delete.connect(revoke_deleted_user, sender=User, dispatch_uid='user_delete')
+
+
+# Issue statistics: remember each issue's state as loaded so saves and
+# deletes can move its count from the old key to the new one.
+def remember_issue_state(sender, instance, **kwargs):
+    instance._stats_state = get_issue_state(instance) if instance.pk else None
+
+
+def load_deferred_issue_state(sender, instance, **kwargs):
+    if instance.pk and getattr(instance, '_stats_state', None) is UNKNOWN:
+        instance._stats_state = load_issue_state(instance.pk)
+
+
+def update_issue_statistics(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_stats_state', None)
+    new = get_issue_state(instance)
+    if new is UNKNOWN:
+        new = load_issue_state(instance.pk)
+    apply_issue_changes([(old, new)], [instance])
+    instance._stats_state = new
+
+
+def remove_issue_statistics(sender, instance, **kwargs):
+    old = getattr(instance, '_stats_state', None)
+    if old is UNKNOWN:
+        old = get_issue_state(instance)
+    if old not in (None, UNKNOWN):
+        apply_issue_changes([(old, None)], [instance])
+
+
+post_init.connect(remember_issue_state, sender=Issue, dispatch_uid='issue_stats_init')
+pre_save.connect(load_deferred_issue_state, sender=Issue, dispatch_uid='issue_stats_pre_save')
+post_save.connect(update_issue_statistics, sender=Issue, dispatch_uid='issue_stats_save')
+post_delete.connect(remove_issue_statistics, sender=Issue, dispatch_uid='issue_stats_delete')
+
+
+# Search index: rebuild an issue's document when its description or
+# comments change.
+def remember_issue_description(sender, instance, **kwargs):
+    instance._indexed_description = instance.__dict__.get('description')
+
+
+def index_issue(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.__dict__.get('description') != instance._indexed_description:
+        index_issues([instance.pk])
+        instance._indexed_description = instance.description
+
+
+def index_commented_issue(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_issues([instance.issue_id])
+
+
+def reindex_uncommented_issue(sender, instance, **kwargs):
+    # The comment may be going with a cascaded delete of its issue, so wait
+    # for the commit; an issue that no longer exists just loses its document
+    issue_id = instance.issue_id
+    transaction.on_commit(lambda: index_issues([issue_id]))
+
+
+post_init.connect(remember_issue_description, sender=Issue, dispatch_uid='issue_search_init')
+post_save.connect(index_issue, sender=Issue, dispatch_uid='issue_search_save')
+post_save.connect(index_commented_issue, sender=IssueUpdate, dispatch_uid='issue_update_search_save')
+post_delete.connect(reindex_uncommented_issue, sender=IssueUpdate, dispatch_uid='issue_update_search_delete')
+
+
+# Live event stream: notifications created one at a time (e.g. in the admin)
+def publish_created_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_notification(instance)
+
+
+post_save.connect(publish_created_notification, sender=Notification, dispatch_uid='notification_event_save')
+
+
+# Unread counters: remember whether a notification was unread as loaded so a
+# save that flips is_read moves the count.
+def remember_notification_unread(sender, instance, **kwargs):
+    instance._was_unread = bool(instance.pk) and instance.__dict__.get('is_read') is False
+
+
+def update_unread_count(sender, instance, created, raw=False, **kwargs):
+    if raw or 'is_read' not in instance.__dict__:
+        return
+    unread = not instance.is_read
+    if unread != instance._was_unread:
+        bump_unread({instance.user_id: 1 if unread else -1})
+    instance._was_unread = unread
+
+
+def remove_unread_count(sender, instance, **kwargs):
+    if instance._was_unread:
+        bump_unread({instance.user_id: -1})
+
+
+post_init.connect(remember_notification_unread, sender=Notification, dispatch_uid='notification_unread_init')
+post_save.connect(update_unread_count, sender=Notification, dispatch_uid='notification_unread_save')
+post_delete.connect(remove_unread_count, sender=Notification, dispatch_uid='notification_unread_delete')
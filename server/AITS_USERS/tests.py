@@ -1,3 +1,1149 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import re
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import AuthenticationFailed, ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ClaimsJWTAuthentication, revoked_users, user_cache
+from .compression import brotli
+from .events import get_broker
+from .exports import ISSUE_EXPORT_FIELDS, iter_csv
+from .issue_stats import rebuild_issue_statistics
+from .models import (
+    College, Course, Department, Issue, IssueStatistic, IssueUpdate, Notification, NotificationCounter,
+    OrgUnit, OutboundMessage, Programme, RevokedUser, School, User,
+)
+from .notifications import get_unread_count, rebuild_unread_counts
+from .org_tree import rebuild_org_tree
+from .outbox import claim_pending, deliver_pending
+from .parsers import ORJSONParser
+from .query_budget import QueryBudgetExceeded
+from .renderers import ORJSONRenderer
+from .revocation import prune_expired_tokens, revocation_cache
+from .search import _fts_tables, _has_fts_table, index_issues
+from .serializers import IssueSerializer
+from . import views
+from .views import CustomTokenObtainSerializer
+
+
+def make_user(username, role, **fields):
+    user = User(username=username, email=f'{username}@example.com', role=role, **fields)
+    user.set_unusable_password()
+    user.save()
+    return user
+
+
+class APITestCase(TestCase):
+    """
+    A small catalogue (one college, school, department and programme with a
+    course) plus a student, a lecturer and a registrar in that college.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.college = College.objects.create(name='Computing')
+        cls.school = School.objects.create(name='Computing and IT', college=cls.college)
+        cls.department = Department.objects.create(name='Computer Science', school=cls.school)
+        cls.programme = Programme.objects.create(name='BSc Computer Science', code='BSCS', department=cls.department)
+        cls.course = Course.objects.create(code='CSC1100', name='Programming', department=cls.department)
+        affiliation = {'college': cls.college, 'department': cls.department}
+        cls.student = make_user('student', 'student', programme=cls.programme, **affiliation)
+        cls.lecturer = make_user('lecturer', 'lecturer', **affiliation)
+        cls.registrar = make_user('registrar', 'academic registrar', **affiliation)
+
+    def setUp(self):
+        cache.clear()
+        # Fresh revocations, so the periodic sync doesn't land inside a query count
+        revoked_users.clear()
+        revoked_users.sync()
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        # Access tokens carry the user claims, so authentication runs no query
+        token = CustomTokenObtainSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def make_issues(self, count, **fields):
+        # bulk_create skips Issue.save(), which copies the student's college
+        fields = {'student': self.student, 'college': self.college, 'course': self.course, **fields}
+        return Issue.objects.bulk_create(
+            Issue(category='missing_marks', semester=1, year_of_study='Year One',
+                  description=f'Issue {n}', **fields)
+            for n in range(count)
+        )
+
+
+class ConstantQueryTests(APITestCase):
+    """
+    List views run the same number of queries for one row as for many.
+    """
+
+    def assertConstantQueries(self, url, queries, add_rows, results=lambda data: data['results']):
+        add_rows(1)
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(results(response.json())), 1)
+
+        add_rows(9)
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(results(response.json())), 10)
+
+    def test_student_issues(self):
+        self.authenticate(self.student)
+        self.assertConstantQueries('/api/my-issues/', 1, self.make_issues)
+
+    def test_issue_list(self):
+        self.authenticate(self.student)
+        self.assertConstantQueries('/api/issues/', 1, self.make_issues, results=lambda data: data)
+
+    def test_issue_workflow_list(self):
+        self.authenticate(self.registrar)
+        self.assertConstantQueries('/api/issues/workflow/', 1, self.make_issues, results=lambda data: data)
+
+    def test_registrar_history(self):
+        self.authenticate(self.registrar)
+        self.assertConstantQueries('/api/issues/history/', 1, self.make_issues)
+
+    def test_lecturer_assigned_issues(self):
+        self.authenticate(self.lecturer)
+        self.assertConstantQueries(
+            '/api/issues/assigned/', 1, lambda count: self.make_issues(count, assigned_to=self.lecturer))
+
+    def test_course_list(self):
+        # Course.objects.all() shares the department's single course; drop it
+        # so the list holds only the added rows
+        self.course.delete()
+
+        def add_courses(count):
+            start = Course.objects.count()
+            Course.objects.bulk_create(
+                Course(code=f'CSC{n:04d}', name=f'Course {n}', department=self.department)
+                for n in range(start, start + count)
+            )
+        # The cached department map (programmes, departments with courses)
+        # and the course page
+        self.assertConstantQueries(
+            f'/api/courses/?department={self.department.pk}', 3, add_courses, results=lambda data: data)
+
+    def test_lecturers_by_department(self):
+        self.authenticate(self.registrar)
+        self.lecturer.delete()
+
+        def add_lecturers(count):
+            start = User.objects.filter(role='lecturer').count()
+            for n in range(start, start + count):
+                make_user(f'lecturer{n}', 'lecturer', college=self.college, department=self.department)
+        self.assertConstantQueries(
+            f'/api/lecturers/?department={self.department.pk}', 1, add_lecturers, results=lambda data: data)
+
+
+class IssueCollegeTests(APITestCase):
+    """
+    Issues carry their student's college for the registrar's history.
+    """
+
+    def test_created_issue_copies_student_college(self):
+        self.authenticate(self.student)
+        response = self.client.post('/api/issues/', {
+            'course': self.course.pk, 'category': 'missing_marks', 'semester': 1,
+            'year_of_study': 'Year One', 'description': 'Missing CAT marks',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Issue.objects.get(pk=response.json()['id']).college_id, self.college.pk)
+
+    def test_issues_follow_student_to_new_college(self):
+        issue = Issue.objects.create(student=self.student, course=self.course, category='other', description='x')
+        other = College.objects.create(name='Business')
+        other_registrar = make_user('other-registrar', 'academic registrar', college=other)
+
+        student = User.objects.get(pk=self.student.pk)
+        student.college = other
+        student.save()
+        issue.refresh_from_db()
+        self.assertEqual(issue.college_id, other.pk)
+
+        self.authenticate(other_registrar)
+        response = self.client.get('/api/issues/history/')
+        self.assertEqual([row['id'] for row in response.json()['results']], [issue.pk])
+        self.authenticate(self.registrar)
+        self.assertEqual(self.client.get('/api/issues/history/').json()['results'], [])
+
+
+    def test_statistics_follow_student_to_new_college(self):
+        issues = [
+            Issue.objects.create(student=self.student, course=self.course, category=category, description='x')
+            for category in ('missing_marks', 'remarking', 'other')
+        ]
+        other = College.objects.create(name='Business')
+
+        student = User.objects.get(pk=self.student.pk)
+        student.college = other
+        student.save()
+        issue = Issue.objects.get(pk=issues[0].pk)
+        issue.status = 'in_progress'
+        issue.save()
+
+        counters = list(IssueStatistic.objects.exclude(count=0).order_by('key').values_list('key', 'count'))
+        self.assertFalse(IssueStatistic.objects.filter(count__lt=0).exists())
+        per_college = dict(IssueStatistic.objects.values('college_id').annotate(total=Sum('count'))
+                           .values_list('college_id', 'total'))
+        self.assertEqual(per_college.get(other.pk), 3)
+        self.assertEqual(per_college.get(self.college.pk, 0), 0)
+        rebuild_issue_statistics()
+        self.assertEqual(counters, list(IssueStatistic.objects.order_by('key').values_list('key', 'count')))
+
+
+class OutboxTests(APITestCase):
+    """
+    Issue changes queue messages in their own transaction; the worker sends
+    them after releasing its claim.
+    """
+    ISSUE = {'category': 'missing_marks', 'semester': 1, 'year_of_study': 'Year One', 'description': 'Missing CAT'}
+
+    def create_issue(self):
+        self.authenticate(self.student)
+        return self.client.post('/api/issues/', {'course': self.course.pk, **self.ISSUE}, format='json')
+
+    def test_created_issue_is_delivered(self):
+        self.assertEqual(self.create_issue().status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(deliver_pending(), (2, 0))
+
+        self.assertEqual([message.to for message in mail.outbox], [[self.registrar.email]])
+        self.assertEqual(Notification.objects.get().user, self.registrar)
+        self.assertFalse(OutboundMessage.objects.exclude(status='sent').exists())
+        self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_failed_notify_rolls_back_issue(self):
+        with mock.patch('AITS_USERS.views.notify_issue_event', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.create_issue()
+        self.assertFalse(Issue.objects.exists())
+
+    def test_claimed_batch_is_leased_while_sending(self):
+        self.create_issue()
+        claimed_during_send = []
+
+        def send(connection, messages):
+            claimed_during_send.extend(claim_pending(10, timezone.now()))
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', send):
+            self.assertEqual(deliver_pending(), (2, 0))
+        self.assertEqual(claimed_during_send, [])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_email_is_retried_then_given_up(self):
+        self.create_issue()
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('refused')):
+            self.assertEqual(deliver_pending(), (1, 1))
+            email = OutboundMessage.objects.get(channel='email')
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'refused'))
+            self.assertGreater(email.available_at, timezone.now())
+
+            OutboundMessage.objects.filter(pk=email.pk).update(available_at=timezone.now())
+            self.assertEqual(deliver_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(mail.outbox, [])
+
+
+class BulkWorkflowTests(APITestCase):
+    """
+    Bulk actions run the same queries however many statistics keys the
+    changed issues touch, and leave the counters matching a full rebuild.
+    """
+
+    def make_varied_issues(self, count, **fields):
+        # One statistics key per (category, semester) pair
+        pairs = [(category, semester) for category, _ in Issue.ISSUE_CATEGORIES for semester in (1, 2)]
+        issues = self.make_issues(count, **fields)
+        for issue, (category, semester) in zip(issues, pairs * count):
+            issue.category, issue.semester = category, semester
+        Issue.objects.bulk_update(issues, ['category', 'semester'])
+        rebuild_issue_statistics()
+        return [issue.pk for issue in issues]
+
+    def get_counters(self):
+        return dict(IssueStatistic.objects.filter(count__gt=0).values_list('key', 'count'))
+
+    def post_counting_queries(self, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(row['ok'] for row in response.json()['results']))
+        return len(queries)
+
+    def assertConstantBulkQueries(self, url, data, **fields):
+        counts = []
+        for count in (1, 8):
+            Issue.objects.all().delete()
+            ids = self.make_varied_issues(count, **fields)
+            counts.append(self.post_counting_queries(url, {'ids': ids, **data}))
+            counters = self.get_counters()
+            rebuild_issue_statistics()
+            self.assertEqual(counters, self.get_counters())
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_assign(self):
+        self.authenticate(self.registrar)
+        self.assertConstantBulkQueries('/api/issues/workflow/bulk-assign/', {'assigned_to': self.lecturer.pk})
+
+    def test_bulk_transition(self):
+        self.authenticate(self.registrar)
+        self.assertConstantBulkQueries(
+            '/api/issues/workflow/bulk-transition/', {'status': 'resolved'},
+            status='in_progress', assigned_to=self.registrar)
+
+    def test_bulk_resolve_needs_the_assignee(self):
+        self.authenticate(self.registrar)
+        mine, theirs = self.make_issues(2, status='in_progress', assigned_to=self.registrar)
+        Issue.objects.filter(pk=theirs.pk).update(assigned_to=self.lecturer)
+        response = self.client.post('/api/issues/workflow/bulk-transition/',
+                                    {'ids': [mine.pk, theirs.pk], 'status': 'resolved'}, format='json')
+        self.assertEqual(response.json()['results'], [
+            {'id': mine.pk, 'ok': True, 'status': 'resolved'},
+            {'id': theirs.pk, 'ok': False, 'error': "You are not assigned to this issue"},
+        ])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.status, 'in_progress')
+
+    def test_other_colleges_issues_are_not_found(self):
+        other = College.objects.create(name='Business')
+        outsider = make_user('outsider', 'student', college=other)
+        issue, = self.make_issues(1, student=outsider, college=other)
+        self.authenticate(self.registrar)
+        for url, data in (('/api/issues/workflow/bulk-assign/', {'assigned_to': self.lecturer.pk}),
+                          ('/api/issues/workflow/bulk-transition/', {'status': 'in_progress'})):
+            with self.subTest(url):
+                response = self.client.post(url, {'ids': [issue.pk], **data}, format='json')
+                self.assertEqual(response.json(), {
+                    'updated': 0, 'results': [{'id': issue.pk, 'ok': False, 'error': "Issue not found"}],
+                })
+        issue.refresh_from_db()
+        self.assertEqual((issue.status, issue.assigned_to_id), ('open', None))
+
+
+class NotificationCounterTests(APITestCase):
+    """
+    The unread counters stay equal to a COUNT of the unread notifications.
+    """
+
+    def assertCountersMatch(self):
+        for user in (self.student, self.lecturer):
+            unread = Notification.objects.filter(user=user, is_read=False).count()
+            self.assertEqual(get_unread_count(user.pk), unread, user.username)
+        self.authenticate(self.student)
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.json(), {'unread': Notification.objects.filter(user=self.student, is_read=False).count()})
+
+    def mark_read(self, **data):
+        self.authenticate(self.student)
+        response = self.client.post('/api/notifications/mark-read/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['marked']
+
+    def test_counters_follow_every_change(self):
+        issue, other_issue = self.make_issues(2)
+        notifications = [
+            Notification.objects.create(user=self.student, issue=issue, message=f'Update {n}') for n in range(6)
+        ]
+        kept = Notification.objects.create(user=self.student, issue=other_issue, message='Assigned')
+        Notification.objects.create(user=self.lecturer, issue=issue, message='New issue')
+        self.assertCountersMatch()
+
+        notifications[1].is_read = True
+        notifications[1].save()
+        self.assertCountersMatch()
+
+        # The range includes the notification that was already read
+        self.assertEqual(self.mark_read(from_id=notifications[0].pk, to_id=notifications[2].pk), 2)
+        self.assertCountersMatch()
+
+        Notification.objects.filter(pk=notifications[3].pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(self.mark_read(before=(timezone.now() - datetime.timedelta(days=1)).isoformat()), 1)
+        self.assertCountersMatch()
+
+        # One unread and one read notification, loaded as a delete view would
+        Notification.objects.get(pk=notifications[4].pk).delete()
+        Notification.objects.get(pk=notifications[0].pk).delete()
+        self.assertCountersMatch()
+
+        # Deleting the issue cascades to its notifications, the lecturer's too
+        issue.delete()
+        self.assertCountersMatch()
+        self.assertEqual(get_unread_count(self.student.pk), 1)
+
+        self.assertEqual(self.mark_read(all=True), 1)
+        self.assertCountersMatch()
+        self.assertTrue(Notification.objects.get(pk=kept.pk).is_read)
+
+    def test_rebuild_matches_the_counters(self):
+        issue, = self.make_issues(1)
+        for n in range(3):
+            Notification.objects.create(user=self.student, issue=issue, message=f'Update {n}')
+        counters = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+        rebuild_unread_counts()
+        self.assertEqual(dict(NotificationCounter.objects.values_list('user_id', 'unread')), counters)
+
+
+class OrgTreeTests(APITestCase):
+    """
+    The materialised org tree follows catalogue changes and serves subtrees.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.law = College.objects.create(name='Law')
+        cls.law_school = School.objects.create(name='School of Law', college=cls.law)
+
+    def get_tree(self, **params):
+        response = self.client.get('/api/org-tree/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertMatchesRebuild(self):
+        # The signal-maintained tree is the one rebuild_org_tree() computes
+        units = set(OrgUnit.objects.values_list('path', 'kind', 'object_id', 'name', 'code', 'depth'))
+        rebuild_org_tree()
+        self.assertEqual(units, set(OrgUnit.objects.values_list('path', 'kind', 'object_id', 'name', 'code', 'depth')))
+
+    def department_node(self):
+        return {
+            'id': self.department.pk, 'name': 'Computer Science',
+            'programmes': [{'id': self.programme.pk, 'name': 'BSc Computer Science', 'code': 'BSCS'}],
+            'courses': [{'id': self.course.pk, 'name': 'Programming', 'code': 'CSC1100'}],
+        }
+
+    def test_whole_tree(self):
+        self.assertEqual(self.get_tree(), [
+            {'id': self.college.pk, 'name': 'Computing', 'schools': [
+                {'id': self.school.pk, 'name': 'Computing and IT', 'departments': [self.department_node()]},
+            ]},
+            {'id': self.law.pk, 'name': 'Law', 'schools': [
+                {'id': self.law_school.pk, 'name': 'School of Law', 'departments': []},
+            ]},
+        ])
+        self.assertMatchesRebuild()
+
+    def test_subtrees(self):
+        self.assertEqual(self.get_tree(department=self.department.pk), self.department_node())
+        self.assertEqual(self.get_tree(school=self.school.pk)['departments'], [self.department_node()])
+        self.assertEqual(self.get_tree(college=self.law.pk)['schools'], [
+            {'id': self.law_school.pk, 'name': 'School of Law', 'departments': []},
+        ])
+        self.assertNotIn('courses', self.get_tree(department=self.department.pk, courses='false'))
+
+    def test_unknown_subtree(self):
+        for params in ({'college': 999}, {'school': self.college.pk + 999}, {'department': 'cs'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/org-tree/', params).status_code, 404)
+
+    def test_moving_a_school_moves_its_subtree(self):
+        self.get_tree(college=self.law.pk)
+        self.school.college = self.law
+        self.school.save()
+
+        self.assertEqual(self.get_tree(college=self.college.pk)['schools'], [])
+        moved = self.get_tree(college=self.law.pk)['schools']
+        self.assertEqual([school['id'] for school in moved], [self.school.pk, self.law_school.pk])
+        self.assertEqual(moved[0]['departments'], [self.department_node()])
+        self.assertEqual(self.get_tree(department=self.department.pk), self.department_node())
+        self.assertMatchesRebuild()
+
+    def test_moving_a_department(self):
+        self.department.school = self.law_school
+        self.department.save()
+        self.assertEqual(self.get_tree(school=self.school.pk)['departments'], [])
+        self.assertEqual(self.get_tree(school=self.law_school.pk)['departments'], [self.department_node()])
+        self.assertMatchesRebuild()
+
+    def test_deleting_drops_the_subtree(self):
+        department_id = self.department.pk
+        self.get_tree(school=self.school.pk)
+        self.department.delete()
+        self.assertEqual(self.get_tree(school=self.school.pk)['departments'], [])
+        self.assertEqual(self.client.get('/api/org-tree/', {'department': department_id}).status_code, 404)
+        self.assertFalse(OrgUnit.objects.filter(kind__in=('programme', 'course')).exists())
+        self.assertMatchesRebuild()
+
+
+class IssueSearchTests(APITestCase):
+    """
+    /api/issues/search/ ranks matches and only searches the caller's issues.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_college = College.objects.create(name='Law')
+        cls.other_student = make_user('other-student', 'student', college=cls.other_college)
+
+    def make_indexed(self, description, **fields):
+        issue, = self.make_issues(1, **fields)
+        Issue.objects.filter(pk=issue.pk).update(description=description)
+        index_issues([issue.pk])
+        return issue
+
+    def search(self, user, query):
+        self.authenticate(user)
+        response = self.client.get('/api/issues/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_best_match_first(self):
+        if not _has_fts_table():
+            self.skipTest("Ranking needs SQLite FTS5 or PostgreSQL")
+        many = self.make_indexed('Marks missing: marks for CAT, marks for exam')
+        once = self.make_indexed('Missing marks')
+        self.assertEqual(self.search(self.student, 'marks'), [many.pk, once.pk])
+
+    def test_every_term_must_match(self):
+        both = self.make_indexed('Missing exam marks')
+        self.make_indexed('Missing exam results')
+        self.assertEqual(self.search(self.student, 'exam marks'), [both.pk])
+
+    def test_results_are_scoped_to_the_caller(self):
+        own = self.make_indexed('Missing marks')
+        assigned = self.make_indexed('Missing marks', assigned_to=self.lecturer)
+        other_college = self.make_indexed('Missing marks', student=self.other_student, college=self.other_college)
+        everyone = {own.pk, assigned.pk, other_college.pk}
+
+        self.assertEqual(set(self.search(self.student, 'marks')), {own.pk, assigned.pk})
+        self.assertEqual(set(self.search(self.lecturer, 'marks')), {assigned.pk})
+        self.assertEqual(set(self.search(self.registrar, 'marks')), everyone - {other_college.pk})
+
+    def test_limit_is_clamped(self):
+        for n in range(3):
+            self.make_indexed(f'Missing marks {n}')
+        self.authenticate(self.registrar)
+        for limit, count in (('2', 2), ('-5', 1), ('0', 3), ('junk', 3), ('1000', 3)):
+            with self.subTest(limit=limit):
+                response = self.client.get('/api/issues/search/', {'q': 'marks', 'limit': limit})
+                self.assertEqual(response.json()['count'], count)
+
+    def test_query_is_required(self):
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get('/api/issues/search/', {'q': ' '}).status_code, 400)
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    """
+    Claims tokens authenticate without loading the user, until the user is
+    deactivated or deleted.
+    """
+
+    def get_user(self, token):
+        return ClaimsJWTAuthentication().get_user(ClaimsJWTAuthentication().get_validated_token(str(token)))
+
+    def test_claims_token_runs_no_user_query(self):
+        token = CustomTokenObtainSerializer.get_token(self.student).access_token
+        with self.assertNumQueries(0):
+            user = self.get_user(token)
+        self.assertEqual((user.pk, user.role, user.college_id), (self.student.pk, 'student', self.college.pk))
+
+    def test_token_without_claims_loads_the_user_once(self):
+        user_cache.clear()
+        token = AccessToken.for_user(self.student)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_user(token).programme_id, self.programme.pk)
+        with self.assertNumQueries(0):
+            self.get_user(token)
+
+    def test_deactivated_user_is_refused(self):
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get('/api/my-issues/').status_code, 200)
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get('/api/my-issues/').status_code, 401)
+
+    def test_deleted_user_is_refused(self):
+        self.authenticate(self.student)
+        self.student.delete()
+        self.assertEqual(self.client.get('/api/my-issues/').status_code, 401)
+
+    def test_revocation_reaches_other_processes_on_sync(self):
+        token = CustomTokenObtainSerializer.get_token(self.student).access_token
+        RevokedUser.objects.create(user_id=self.student.pk)
+        self.assertEqual(self.get_user(token).pk, self.student.pk)
+        revoked_users.sync()
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user(token)
+
+    def test_tokens_issued_after_reactivation_work(self):
+        RevokedUser.objects.create(
+            user_id=self.student.pk, revoked_at=timezone.now() - datetime.timedelta(seconds=5))
+        revoked_users.sync()
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get('/api/my-issues/').status_code, 200)
+
+
+class RefreshTokenRevocationTests(APITestCase):
+    """
+    Rotated and logged-out refresh tokens can't be used again, and expired
+    tokens are pruned in batches.
+    """
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/refresh/', {'refresh': token}, format='json')
+
+    def test_rotated_token_is_refused_on_reuse(self):
+        token = str(CustomTokenObtainSerializer.get_token(self.student))
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        # The replacement still works
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_reuse_inside_the_sync_window_is_refused(self):
+        # Another process that hasn't synced the revocation yet
+        token = str(CustomTokenObtainSerializer.get_token(self.student))
+        self.assertEqual(self.refresh(token).status_code, 200)
+        with mock.patch.object(revocation_cache, 'is_revoked', return_value=False):
+            self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_logged_out_token_is_refused(self):
+        token = str(CustomTokenObtainSerializer.get_token(self.student))
+        response = self.client.post('/api/auth/logout/', {'refresh': token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': token}, format='json').status_code, 400)
+
+    def make_tokens(self, expires_in, count):
+        expires_at = timezone.now() + expires_in
+        return OutstandingToken.objects.bulk_create(
+            OutstandingToken(user=self.student, jti=uuid.uuid4().hex, token='-', expires_at=expires_at)
+            for _ in range(count)
+        )
+
+    def test_prune_deletes_expired_tokens_in_batches(self):
+        expired = self.make_tokens(-datetime.timedelta(hours=1), 5)
+        live = self.make_tokens(datetime.timedelta(hours=1), 2)
+        BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in (expired[0], live[0]))
+
+        self.assertEqual(prune_expired_tokens(dry_run=True), 5)
+        self.assertEqual(OutstandingToken.objects.count(), 7)
+
+        with mock.patch('AITS_USERS.revocation.time.sleep') as sleep:
+            self.assertEqual(prune_expired_tokens(batch_size=2, pause=0.5), 5)
+        # Full batches of 2, 2, then a short one that ends the run
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(set(OutstandingToken.objects.all()), set(live))
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token', flat=True)), [live[0].pk])
+
+    def test_prune_keeps_tokens_inside_the_grace_period(self):
+        self.make_tokens(-datetime.timedelta(hours=1), 1)
+        self.make_tokens(-datetime.timedelta(days=2), 1)
+        self.assertEqual(prune_expired_tokens(grace=datetime.timedelta(days=1)), 1)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+
+class EventStreamTests(APITestCase):
+    """
+    /api/events/ streams over ASGI and refuses to tie up a WSGI worker.
+    """
+
+    def test_refused_under_wsgi(self):
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get('/api/events/').status_code, 503)
+
+    def setUp(self):
+        super().setUp()
+        # Issuing a token writes its outstanding row, which async tests can't
+        self.token = CustomTokenObtainSerializer.get_token(self.student).access_token
+
+    async def test_streams_published_events(self):
+        response = await AsyncClient().get('/api/events/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry: '))
+        get_broker().publish([self.student.pk], {'type': 'notification', 'data': {'id': 1}})
+        self.assertEqual(await anext(chunks), b'event: notification\ndata: {"id": 1}\n\n')
+        await chunks.aclose()
+
+
+class IssueExportTests(APITestCase):
+    """
+    /api/issues/history/export/ streams the registrar's college's issues.
+    """
+    url = '/api/issues/history/export/'
+
+    def export(self, **params):
+        self.authenticate(self.registrar)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def export_ids(self, **params):
+        rows = csv.DictReader(io.StringIO(self.export(**params)))
+        return [int(row['id']) for row in rows]
+
+    def test_csv(self):
+        issue, = self.make_issues(1)
+        self.authenticate(self.registrar)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="issue-history.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(ISSUE_EXPORT_FIELDS))
+        row = dict(zip(rows[0], rows[1]))
+        self.assertEqual((row['id'], row['student'], row['course_code']), (str(issue.pk), 'student', 'CSC1100'))
+        self.assertEqual(row['resolved_at'], '')
+
+    def test_ndjson(self):
+        issues = self.make_issues(2)
+        self.authenticate(self.registrar)
+        response = self.client.get(self.url, {'output': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        # Newest first
+        self.assertEqual([row['id'] for row in rows], [issue.pk for issue in reversed(issues)])
+        self.assertEqual(set(rows[0]), set(ISSUE_EXPORT_FIELDS))
+
+    def test_csv_is_written_in_batches(self):
+        rows = ({'id': n} for n in range(5))
+        with mock.patch.dict('AITS_USERS.exports.ISSUE_EXPORT_FIELDS', {'id': 'id'}, clear=True):
+            chunks = list(iter_csv(rows, batch_size=2))
+        self.assertEqual(chunks, ['id\r\n0\r\n1\r\n', '2\r\n3\r\n', '4\r\n'])
+
+    def test_formulas_are_escaped(self):
+        issues = self.make_issues(5)
+        descriptions = ['=HYPERLINK("http://example.com")', '+1', '-1', '@SUM(A1)', 'Plain']
+        for issue, description in zip(issues, descriptions):
+            Issue.objects.filter(pk=issue.pk).update(description=description)
+        rows = csv.DictReader(io.StringIO(self.export()))
+        self.assertEqual(
+            sorted(row['description'] for row in rows),
+            sorted(["'=HYPERLINK(\"http://example.com\")", "'+1", "'-1", "'@SUM(A1)", 'Plain']),
+        )
+
+    def test_scoped_to_the_registrars_college(self):
+        own, = self.make_issues(1)
+        other_college = College.objects.create(name='Law')
+        other_student = make_user('other-student', 'student', college=other_college)
+        self.make_issues(1, student=other_student, college=other_college)
+        self.assertEqual(self.export_ids(), [own.pk])
+
+    def test_filters(self):
+        old, new, resolved = self.make_issues(3)
+        Issue.objects.filter(pk=old.pk).update(created_at=timezone.make_aware(datetime.datetime(2025, 1, 10, 23, 30)))
+        Issue.objects.filter(pk=new.pk).update(created_at=timezone.make_aware(datetime.datetime(2025, 2, 1, 8)), semester=2)
+        Issue.objects.filter(pk=resolved.pk).update(created_at=timezone.make_aware(datetime.datetime(2025, 3, 1)),
+                                                    status='resolved')
+        self.assertEqual(self.export_ids(to='2025-01-10'), [old.pk])
+        self.assertEqual(self.export_ids(**{'from': '2025-01-11', 'to': '2025-02-01'}), [new.pk])
+        self.assertEqual(self.export_ids(status='resolved'), [resolved.pk])
+        self.assertEqual(self.export_ids(semester='2'), [new.pk])
+
+    def test_invalid_parameters(self):
+        self.authenticate(self.registrar)
+        for params in ({'output': 'xlsx'}, {'from': '10/01/2025'}, {'to': '2025-02-30'},
+                       {'status': 'lost'}, {'semester': 'first'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_registrars_only(self):
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class CSVImportAdminTests(APITestCase):
+    """
+    The admin upload hashes passwords in the request's own process and turns
+    over-long values into row errors.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = Client()
+        self.admin.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def upload(self, kind, content):
+        return self.admin.post('/admin/AITS_USERS/user/import-csv/', {
+            'kind': kind, 'file': SimpleUploadedFile(f'{kind}.csv', content.encode()),
+        })
+
+    def test_users_are_hashed_without_a_process_pool(self):
+        with mock.patch('AITS_USERS.bulk_import.ProcessPoolExecutor') as pool:
+            response = self.upload('users', (
+                'username,email,password,role,college,programme\n'
+                'new-student,new@example.com,s3cret-pass,student,Computing,BSCS\n'
+            ))
+        self.assertEqual(response.status_code, 302)
+        pool.assert_not_called()
+        self.assertTrue(User.objects.get(username='new-student').check_password('s3cret-pass'))
+
+    def test_over_long_values_are_row_errors(self):
+        response = self.upload('courses', (
+            'code,name,department\n'
+            f'CSC2100,{"x" * 101},Computer Science\n'
+            'CSC2200,Databases,Computer Science\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['errors'], [(2, "name is longer than 100 characters")])
+        self.assertFalse(Course.objects.filter(code__in=['CSC2100', 'CSC2200']).exists())
+
+
+def get_budgeted_endpoints(patterns=None):
+    """
+    (view class, action) for every routed view with a query budget; the
+    action is None for plain views.
+    """
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_budgeted_endpoints(pattern.url_patterns)
+            continue
+        view_class = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+        if isinstance(budget, dict):
+            for action in getattr(pattern.callback, 'actions', {}).values():
+                if action in budget:
+                    yield view_class, action
+        elif budget is not None:
+            yield view_class, None
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(APITestCase):
+    """
+    Call every budgeted view (and viewset action) the way the app does. Each
+    budget is the view's measured worst case; the test runner raises
+    QueryBudgetExceeded on a breach of a budget or of the repeated-query limit.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.student.set_password('student-pass')
+        self.student.save()
+        self.open_issue, self.progress_issue, *self.bulk_issues = self.make_issues(7, assigned_to=self.lecturer)
+        Issue.objects.filter(pk=self.progress_issue.pk).update(status='in_progress')
+        # Bulk resolves are limited to the registrar's own assignments
+        Issue.objects.filter(pk__in=[issue.pk for issue in self.bulk_issues[3:]]).update(
+            status='in_progress', assigned_to=self.registrar)
+        rebuild_issue_statistics()
+        Notification.objects.bulk_create(
+            Notification(user=self.student, issue=self.open_issue, message=f'Update {n}') for n in range(3))
+        self.refresh = str(CustomTokenObtainSerializer.get_token(self.student))
+
+    def get_cases(self):
+        """
+        (view class, action, user, method, url, data) for each budget.
+        """
+        department = f'?department={self.department.pk}'
+        open_ids = [issue.pk for issue in self.bulk_issues[:3]]
+        progress_ids = [issue.pk for issue in self.bulk_issues[3:]]
+        return [
+            (views.CustomTokenObtainPairView, None, None, 'post', '/api/auth/login/',
+             {'username': 'student', 'password': 'student-pass'}),
+            (views.CustomTokenRefreshView, None, None, 'post', '/api/auth/refresh/', {'refresh': self.refresh}),
+            (views.RegisterView, None, None, 'post', '/api/auth/register/', {
+                'username': 'new-student', 'email': 'new@example.com', 'password': 'new-pass',
+                'confirm_password': 'new-pass', 'role': 'student',
+                'college_id': self.college.pk, 'programme_id': self.programme.pk,
+            }),
+            (views.UserDetailView, None, self.student, 'get', '/api/auth/user/', None),
+            (views.CollegeViewSet, 'list', self.student, 'get', '/api/colleges/', None),
+            (views.CollegeViewSet, 'retrieve', self.student, 'get', f'/api/colleges/{self.college.pk}/', None),
+            (views.DepartmentViewSet, 'list', self.student, 'get', '/api/departments/', None),
+            (views.DepartmentViewSet, 'retrieve', self.student, 'get', f'/api/departments/{self.department.pk}/', None),
+            (views.ProgrammeViewSet, 'list', self.student, 'get', '/api/programmes/', None),
+            (views.ProgrammeViewSet, 'retrieve', self.student, 'get', f'/api/programmes/{self.programme.pk}/', None),
+            (views.CourseListView, None, self.student, 'get', f'/api/courses/{department}', None),
+            (views.OrgTreeView, None, self.student, 'get', '/api/org-tree/', None),
+            (views.StudentIssueListView, None, self.student, 'get', '/api/my-issues/', None),
+            (views.IssueWorkflowViewSet, 'list', self.registrar, 'get', '/api/issues/workflow/', None),
+            (views.IssueWorkflowViewSet, 'mark_in_progress', self.registrar, 'post',
+             f'/api/issues/workflow/{self.open_issue.pk}/mark_in_progress/', None),
+            (views.IssueWorkflowViewSet, 'resolve', self.lecturer, 'post',
+             f'/api/issues/workflow/{self.progress_issue.pk}/resolve/', None),
+            (views.IssueWorkflowViewSet, 'bulk_assign', self.registrar, 'post', '/api/issues/workflow/bulk-assign/',
+             {'ids': open_ids, 'assigned_to': self.lecturer.pk}),
+            (views.IssueWorkflowViewSet, 'bulk_transition', self.registrar, 'post',
+             '/api/issues/workflow/bulk-transition/', {'ids': progress_ids, 'status': 'resolved'}),
+            (views.LecturerByDepartmentView, None, self.registrar, 'get', f'/api/lecturers/{department}', None),
+            (views.IssueViewSet, 'list', self.student, 'get', '/api/issues/', None),
+            (views.IssueViewSet, 'retrieve', self.student, 'get', f'/api/issues/{self.open_issue.pk}/', None),
+            (views.IssueViewSet, 'create', self.student, 'post', '/api/issues/', {
+                'course': self.course.pk, 'category': 'missing_marks', 'semester': 1,
+                'year_of_study': 'Year One', 'description': 'Missing CAT marks',
+            }),
+            (views.RegistrarIssueHistoryView, None, self.registrar, 'get', '/api/issues/history/', None),
+            (views.LecturerIssueListView, None, self.lecturer, 'get', '/api/issues/assigned/', None),
+            (views.IssueStatisticsView, None, self.registrar, 'get', '/api/issues/stats/', None),
+            (views.NotificationViewSet, 'list', self.student, 'get', '/api/notifications/', None),
+            (views.NotificationViewSet, 'unread_count', self.student, 'get', '/api/notifications/unread-count/', None),
+            (views.NotificationViewSet, 'mark_read', self.student, 'post', '/api/notifications/mark-read/',
+             {'all': True}),
+            (views.IssueSearchView, None, self.registrar, 'get', '/api/issues/search/?q=marks', None),
+        ]
+
+    def test_every_budget_is_the_measured_worst_case(self):
+        # Worst case: cold reference data, revocation and user caches, and a
+        # token issued before the user claims (one extra query to load the user,
+        # in place of the user revocation sync a claims token can trigger)
+        for view_class, action, user, method, url, data in self.get_cases():
+            with self.subTest(view=view_class.__name__, action=action):
+                cache.clear()
+                user_cache.clear()
+                revocation_cache.clear()
+                _fts_tables.clear()
+                if user is None:
+                    self.client.credentials()
+                else:
+                    self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+                with CaptureQueriesContext(connection) as queries, override_settings(QUERY_BUDGET_MODE='off'):
+                    response = getattr(self.client, method)(url, data, format='json')
+                self.assertLess(response.status_code, 300, response.content)
+                budget = view_class.query_budget
+                budget = budget[action] if isinstance(budget, dict) else budget
+                self.assertEqual(len(queries), budget)
+
+    def test_every_budget_has_a_case(self):
+        cases = {(view_class, action) for view_class, action, *_ in self.get_cases()}
+        missing = set(get_budgeted_endpoints()) - cases
+        self.assertFalse(missing, f"No budget test for {sorted((v.__name__, a or '') for v, a in missing)}")
+
+    def test_breach_raises(self):
+        self.authenticate(self.student)
+        with mock.patch.object(views.StudentIssueListView, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/my-issues/')
+
+
+class JSONCompatibilityTests(APITestCase):
+    """
+    ORJSONRenderer and ORJSONParser give the same bytes, values and errors as
+    DRF's JSONRenderer and JSONParser.
+    """
+    EAT = datetime.timezone(datetime.timedelta(hours=3))
+    RENDER_CORPUS = {
+        'aware datetime': datetime.datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'whole-second datetime': datetime.datetime(2025, 3, 1, 9, 30, tzinfo=datetime.timezone.utc),
+        'offset datetime': datetime.datetime(2025, 3, 1, 12, 30, tzinfo=EAT),
+        'naive datetime': datetime.datetime(2025, 3, 1, 9, 30),
+        'date': datetime.date(2025, 3, 1),
+        'time': datetime.time(9, 30, 15, 500),
+        'timedelta': datetime.timedelta(hours=1, seconds=5),
+        'decimal': Decimal('12.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy string': gettext_lazy('This field is required.'),
+        'error detail': {'course': [ErrorDetail('This field is required.', code='required')]},
+        'return dict': ReturnDict(OrderedDict(b=1, a=2), serializer=None),
+        'return list': ReturnList([1, 'two'], serializer=None),
+        'tuple and set': {'t': (1, 2), 's': {3}},
+        'non-string keys': {1: 'one', True: 'yes', None: 'none', 2.5: 'float'},
+        'unicode': 'Makerere – Kampala ✓ 日本',
+        'line separators': 'a\u2028b\u2029c',
+        'control characters': 'tab\tnewline\nquote"backslash\\',
+        'large integer': 2 ** 70,
+        'floats': [0.1, 1.5, -2.0, 123456.789],
+        'empty': {'list': [], 'dict': {}, 'string': '', 'none': None, 'bools': [True, False]},
+    }
+    PARSE_CORPUS = {
+        'object': b'{"course": 3, "semester": 1, "description": "Marks missing"}',
+        'unicode': '{"name": "Kampala ✓ 日本", "escaped": "\\u00e9"}'.encode(),
+        'nested': b'{"ids": [1, 2, 3], "filters": {"status": null, "all": true}}',
+        'duplicate keys': b'{"a": 1, "a": 2}',
+        'overflowing number': b'{"n": 1e400}',
+        'lone surrogate': b'{"s": "\\ud800"}',
+        'NaN literal': b'{"n": NaN}',
+        'trailing comma': b'{"a": 1,}',
+        'empty body': b'',
+        'not JSON': b'course=3',
+    }
+
+    def outcome(self, func):
+        # The value, or the type of error raised
+        try:
+            return func()
+        except (ParseError, ValueError, TypeError) as e:
+            return type(e).__name__
+
+    def test_render(self):
+        for name, value in self.RENDER_CORPUS.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    self.outcome(lambda: ORJSONRenderer().render(value)),
+                    self.outcome(lambda: JSONRenderer().render(value)),
+                )
+
+    def test_parse(self):
+        for name, body in self.PARSE_CORPUS.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    self.outcome(lambda: ORJSONParser().parse(io.BytesIO(body), parser_context={})),
+                    self.outcome(lambda: JSONParser().parse(io.BytesIO(body), parser_context={})),
+                )
+
+    def test_render_issue_serializer_output(self):
+        for issue in self.make_issues(3, assigned_to=self.lecturer):
+            IssueUpdate.objects.create(issue=issue, user=self.lecturer, comment='Forwarded – see the register.')
+        data = IssueSerializer(Issue.objects.all(), many=True).data
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ReferenceDataCacheTests(APITestCase):
+    """
+    Reference responses are answered from the cache: a matching
+    If-None-Match costs no queries, and a catalogue change moves the ETag.
+    """
+
+    def test_not_modified_runs_no_queries(self):
+        for url in ('/api/colleges/', f'/api/colleges/{self.college.pk}/', '/api/org-tree/',
+                    f'/api/courses/?department={self.department.pk}'):
+            with self.subTest(url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_cached_response_runs_no_queries(self):
+        first = self.client.get('/api/colleges/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/colleges/')
+        self.assertEqual(second.content, first.content)
+
+    def test_catalogue_save_changes_etag(self):
+        etag = self.client.get('/api/colleges/')['ETag']
+        self.college.name = 'Computing and Informatics'
+        self.college.save()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/colleges/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['name'], 'Computing and Informatics')
+
+    def test_unrelated_save_keeps_etag(self):
+        etag = self.client.get('/api/colleges/')['ETag']
+        Course.objects.create(code='CSC1200', name='Data Structures', department=self.department)
+        self.assertEqual(self.client.get('/api/colleges/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ConditionalCompressedResponseTests(APITestCase):
+    """
+    Compressed responses carry weak ETags, and sending one back in
+    If-None-Match (with or without W/) gives 304 Not Modified.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Enough rows to take the bodies over COMPRESSION_MIN_SIZE
+        College.objects.bulk_create(College(name=f'College of Studies {n:03d}') for n in range(60))
+        for n in range(40):
+            School.objects.create(name=f'School of Studies {n:03d}', college=cls.college)
+
+    def assertConditionalRoundTrip(self, url, encoding, decompress):
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'), etag)
+
+        identity = self.client.get(url)
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertEqual(identity['ETag'], etag)
+        self.assertEqual(decompress(response.content), identity.content)
+
+        for sent in (etag, etag.removeprefix('W/'), f'"other", {etag}'):
+            with self.subTest(if_none_match=sent):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=sent)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH='W/"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_reference_list(self):
+        self.assertConditionalRoundTrip('/api/colleges/', 'gzip', gzip.decompress)
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_org_tree(self):
+        self.assertConditionalRoundTrip('/api/org-tree/', 'br', brotli.decompress)
+
+    def test_issue_list(self):
+        # No ETag from the view: WeakETagMiddleware hashes the body
+        self.authenticate(self.student)
+        self.make_issues(30)
+        self.assertConditionalRoundTrip('/api/issues/', 'gzip', gzip.decompress)
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the queries behind the issue feeds and the inbox. Each one must
+    be a single range of its index, with no full table scan and no separate
+    sort. Placeholder ids are fine: the planner only needs the query's shape.
+    """
+    # name -> (query, index it must use)
+    HOT_QUERIES = {
+        'student issues (/my-issues/)': (
+            lambda: Issue.objects.filter(student_id=1).order_by('-created_at', '-id')[:51],
+            'issue_student_created_idx'),
+        'assigned issues (/issues/assigned/)': (
+            lambda: Issue.objects.filter(assigned_to_id=1).order_by('-created_at', '-id')[:51],
+            'issue_assignee_created_idx'),
+        'college history (/issues/history/)': (
+            lambda: Issue.objects.filter(college_id=1).order_by('-created_at', '-id')[:51],
+            'issue_college_created_idx'),
+        'notification inbox (/notifications/)': (
+            lambda: Notification.objects.filter(user_id=1).order_by('-created_at', '-id')[:51],
+            'notification_user_created_idx'),
+        'unread notifications (/notifications/?unread=true)': (
+            lambda: Notification.objects.filter(user_id=1, is_read=False).order_by('-created_at', '-id')[:51],
+            'notification_unread_idx'),
+    }
+    # (full table scan, separate sort step) per database vendor
+    PLAN_PATTERNS = {
+        'sqlite': (re.compile(r'\bSCAN \w+\b(?! USING (?:COVERING )?INDEX)'), re.compile(r'USE TEMP B-TREE')),
+        'postgresql': (re.compile(r'\bSeq Scan on\b'), re.compile(r'\bSort\b')),
+    }
+
+    def test_hot_queries_use_their_index(self):
+        if connection.vendor not in self.PLAN_PATTERNS:
+            self.skipTest(f"No plan patterns for {connection.vendor}")
+        full_scan, sort = self.PLAN_PATTERNS[connection.vendor]
+        if connection.vendor == 'postgresql':
+            # Empty tables make seq scans look cheap; we only care whether
+            # the index path exists
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, (build, index) in self.HOT_QUERIES.items():
+            with self.subTest(name):
+                plan = build().explain()
+                self.assertIn(index, plan)
+                self.assertNotRegex(plan, full_scan)
+                self.assertNotRegex(plan, sort)
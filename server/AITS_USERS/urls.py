@@ -24,6 +24,7 @@ router.register(r'departments', views.DepartmentViewSet) # /departments/
 router.register(r'programmes', views.ProgrammeViewSet) # /programmes/
 router.register(r'issues/workflow', IssueWorkflowViewSet, basename='issue-workflow')# /issues/workflow/
 router.register(r'issues', IssueViewSet, basename='issues')
+router.register(r'notifications', views.NotificationViewSet, basename='notifications') # /notifications/
 
 
 
@@ -34,15 +35,22 @@ urlpatterns = [
      
     path('auth/register/', views.RegisterView.as_view(), name='register'), # Register new user
     path('auth/login/', views.CustomTokenObtainPairView.as_view(), name='login'),#Login (JWT token)
+    path('auth/refresh/', views.CustomTokenRefreshView.as_view(), name='token_refresh'), # Rotate refresh token
     path('auth/logout/', views.LogoutView.as_view(), name='logout'), #Logout (blacklist token)
     path('auth/user/', views.UserDetailView.as_view(), name='user_details'), # Get or update current user 
 
 
     path('issues/assigned/', LecturerIssueListView.as_view(), name='assigned-issues'),
     path('issues/history/', RegistrarIssueHistoryView.as_view(), name='issues-history'),
+    path('issues/history/export/', views.RegistrarIssueExportView.as_view(), name='issues-history-export'),
+    path('issues/stats/', views.IssueStatisticsView.as_view(), name='issues-stats'),
+    path('issues/search/', views.IssueSearchView.as_view(), name='issues-search'),
 
     path('', include(router.urls)),
 
+    # Live issue and notification events (server-sent events)
+    path('events/', views.event_stream, name='event-stream'),
+
 
 
     # Send welcome email after registration
@@ -50,6 +58,7 @@ urlpatterns = [
     path('years/', views.YearOptionsView.as_view(), name='year-options'),
     path('semesters/', views.SemesterOptionsView.as_view(), name='semester-options'),  
     path('courses/', views.CourseListView.as_view(), name='courses-list'),  
+    path('org-tree/', views.OrgTreeView.as_view(), name='org-tree'),
     path('departments/filtered/', views.DepartmentListView.as_view(), name='department-filtered'),
     path('programmes/filtered/', views.ProgrammeListView.as_view(), name='programme-filtered'),
     path('issue-categories/', views.IssueCategoryOptionsView.as_view(), name='issue-categories'),
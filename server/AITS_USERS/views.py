@@ -2,22 +2,43 @@ from rest_framework import generics, permissions, status, viewsets,  mixins
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from django.core.validators import validate_email
-from django.core.exceptions import ValidationError
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserRegistrationSerializer, UserSerializer, DepartmentSerializer,ProgrammeSerializer,CollegeSerializer, IssueSerializer, IssueUpdateSerializer, CourseSerializer, NotificationSerializer, SchoolSerializer
-from .models import User, Department, Issue, College, Programme, IssueUpdate, Course, Notification, School
-from django.core.mail import send_mail
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .serializers import UserRegistrationSerializer, UserSerializer, DepartmentSerializer,ProgrammeSerializer,CollegeSerializer, IssueSerializer, IssueUpdateSerializer, CourseSerializer, NotificationSerializer, NotificationMarkReadSerializer, SchoolSerializer, BulkIssueAssignSerializer, BulkIssueTransitionSerializer
+from .models import User, Department, Issue, College, Programme, IssueUpdate, Course, Notification, School, IssueStatistic
+from .outbox import enqueue_email, notify_issue_event, notify_issue_events
+from .issue_stats import summarise_statistics, sync_issue_statistics
+from .search import search_issues
+from .exports import EXPORT_FORMATS, stream_issue_export
+from .querysets import optimize_queryset
+from django.db import transaction
+from django.utils import timezone
 from django.conf import settings
 from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet, GenericViewSet
-
+from .querysets import SerializerQuerysetMixin
+from .projections import ISSUE_LIST, ProjectedListMixin
+from .authentication import USER_CLAIMS, ClaimsJWTAuthentication, add_user_claims
+from .events import get_broker
+from .pagination import IssueCursorPagination, NotificationCursorPagination
+from .notifications import get_unread_count, mark_read
+from .org_tree import build_tree, get_tree_rows
+from .caching import ReferenceDataCacheMixin, get_course_department_map
+from .revocation import RevocableRefreshToken
+
+import asyncio
+import json
+from datetime import datetime, time, timedelta
+from django.utils.dateparse import parse_date
 import os
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
 
 def index(request):
@@ -32,7 +53,7 @@ User = get_user_model() # Get the custom user model
 
 class SendEmailView(APIView):
     """
-    Handles sending welcome emails to users after registration.
+    Queues a welcome email for users after registration.
     """
 
     def post(self, request):
@@ -43,17 +64,9 @@ class SendEmailView(APIView):
         if not recipient_email:
             return Response({"error": "Email address is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.EMAIL_HOST_USER,  # Sender from settings.py
-                [recipient_email],#Recipient list
-                fail_silently=False,
-            )
-            return Response({"message": "Email sent successfully"}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # Delivered by the outbox worker so SMTP never blocks the request
+        enqueue_email(recipient_email, subject, message)
+        return Response({"message": "Email queued for delivery"}, status=status.HTTP_202_ACCEPTED)
 
 
 
@@ -62,18 +75,22 @@ class CustomTokenObtainSerializer(TokenObtainPairSerializer):
     """
     Custom serializer for token authentication that allows login with either email or username.
     """
-    def validate(self, attrs):
-        credentials = {'password': attrs.get("password")}
-        # Allow login with username or email
+    token_class = RevocableRefreshToken
 
+    @classmethod
+    def get_token(cls, user):
+        # Embed role and affiliation so ClaimsJWTAuthentication can build
+        # request.user without loading the User row
+        return add_user_claims(super().get_token(user), user)
 
-        try:
-            validate_email(attrs.get("username"))
-            credentials['email'] = attrs.get("username")
-        except ValidationError:
-            credentials['username'] = attrs.get("username")
-
-        user = authenticate(**credentials) #Authenticate user
+    def validate(self, attrs):
+        # Allow login with username or email; the backend resolves either
+        # with one indexed query
+        user = authenticate(
+            self.context.get('request'),
+            username=attrs.get("username"),
+            password=attrs.get("password"),
+        ) #Authenticate user
         if not user:
             raise AuthenticationFailed("Invalid login credentials")
 
@@ -96,6 +113,46 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """
     
     serializer_class = CustomTokenObtainSerializer
+    # User lookup and the last_login update
+    query_budget = 2
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rotates a refresh token: the old one is revoked and a new pair is issued
+    with the user's current claims.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        # Signature, expiry and the revocation cache
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            pk=refresh.payload.get(jwt_settings.USER_ID_CLAIM), is_active=True,
+        ).only(*USER_CLAIMS).first()
+        if user is None:
+            raise AuthenticationFailed("No active account found for the given token.")
+
+        with transaction.atomic():
+            # Fails if the token was already used, even by another process
+            refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            add_user_claims(refresh, user)
+            refresh.outstand()
+        return {'access': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    """
+    Exchanges a refresh token for a new access and refresh token pair.
+    """
+    serializer_class = CustomTokenRefreshSerializer
+    # Revocation cache sync (every REVOCATION_SYNC_SECONDS), user,
+    # outstanding token, blacklist insert and new outstanding token, plus the
+    # transaction and savepoint statements
+    query_budget = 9
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -103,14 +160,15 @@ class RegisterView(generics.CreateAPIView):
     """
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]#Allow anyone to access this view  (even unauthenticated)
+    query_budget = 6
     
     def perform_create(self, serializer):
         """
-        Ensures the password is hashed before saving the user.
+        Creates the user in one INSERT. UserRegistrationSerializer.create goes
+        through create_user, which hashes the password exactly once.
         """
-        user = serializer.save()
-        user.set_password(serializer.validated_data['password']) # Securely hash the password
-        user.save()
+        with transaction.atomic():
+            serializer.save()
 
 
 
@@ -132,7 +190,7 @@ class LogoutView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            token = RefreshToken(refresh_token)
+            token = RevocableRefreshToken(refresh_token)
             token.blacklist() # Invalidate the refresh token
             return Response(
                 {"message": "Successfully logged out."}, 
@@ -149,27 +207,36 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # The full user row; +1 for tokens without claims
+    query_budget = 2
     
     def get_object(self):
-         # Return the currently logged-in user
-        return self.request.user
+        # Load the full row: request.user is built from token claims and
+        # only carries the fields embedded in the token
+        return User.objects.select_related('college', 'department', 'programme').get(pk=self.request.user.pk)
 
 # ViewSet for listing, creating, updating, deleting colleges
-class CollegeViewSet(viewsets.ModelViewSet):
+class CollegeViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
     queryset = College.objects.all()
+    reference_models = (College,)
     serializer_class = CollegeSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = {'list': 2, 'retrieve': 2}
 # ViewSet for departments
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
+    reference_models = (Department,)
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = {'list': 2, 'retrieve': 2}
 # ViewSet for programmes
-class ProgrammeViewSet(viewsets.ModelViewSet):
+class ProgrammeViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
     queryset = Programme.objects.all()
+    reference_models = (Programme,)
     serializer_class = ProgrammeSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = {'list': 2, 'retrieve': 2}
 
 
 
@@ -183,88 +250,109 @@ class IssueView(APIView):
         serializer = IssueSerializer(data=request.data)
         if serializer.is_valid():
             # Save the issue with the authenticated user as the student
-            serializer.save(student=request.user)
+            with transaction.atomic():
+                issue = serializer.save(student_id=request.user.pk)
+                notify_issue_event(issue, 'created')
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class YearOptionsView(APIView):
+class YearOptionsView(ReferenceDataCacheMixin, APIView):
     permission_classes  = [permissions.AllowAny]
 
     def get(self, request):
         years = ["Year One", "Year Two", "Year Three", "Year Four", "Year Five"]
-        return Response(years)
-class SemesterOptionsView(APIView):
+        return self.cached_response(request, lambda: Response(years))
+class SemesterOptionsView(ReferenceDataCacheMixin, APIView):
 
     permission_classes = [permissions.AllowAny]
     def get(self, request):
         semesters = [1, 2]
-        return Response(semesters)
+        return self.cached_response(request, lambda: Response(semesters))
     
 
 # In your views.py file
 import logging
 logger = logging.getLogger(__name__)
 
-class CourseListView(generics.ListAPIView):
+class CourseListView(ReferenceDataCacheMixin, SerializerQuerysetMixin, generics.ListAPIView):
     serializer_class = CourseSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 4
+    # Courses are resolved through programmes and departments, and fall back
+    # to the authenticated user's programme/department
+    reference_models = (Course, Department, Programme)
+    per_user = True
+
+    def get_reference_variant(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return f'{request.get_full_path()}|{user.programme_id}|{user.department_id}'
+        return request.get_full_path()
+
     def get_queryset(self):
         # Try reading query parameters if provided.
-        department_id = self.request.query_params.get('department')
-        programme_id = self.request.query_params.get('programme')
+        department_id = _parse_id(self.request.query_params.get('department'))
+        programme_id = _parse_id(self.request.query_params.get('programme'))
         logger.debug("CourseListView: department_id=%s, programme_id=%s", department_id, programme_id)
-        
-        # If a programme query parameter is provided, filter courses by that programme's department.
-        if programme_id:
-            try:
-                programme = Programme.objects.get(id=programme_id)
-                logger.debug("Found programme: %s with department: %s", programme, programme.department)
-                qs = Course.objects.filter(department=programme.department)
-                if qs.exists():
-                    return qs
-                else:
-                    logger.debug("No courses found for programme's department.")
-            except Programme.DoesNotExist:
-                logger.debug("Programme with id %s does not exist", programme_id)
-        
-        # If a department query parameter is provided, filter courses by that department.
-        if department_id:
-            qs = Course.objects.filter(department__id=department_id)
-            logger.debug("Filtering courses by department id %s; found %s courses", department_id, qs.count())
-            if qs.exists():
-                return qs
 
-        # Fallback: Use details from the authenticated user.
+        # Departments to try, in order: the programme's department, the
+        # department parameter, then the authenticated user's programme and
+        # department. Both lookups come from the cached department map, so
+        # the only query is the final course fetch.
+        programme_departments, course_departments = get_course_department_map()
+        candidates = [
+            ('programme', programme_departments.get(programme_id)),
+            ('department', department_id),
+        ]
         user = self.request.user
         if user and user.is_authenticated:
-            # If the user has a programme, try using its department.
-            if hasattr(user, 'programme') and user.programme:
-                qs = Course.objects.filter(department=user.programme.department)
-                logger.debug("Using user's programme (id %s) with department %s; found %s courses", 
-                             user.programme.id, user.programme.department, qs.count())
-                if qs.exists():
-                    return qs
-                else:
-                    logger.debug("No courses found for user's programme department.")
-            # If the user has a department set directly.
-            if hasattr(user, 'department') and user.department:
-                qs = Course.objects.filter(department=user.department)
-                logger.debug("Using user's department (id %s); found %s courses", 
-                             user.department.id, qs.count())
-                if qs.exists():
-                    return qs
-                else:
-                    logger.debug("No courses found for user's department.")
-            else:
-                logger.debug("User does not have a programme or department set.")
-        else:
-            logger.debug("No authenticated user found.")
+            candidates += [
+                ("user's programme", programme_departments.get(user.programme_id)),
+                ("user's department", user.department_id),
+            ]
+
+        for reason, candidate in candidates:
+            if candidate in course_departments:
+                logger.debug("Listing courses for department %s from %s", candidate, reason)
+                return Course.objects.filter(department_id=candidate)
 
         # For debugging/testing: return all courses if no courses were found via filtering.
-        qs = Course.objects.all()
-        logger.debug("Fallback: returning all courses; count=%s", qs.count())
-        return qs
+        logger.debug("Fallback: returning all courses")
+        return Course.objects.all()
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class OrgTreeView(ReferenceDataCacheMixin, APIView):
+    """
+    GET /org-tree/ → every college with its schools, departments, programmes
+    and courses. ?college=, ?school= or ?department=<id> returns just that
+    subtree; ?courses=false leaves the courses out.
+    """
+    permission_classes = [permissions.AllowAny]
+    reference_models = (College, School, Department, Programme, Course)
+    # One range scan of the materialised paths; +1 for tokens without claims
+    query_budget = 2
+
+    def get(self, request):
+        return self.cached_response(request, lambda: self.build_response(request))
+
+    def build_response(self, request):
+        courses = request.query_params.get('courses') not in ('0', 'false')
+        for kind in ('college', 'school', 'department'):
+            if kind in request.query_params:
+                object_id = _parse_id(request.query_params[kind])
+                tree = build_tree(get_tree_rows(kind, object_id, courses), courses) if object_id else []
+                if not tree:
+                    return Response({"error": f"{kind.capitalize()} not found"}, status=status.HTTP_404_NOT_FOUND)
+                return Response(tree[0])
+        return Response(build_tree(get_tree_rows(courses=courses), courses))
 
 
 class DepartmentListView(generics.ListAPIView):
@@ -274,8 +362,8 @@ class DepartmentListView(generics.ListAPIView):
     def get_queryset(self):
         # Get departments based on user's college
         user = self.request.user
-        if user.college:
-            return Department.objects.filter(school__college=user.college)
+        if user.college_id:
+            return Department.objects.filter(school__college_id=user.college_id)
         return Department.objects.none()
 
 class ProgrammeListView(generics.ListAPIView):
@@ -289,7 +377,7 @@ class ProgrammeListView(generics.ListAPIView):
             return Programme.objects.filter(department__id=department_id)
         return Programme.objects.none()
 
-class IssueCategoryOptionsView(APIView):
+class IssueCategoryOptionsView(ReferenceDataCacheMixin, APIView):
     """
     API view to return the available issue categories.
     This reads directly from the Issue model's choices.
@@ -299,15 +387,19 @@ class IssueCategoryOptionsView(APIView):
     def get(self, request):
         categories = Issue.ISSUE_CATEGORIES
         data = [{'value': value, 'display': display} for value, display in categories]
-        return Response(data)   
+        return self.cached_response(request, lambda: Response(data))   
 
-class StudentIssueListView(generics.ListAPIView):
+class StudentIssueListView(ProjectedListMixin, SerializerQuerysetMixin, generics.ListAPIView):
     serializer_class = IssueSerializer
+    list_projection = ISSUE_LIST
     permission_classes = [permissions.IsAuthenticated]
+    # One page of issues; +1 for tokens without claims
+    query_budget = 2
+    pagination_class = IssueCursorPagination
 
     def get_queryset(self):
         # Return issues only for the logged-in student
-        return Issue.objects.filter(student=self.request.user).order_by('-created_at') 
+        return Issue.objects.filter(student=self.request.user).order_by('-created_at', '-id')
     
 class IsAcademicRegistrar(permissions.BasePermission):
     """
@@ -321,10 +413,14 @@ class IsAcademicRegistrar(permissions.BasePermission):
         )    
     
     
-class IssueWorkflowViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class IssueWorkflowViewSet(ProjectedListMixin, SerializerQuerysetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = Issue.objects.all()  # Changed from filtering 'open' issues
     serializer_class = IssueSerializer
+    list_projection = ISSUE_LIST
     permission_classes = [permissions.IsAuthenticated]
+    # Bulk actions touch any number of statistics keys in a fixed number of
+    # statements (see BulkWorkflowTests)
+    query_budget = {'list': 2, 'mark_in_progress': 13, 'resolve': 13, 'bulk_assign': 12, 'bulk_transition': 11}
 
     @action(detail=True, methods=['post'], permission_classes=[IsAcademicRegistrar])
     def mark_in_progress(self, request, pk=None):
@@ -335,7 +431,9 @@ class IssueWorkflowViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         issue.status = 'in_progress'
-        issue.save()
+        with transaction.atomic():
+            issue.save()
+            notify_issue_event(issue, 'in_progress')
         return Response({"message": "Marked in progress."}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
@@ -348,60 +446,344 @@ class IssueWorkflowViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         # Ensure the current user is the assigned lecturer
-        if issue.assigned_to != request.user:
+        if issue.assigned_to_id != request.user.pk:
             return Response(
                 {"error": "You are not assigned to this issue"},
                 status=status.HTTP_403_FORBIDDEN
             )
         issue.status = 'resolved'
-        issue.save()
+        with transaction.atomic():
+            issue.save()
+            notify_issue_event(issue, 'resolved')
         return Response({"message": "Marked resolved."}, status=status.HTTP_200_OK)
 
-class LecturerByDepartmentView(generics.ListAPIView):
+    @action(detail=False, methods=['post'], url_path='bulk-assign', permission_classes=[IsAcademicRegistrar])
+    def bulk_assign(self, request):
+        """
+        POST {"ids": [...], "assigned_to": <user id>} → assign many issues and
+        mark them in progress.
+        """
+        serializer = BulkIssueAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignee = serializer.validated_data['assigned_to']
+
+        def assign(issue):
+            if issue.status == 'resolved':
+                return "Resolved issues cannot be reassigned"
+            issue.assigned_to = assignee
+            issue.status = 'in_progress'
+
+        return self.apply_bulk(serializer.validated_data['ids'], assign, 'assigned')
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition', permission_classes=[IsAcademicRegistrar])
+    def bulk_transition(self, request):
+        """
+        POST {"ids": [...], "status": "in_progress" | "resolved"} → move many
+        issues to a new status.
+        """
+        serializer = BulkIssueTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data['status']
+
+        def transition(issue):
+            if target not in Issue.STATUS_TRANSITIONS[issue.status]:
+                return f"Cannot move issue from {issue.status} to {target}"
+            # The same rule as the single resolve action
+            if target == 'resolved' and issue.assigned_to_id != request.user.pk:
+                return "You are not assigned to this issue"
+            issue.status = target
+            if target == 'resolved':
+                issue.resolved_at = timezone.now()
+
+        return self.apply_bulk(serializer.validated_data['ids'], transition, target)
+
+    def apply_bulk(self, ids, change, event):
+        """
+        Load the issues in one query, apply ``change`` to each and save the
+        changed ones with a single bulk_update. ``change`` returns an error
+        message for issues it refuses to change. Only issues in the
+        registrar's college can be changed; others are reported as not found.
+        """
+        results, changed = [], []
+        now = timezone.now()
+        with transaction.atomic():
+            issues = (
+                self.get_queryset()
+                .filter(college_id=self.request.user.college_id)
+                .select_for_update(of=('self',))
+                .select_related('student', 'course', 'assigned_to')
+                .in_bulk(ids)
+            )
+            for issue_id in dict.fromkeys(ids):
+                issue = issues.get(issue_id)
+                error = "Issue not found" if issue is None else change(issue)
+                if error:
+                    results.append({"id": issue_id, "ok": False, "error": error})
+                    continue
+                # bulk_update skips auto_now, so stamp updated_at ourselves
+                issue.updated_at = now
+                changed.append(issue)
+                results.append({"id": issue_id, "ok": True, "status": issue.status})
+
+            Issue.objects.bulk_update(changed, ['status', 'assigned_to', 'updated_at', 'resolved_at'], batch_size=500)
+            # bulk_update sends no signals, so keep the dashboard counts in step here
+            sync_issue_statistics(changed)
+            notify_issue_events(changed, event)
+
+        return Response({"updated": len(changed), "results": results}, status=status.HTTP_200_OK)
+
+class LecturerByDepartmentView(SerializerQuerysetMixin, generics.ListAPIView):
     """
     GET /lecturers/?department=<id> → list lecturers in that dept
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     def get_queryset(self):
         dept_id = self.request.query_params.get('department')
         return User.objects.filter(role='lecturer', department__id=dept_id)
     
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(ProjectedListMixin, SerializerQuerysetMixin, viewsets.ModelViewSet):
     """
-    Provides list/retrieve/partial_update on /api/issues/
+    Provides list/retrieve/partial_update on /api/issues/. Lists use the
+    compact ISSUE_LIST rows; retrieve returns the full nested issue.
     """
     queryset = Issue.objects.all()
     serializer_class = IssueSerializer
+    list_projection = ISSUE_LIST
     permission_classes = [permissions.IsAuthenticated] 
+    query_budget = {'list': 2, 'retrieve': 3, 'create': 23}
 
     def perform_create(self, serializer):
         # ensures student_id=request.user.id on creation
-        serializer.save(student=self.request.user)   
+        with transaction.atomic():
+            issue = serializer.save(student_id=self.request.user.pk)
+            notify_issue_event(issue, 'created')
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            issue = serializer.save()
+            if serializer.validated_data.get('assigned_to'):
+                notify_issue_event(issue, 'assigned')
 
 
-class RegistrarIssueHistoryView(generics.ListAPIView):
+class RegistrarIssueHistoryView(ProjectedListMixin, SerializerQuerysetMixin, generics.ListAPIView):
     """
     GET /issues/history/ → list all issues for students in the registrar’s college,
-    ordered by most recent.
+    ordered by most recent and paginated by cursor (?cursor=, ?page_size=).
     """
     serializer_class = IssueSerializer
+    list_projection = ISSUE_LIST
     permission_classes = [permissions.IsAuthenticated, IsAcademicRegistrar]
+    query_budget = 2
+    pagination_class = IssueCursorPagination
 
     def get_queryset(self):
-        # Only issues whose student is in the same college as the registrar
+        # Only issues whose student is in the same college as the registrar,
+        # read from the (college, created_at, id) index
         user = self.request.user
-        return Issue.objects.filter(student__college=user.college) \
-                            .order_by('-created_at')
+        return Issue.objects.filter(college_id=user.college_id) \
+                            .order_by('-created_at', '-id')
     
 
-class LecturerIssueListView(generics.ListAPIView):
+class RegistrarIssueExportView(APIView):
+    """
+    GET /issues/history/export/ → stream every issue in the registrar's
+    college as CSV (default) or NDJSON (?output=ndjson), newest first.
+    Optional ?from= and ?to= (YYYY-MM-DD, inclusive, on the creation date),
+    ?status= and ?semester= filters.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAcademicRegistrar]
+
+    def get(self, request):
+        params = request.query_params
+        export_format = params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"output must be one of: {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        issues = Issue.objects.filter(college_id=request.user.college_id)
+        for param, lookup in (('from', 'created_at__gte'), ('to', 'created_at__lt')):
+            if params.get(param):
+                try:
+                    day = parse_date(params[param])
+                except ValueError:
+                    day = None
+                if day is None:
+                    return Response({"error": f"{param} must be a date (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+                if param == 'to':
+                    day += timedelta(days=1)
+                # Compare against the start of the day so the created_at index is usable
+                issues = issues.filter(**{lookup: timezone.make_aware(datetime.combine(day, time.min))})
+        if params.get('status'):
+            if params['status'] not in Issue.STATUS_TRANSITIONS:
+                return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+            issues = issues.filter(status=params['status'])
+        if params.get('semester'):
+            semester = _parse_id(params['semester'])
+            if semester is None:
+                return Response({"error": "semester must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+            issues = issues.filter(semester=semester)
+
+        issues = issues.order_by('-created_at', '-id')
+        return stream_issue_export(request._request, issues, export_format, 'issue-history')
+
+
+class LecturerIssueListView(ProjectedListMixin, SerializerQuerysetMixin, generics.ListAPIView):
     """
     GET /api/issues/assigned/ → list issues assigned to the current lecturer
     """
     serializer_class = IssueSerializer
+    list_projection = ISSUE_LIST
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    pagination_class = IssueCursorPagination
+
+    def get_queryset(self):
+        return Issue.objects.filter(assigned_to=self.request.user).order_by('-created_at', '-id')
+
+
+class IssueStatisticsView(APIView):
+    """
+    GET /issues/stats/ → issue counts for the registrar's college by status,
+    category, semester, department and course, plus the median time to
+    resolve. Optional ?department=, ?course= and ?semester= filters.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAcademicRegistrar]
+    query_budget = 2
+
+    def get(self, request):
+        # One indexed read of the precomputed counters
+        rows = IssueStatistic.objects.filter(college_id=request.user.college_id, count__gt=0).select_related('course')
+        for param, lookup in (('department', 'department_id'), ('course', 'course_id'), ('semester', 'semester')):
+            value = _parse_id(request.query_params.get(param))
+            if value is not None:
+                rows = rows.filter(**{lookup: value})
+        return Response(summarise_statistics(rows))
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    The current user's notification inbox, newest first. ?unread=true lists
+    only unread notifications.
+    """
+    serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    # +1 for tokens without claims
+    query_budget = {'list': 2, 'unread_count': 2, 'mark_read': 6}
 
     def get_queryset(self):
-        return Issue.objects.filter(assigned_to=self.request.user).order_by('-created_at')    
\ No newline at end of file
+        notifications = Notification.objects.filter(user_id=self.request.user.pk)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(is_read=False)
+        return notifications
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        GET → {"unread": n} from the user's counter row, for the header badge.
+        """
+        return Response({"unread": get_unread_count(request.user.pk)})
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """
+        POST {"from_id": a, "to_id": b} | {"before": <datetime>} | {"all": true}
+        → mark those unread notifications read in one UPDATE.
+        """
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        marked = mark_read(request.user.pk, data.get('from_id'), data.get('to_id'), data.get('before'))
+        return Response({"marked": marked, "unread": get_unread_count(request.user.pk)}, status=status.HTTP_200_OK)
+
+
+class IssueSearchView(APIView):
+    """
+    GET /issues/search/?q=<terms>[&limit=50] → issues whose description or
+    comments contain every term, best match first. Registrars search their
+    college, lecturers their assigned issues and students their own.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
+    max_limit = 200
+
+    def get_scope(self):
+        user = self.request.user
+        if user.role == 'academic registrar':
+            return Issue.objects.filter(college_id=user.college_id)
+        if user.role == 'lecturer':
+            return Issue.objects.filter(assigned_to_id=user.pk)
+        return Issue.objects.filter(student_id=user.pk)
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Search query 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(_parse_id(request.query_params.get('limit')) or 50, self.max_limit))
+
+        ranked = search_issues(query, scope=self.get_scope(), limit=limit)
+        issues = optimize_queryset(Issue.objects.filter(pk__in=[pk for pk, _ in ranked]), IssueSerializer).in_bulk()
+        results = []
+        for pk, rank in ranked:
+            if pk in issues:
+                data = IssueSerializer(issues[pk]).data
+                data['rank'] = rank
+                results.append(data)
+        return Response({"count": len(results), "results": results})
+
+
+async def event_stream(request):
+    """
+    Server-sent events for the signed-in user: issue changes and new
+    notifications, replacing client polling of /issues/ and /notifications/.
+
+    Browsers' EventSource can't set headers, so the access token may also be
+    passed as ``?token=``.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would tie up a worker thread per client
+        return JsonResponse({"detail": "The event stream is only served over ASGI."}, status=503)
+    user = await _authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    broker = get_broker()
+    subscription = broker.subscribe(user.pk)
+    heartbeat = settings.EVENT_STREAM_HEARTBEAT
+
+    async def stream():
+        try:
+            yield f"retry: {heartbeat * 1000}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'], cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _authenticate_stream(request):
+    auth = ClaimsJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header is not None else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        validated_token = auth.get_validated_token(raw_token)
+        # Tokens without user claims fall back to a database lookup
+        user = await sync_to_async(auth.get_user)(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
@@ -3,6 +3,12 @@ ASGI config for aits project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live event stream (/api/events/) holds a connection open per client, so
+serve the project through ASGI rather than WSGI. gunicorn.conf.py runs
+uvicorn workers, so from the server directory::
+
+    gunicorn aits.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
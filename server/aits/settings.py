@@ -21,7 +21,15 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = True
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+
+# Outbound message queue (see AITS_USERS/outbox.py and `manage.py process_outbox`)
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 30))
+# How long a worker holds a claimed batch before another worker may retry it
+OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 600))
 
 ALLOWED_HOSTS = ['grouph-h.onrender.com', 'group-h.vercel.app', 'localhost', '127.0.0.1', '*']
 CSRF_TRUSTED_ORIGINS = ['https://group-h.vercel.app']
@@ -45,11 +53,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'AITS_USERS.metrics.MetricsMiddleware',
+    'AITS_USERS.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'AITS_USERS.compression.WeakETagMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -77,11 +89,35 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'aits.wsgi.application'
 
+# PostgreSQL connections. With DB_POOL on, each worker process keeps a psycopg
+# pool of DB_POOL_MIN_SIZE open connections, growing by up to
+# DB_POOL_MAX_OVERFLOW under load; a request waits at most DB_POOL_TIMEOUT
+# seconds for a free connection. Connections are checked before being handed
+# out (CONN_HEALTH_CHECKS) and replaced in the background after DB_POOL_MAX_IDLE
+# idle seconds or DB_POOL_MAX_LIFETIME seconds, so requests don't pay for the
+# TLS handshake. Workers x (min size + overflow) must stay under the server's
+# max_connections. Pool statistics are reported at /metrics. With DB_POOL=False
+# each worker keeps one health-checked connection for DB_CONN_MAX_AGE seconds.
 DATABASE_URL = os.environ.get('DATABASE_URL')
+DB_POOL = os.environ.get('DB_POOL', 'True') == 'True'
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(conn_max_age=600, ssl_require=True)
+        'default': dj_database_url.config(
+            # Pooled connections go back to the pool after each request
+            conn_max_age=0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            conn_health_checks=True,
+            ssl_require=True,
+        )
     }
+    if DB_POOL:
+        DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MIN_SIZE + int(os.environ.get('DB_POOL_MAX_OVERFLOW', 8)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+        }
 else:
     DATABASES = {
         'default': {
@@ -90,6 +126,40 @@ else:
         }
     }
 
+# Cache used for reference data. LocMemCache is per process, so set REDIS_URL
+# in production to share invalidations between gunicorn workers.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aits',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Reference data (colleges, departments, programmes, courses, options)
+REFERENCE_DATA_CACHE_TIMEOUT = int(os.environ.get('REFERENCE_DATA_CACHE_TIMEOUT', 300))
+REFERENCE_DATA_MAX_AGE = int(os.environ.get('REFERENCE_DATA_MAX_AGE', 60))
+
+# Password hashing. PASSWORD_HASH_ITERATIONS sets the PBKDF2 work factor;
+# changing it rehashes each password on that user's next login.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 870000))
+PASSWORD_HASHERS = [
+    'AITS_USERS.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',},
@@ -118,15 +188,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'AITS_USERS.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson-backed JSON; both fall back to DRF's stdlib versions without orjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'AITS_USERS.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'AITS_USERS.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Request metrics (/metrics). Scrapes need "Authorization: Bearer <token>";
+# without a token the endpoint is only served when DEBUG is on.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Send a Server-Timing header with each response's db/serializer/total time
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'False') == 'True'
+
+# Query budgets (see AITS_USERS/query_budget.py): 'log' audits a sample of
+# requests and logs N+1 patterns, 'raise' fails the request, 'off' disables.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'log')
+QUERY_BUDGET_SAMPLE_RATE = float(os.environ.get('QUERY_BUDGET_SAMPLE_RATE', 0.01))
+# Runs of one SQL shape allowed per request unless a view sets max_repeated_queries
+QUERY_BUDGET_MAX_REPEATS = 3
+SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_SECONDS', 0.5))
+
+# Live event stream (/api/events/). The in-process broker only reaches streams
+# served by the same process, so it is only the default for local SQLite
+# development; on PostgreSQL (DATABASE_URL) events go through NOTIFY, which
+# reaches every ASGI worker and the process_outbox worker's publications.
+EVENT_BROKER_BACKEND = os.environ.get(
+    'EVENT_BROKER_BACKEND',
+    'AITS_USERS.events.PostgresNotifyBackend' if DATABASE_URL else 'AITS_USERS.events.InProcessBackend',
+)
+EVENT_BROKER_CHANNEL = os.environ.get('EVENT_BROKER_CHANNEL', 'aits_events')
+EVENT_STREAM_HEARTBEAT = int(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+
+# Seconds a User row loaded for a token without claims stays cached in-process
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 30))
+# Seconds between reads of newly blacklisted refresh tokens into each process's
+# revocation cache (AITS_USERS/revocation.py)
+REVOCATION_SYNC_SECONDS = float(os.environ.get('REVOCATION_SYNC_SECONDS', 5))
+
+# Response compression (AITS_USERS/compression.py): encodings in server
+# preference order (zstd and br need the zstandard/brotli packages), their
+# levels, and the smallest non-streaming body worth compressing.
+COMPRESSION_ENCODINGS = os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',')
+COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=20),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -156,9 +274,10 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
+# EmailOrUsernameModelBackend extends ModelBackend and also handles plain
+# usernames, so a failed login runs one backend and one hash.
 AUTHENTICATION_BACKENDS = [
     'AITS_USERS.backends.EmailOrUsernameModelBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
 LOGGING = {
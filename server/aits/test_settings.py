@@ -0,0 +1,7 @@
+"""
+Settings for the test suite (``python manage.py test`` picks them up).
+"""
+from .settings import *  # noqa: F401,F403
+
+# The test suite enforces every view's budget
+TEST_RUNNER = 'AITS_USERS.query_budget.QueryBudgetTestRunner'
@@ -3,10 +3,12 @@ from django.urls import path, include, re_path
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
+from AITS_USERS.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('AITS_USERS.urls')),
+    path('metrics', metrics_view, name='metrics'),
     
     # Serve React app for all other routes
     re_path(r'^(?!api/|admin/).*$', TemplateView.as_view(template_name='index.html')),
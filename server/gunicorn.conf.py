@@ -0,0 +1,15 @@
+"""
+Gunicorn settings, picked up when gunicorn is started from this directory:
+
+    gunicorn aits.asgi:application
+
+The live event stream (/api/events/) needs an ASGI server, so requests are
+served by uvicorn workers instead of gunicorn's default sync workers.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
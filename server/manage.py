@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aits.settings')
+    # The test suite runs with aits/test_settings.py
+    default_settings = 'aits.test_settings' if sys.argv[1:2] == ['test'] else 'aits.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: